@@ -0,0 +1 @@
+"""FastAPI backend; run from this directory (modules import each other by name)"""
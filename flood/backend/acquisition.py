@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime
+
+import numpy as np
+
+from timeseries_store import location_history_key, station_history_key
+from utils import FALLBACK_RAINFALL, SOURCE_FRESH, SOURCE_FALLBACK, SOURCE_HISTORY
+
+logger = logging.getLogger(__name__)
+
+# water_data key of the station's daily history window, used only to build model features;
+# water_levels stays the scraped (hourly) readings the rise rate and current level come from
+HISTORY_WATER_LEVELS = "history_water_levels"
+
+
+def feature_water_levels(water_data: dict) -> list:
+    """Water levels to build model features from: the history window when there is one"""
+    return water_data.get(HISTORY_WATER_LEVELS) or water_data.get('water_levels', [])
+
+
+def reading_timestamp(water_data: dict) -> float:
+    """Unix time of a scrape's latest reading (its ISO timestamp, naive = server time; else now)"""
+    try:
+        return datetime.fromisoformat(water_data["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+class InputAcquirer:
+    """
+    Fetches the model inputs for a station (rainfall and water levels) concurrently.
+
+    Each source has its own deadline; a source that times out or fails is cancelled
+    and replaced with fallback data, so one slow leg never blocks the other.
+
+    With a TimeSeriesStore, the latest reading of each fresh, non-mock scrape is
+    recorded at its own timestamp; once a station's history spans history_min_days
+    days, its daily window is used to build the model features. Rainfall windows are
+    served from history (source "history") while today's value is younger than
+    history_max_age.
+    """
+    def __init__(self, weather_api, scraper, rainfall_timeout: float = 5.0,
+                 water_level_timeout: float = 5.0, scrape_concurrency: int = 16,
+                 history=None, history_max_age: float = 900.0, history_min_days: int = 2):
+        self.weather_api = weather_api
+        self.scraper = scraper
+        self.rainfall_timeout = rainfall_timeout
+        self.water_level_timeout = water_level_timeout
+        # Maximum concurrent water level scrapes for acquire_as_completed
+        self.scrape_concurrency = scrape_concurrency
+        self.history = history
+        self.history_max_age = history_max_age
+        self.history_min_days = history_min_days
+
+    async def _history_call(self, method, *args):
+        """Run a blocking TimeSeriesStore method in a worker thread (None on failure)"""
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+        except Exception as e:
+            logger.error(f"Time-series store {method.__name__} failed: {str(e)}")
+            return None
+
+    async def _rainfall_from_history(self, coords: list, days: int):
+        if self.history is None or not coords:
+            return {}
+        keys = [location_history_key(latitude, longitude) for latitude, longitude in coords]
+        return await self._history_call(self.history.rainfall_windows, keys, days,
+                                        self.history_max_age) or {}
+
+    async def _record_rainfall(self, latitude: float, longitude: float, rainfall: list):
+        if self.history is not None:
+            await self._history_call(self.history.record_rainfall,
+                                     location_history_key(latitude, longitude), rainfall)
+
+    async def _water_levels_from_history(self, water_data: dict, station: str, record: bool):
+        """Record a fresh scrape's latest reading; return water_data with the history window added"""
+        levels = water_data.get('water_levels') or []
+        # Mock readings are random; they must not become history
+        record = record and bool(levels) and not water_data.get('is_mock')
+
+        def record_and_read():
+            if record:
+                self.history.record_water_level(station, levels[-1], reading_timestamp(water_data))
+            return self.history.water_level_window(station, 7)
+
+        window = await self._history_call(record_and_read)
+        if window and len(window) >= self.history_min_days:
+            return {**water_data, HISTORY_WATER_LEVELS: window}
+        return water_data
+
+    async def _fetch_rainfall(self, latitude: float, longitude: float, days: int):
+        history = await self._rainfall_from_history([(latitude, longitude)], days)
+        if history:
+            return next(iter(history.values())), SOURCE_HISTORY
+        try:
+            rainfall, source = await asyncio.wait_for(
+                self.weather_api.get_rainfall_data_with_source(latitude, longitude, days=days),
+                self.rainfall_timeout
+            )
+            if source == SOURCE_FRESH:
+                await self._record_rainfall(latitude, longitude, rainfall)
+            return rainfall, source
+        except asyncio.TimeoutError:
+            logger.warning(f"Rainfall fetch exceeded {self.rainfall_timeout}s, using fallback data")
+        except Exception as e:
+            logger.error(f"Rainfall fetch failed: {str(e)}, using fallback data")
+        return FALLBACK_RAINFALL[-days:], SOURCE_FALLBACK
+
+    async def fetch_water_level(self, state: str, district: str, basin: str, river: str):
+        """
+        Scrape water level data within the deadline
+
+        Returns:
+            Tuple of (water data dict, source)
+        """
+        try:
+            water_data = await asyncio.wait_for(
+                self.scraper.scrape_water_level(state, district, basin, river),
+                self.water_level_timeout
+            )
+            source = water_data.get('source', SOURCE_FRESH)
+            if self.history is not None:
+                water_data = await self._water_levels_from_history(
+                    water_data, station_history_key(state, district, basin, river),
+                    record=source == SOURCE_FRESH
+                )
+            return water_data, source
+        except asyncio.TimeoutError:
+            logger.warning(f"Water level scrape exceeded {self.water_level_timeout}s, using fallback data")
+        except Exception as e:
+            logger.error(f"Water level scrape failed: {str(e)}, using fallback data")
+        return self.scraper.get_fallback_data(), SOURCE_FALLBACK
+
+    async def acquire(self, latitude: float, longitude: float, state: str, district: str,
+                      basin: str, river: str, days: int = 7):
+        """
+        Fetch rainfall and water level data for a station in parallel
+
+        Returns:
+            dict with rainfall_data, water_data, data_sources (per-source
+            fresh/cached/fallback) and acquisition_ms
+        """
+        started = time.perf_counter()
+        (rainfall_data, rainfall_source), (water_data, water_level_source) = await asyncio.gather(
+            self._fetch_rainfall(latitude, longitude, days),
+            self.fetch_water_level(state, district, basin, river)
+        )
+
+        return {
+            "rainfall_data": rainfall_data,
+            "water_data": water_data,
+            "data_sources": {
+                "rainfall": rainfall_source,
+                "water_level": water_level_source
+            },
+            "acquisition_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    async def _fetch_rainfall_batch(self, coords: list, days: int):
+        history = await self._rainfall_from_history(coords, days)
+        results = [None] * len(coords)
+        missing = []
+        for i, (latitude, longitude) in enumerate(coords):
+            window = history.get(location_history_key(latitude, longitude))
+            if window is not None:
+                results[i] = (window, SOURCE_HISTORY)
+            else:
+                missing.append(i)
+        if not missing:
+            return results
+
+        try:
+            rainfall, sources = await asyncio.wait_for(
+                self.weather_api.get_rainfall_batch([coords[i] for i in missing], days=days,
+                                                    with_sources=True),
+                self.rainfall_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Batch rainfall fetch exceeded {self.rainfall_timeout}s, using fallback data")
+            rainfall, sources = np.full((len(missing), days), np.nan), [SOURCE_FALLBACK] * len(missing)
+        except Exception as e:
+            logger.error(f"Batch rainfall fetch failed: {str(e)}, using fallback data")
+            rainfall, sources = np.full((len(missing), days), np.nan), [SOURCE_FALLBACK] * len(missing)
+
+        fresh = {}
+        for i, row, source in zip(missing, rainfall, sources):
+            if np.isnan(row).all():
+                results[i] = (FALLBACK_RAINFALL[-days:], SOURCE_FALLBACK)
+            else:
+                # Days the API reported no value for count as no rain
+                results[i] = (np.nan_to_num(row, nan=0.0).tolist(), source)
+                if source == SOURCE_FRESH and not np.isnan(row).any():
+                    fresh[location_history_key(*coords[i])] = results[i][0]
+
+        if self.history is not None and fresh:
+            def record():
+                for location, values in fresh.items():
+                    self.history.record_rainfall(location, values)
+            await self._history_call(record)
+        return results
+
+    async def acquire_as_completed(self, stations: list, days: int = 7):
+        """
+        Fetch inputs for many stations: rainfall through multi-location requests,
+        water levels through concurrent scrapes bounded by scrape_concurrency.
+
+        Async generator yielding (index into stations, inputs) as soon as a station's
+        inputs are complete, i.e. in completion order rather than station order. Inputs
+        have the same format as acquire; acquisition_ms is the time until that
+        station was complete.
+        """
+        started = time.perf_counter()
+        valid = [
+            i for i, station in enumerate(stations)
+            if not (math.isnan(station["latitude"]) or math.isnan(station["longitude"]))
+        ]
+        semaphore = asyncio.Semaphore(self.scrape_concurrency)
+
+        async def scrape(station):
+            async with semaphore:
+                return await self.fetch_water_level(station["state"], station["district"],
+                                                    station["basin"], station["river"])
+
+        scrapes = {asyncio.ensure_future(scrape(station)): i for i, station in enumerate(stations)}
+        rainfall_task = asyncio.ensure_future(self._fetch_rainfall_batch(
+            [(stations[i]["latitude"], stations[i]["longitude"]) for i in valid], days
+        ))
+        try:
+            rainfall = [(FALLBACK_RAINFALL[-days:], SOURCE_FALLBACK)] * len(stations)
+            for i, result in zip(valid, await rainfall_task):
+                rainfall[i] = result
+
+            pending = set(scrapes)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                acquisition_ms = round((time.perf_counter() - started) * 1000, 1)
+                for task in done:
+                    i = scrapes[task]
+                    rainfall_data, rainfall_source = rainfall[i]
+                    water_data, water_level_source = task.result()
+                    yield i, {
+                        "rainfall_data": rainfall_data,
+                        "water_data": water_data,
+                        "data_sources": {
+                            "rainfall": rainfall_source,
+                            "water_level": water_level_source
+                        },
+                        "acquisition_ms": acquisition_ms
+                    }
+        finally:
+            # The consumer stopped early (e.g. client disconnect): drop the remaining fetches
+            for task in [rainfall_task, *scrapes]:
+                task.cancel()
+
+    async def acquire_batch(self, stations: list, days: int = 7):
+        """
+        Fetch inputs for many stations (see acquire_as_completed)
+
+        Returns:
+            List of dicts in the same format as acquire, one per station
+        """
+        results = [None] * len(stations)
+        async for i, inputs in self.acquire_as_completed(stations, days):
+            results[i] = inputs
+        return results
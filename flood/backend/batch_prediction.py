@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+
+from acquisition import feature_water_levels
+
+logger = logging.getLogger(__name__)
+
+
+def station_info(station: dict):
+    """Station details as reported in prediction responses"""
+    return {
+        "name": station['station_name'],
+        "state": station['state'],
+        "district": station['district'],
+        "basin": station['basin'],
+        "river": station['river'],
+        "latitude": station['latitude'],
+        "longitude": station['longitude']
+    }
+
+
+def prediction_response(station: dict, prediction_result: dict, inputs: dict):
+    """Combine a station record, model result and acquired inputs into the /api/predict response"""
+    water_data = inputs["water_data"]
+    return {
+        **prediction_result,
+        "rainfall_data": inputs["rainfall_data"],
+        "water_levels": water_data.get('water_levels', []),
+        "station_info": station_info(station),
+        "is_mock": water_data.get('is_mock', False),
+        "data_sources": inputs["data_sources"]
+    }
+
+
+class BatchPredictionRunner:
+    """
+    Predicts many stations at once: inputs are acquired in bulk, features are built
+    as one (B, 7, 6) tensor per model pass.
+
+    Stations are processed in chunks of chunk_size so memory stays bounded for large
+    sweeps. Within a chunk, stations are predicted as their inputs arrive: each model
+    pass takes every station that finished acquiring since the previous pass, so
+    results stream back as stations finish instead of after the slowest scrape.
+    """
+    def __init__(self, predictor, acquirer, chunk_size: int = 256, infer=None):
+        self.predictor = predictor
+        self.acquirer = acquirer
+        self.chunk_size = max(1, chunk_size)
+        # Async callable evaluating a (B, 7, 6) batch; defaults to the predictor in a worker thread
+        self.infer = infer or self._infer_in_thread
+
+    async def _infer_in_thread(self, features):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.predictor.predict_proba_batch, features
+        )
+
+    async def run(self, stations: list):
+        """
+        Async generator yielding one response dict per station (same shape as
+        /api/predict, or station_info plus error when that station failed), in the
+        order the stations finish
+        """
+        for start in range(0, len(stations), self.chunk_size):
+            chunk = stations[start:start + self.chunk_size]
+            async for result in self._run_chunk(chunk):
+                yield result
+
+    async def _run_chunk(self, stations: list):
+        started = time.perf_counter()
+        # (index, inputs) pairs as acquisition completes; None once all are in
+        acquired = asyncio.Queue()
+
+        async def acquire():
+            try:
+                async for item in self.acquirer.acquire_as_completed(stations, days=7):
+                    acquired.put_nowait(item)
+            except Exception as e:
+                acquired.put_nowait(e)
+                return
+            acquired.put_nowait(None)
+
+        producer = asyncio.create_task(acquire())
+        predicted = passes = 0
+        try:
+            finished = False
+            while not finished:
+                # Everything that arrived while the previous pass was running
+                items = [await acquired.get()]
+                while not acquired.empty():
+                    items.append(acquired.get_nowait())
+                if isinstance(items[-1], Exception):
+                    raise items[-1]
+                if items[-1] is None:
+                    finished = True
+                    items.pop()
+                if not items:
+                    continue
+
+                results, n_rows = await self._predict(stations, items)
+                predicted += n_rows
+                passes += 1 if n_rows else 0
+                for result in results:
+                    yield result
+        finally:
+            producer.cancel()
+
+        logger.info(
+            f"Batch predicted {predicted}/{len(stations)} stations in {passes} model passes, "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    async def _predict(self, stations: list, items: list):
+        """
+        One model pass over acquired (index, inputs) pairs
+
+        Returns:
+            (responses, number of stations that went through the model)
+        """
+        results = []
+        rows = []
+        for i, station_inputs in items:
+            if station_inputs["water_data"].get('water_levels'):
+                rows.append((i, station_inputs))
+            else:
+                results.append(self._error(stations[i], "No water level data"))
+        if not rows:
+            return results, 0
+
+        try:
+            water_data = [station_inputs["water_data"] for _, station_inputs in rows]
+            features = self.predictor.prepare_features_batch(
+                [station_inputs["rainfall_data"] for _, station_inputs in rows],
+                [feature_water_levels(data) for data in water_data],
+                [data.get('warning_level', 50.0) for data in water_data],
+                [data.get('danger_level', 52.0) for data in water_data]
+            )
+            probabilities = await self.infer(features)
+        except Exception as e:
+            logger.error(f"Batch prediction failed for {len(rows)} stations: {str(e)}")
+            results.extend(self._error(stations[i], f"Prediction failed: {str(e)}") for i, _ in rows)
+            return results, len(rows)
+
+        for (i, station_inputs), probability in zip(rows, probabilities):
+            water_data = station_inputs["water_data"]
+            try:
+                prediction_result = self.predictor.build_prediction(
+                    float(probability),
+                    station_inputs["rainfall_data"],
+                    water_data['water_levels'],
+                    water_data.get('warning_level', 50.0),
+                    water_data.get('danger_level', 52.0)
+                )
+                results.append(prediction_response(stations[i], prediction_result, station_inputs))
+            except Exception as e:
+                results.append(self._error(stations[i], f"Prediction failed: {str(e)}"))
+        return results, len(rows)
+
+    @staticmethod
+    def _error(station: dict, message: str):
+        return {
+            "station_info": station_info(station),
+            "error": message
+        }
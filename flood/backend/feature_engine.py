@@ -0,0 +1,136 @@
+import numpy as np
+
+# Feature layout expected by the LSTM (same order as training)
+FEATURE_COLS = [
+    "Rain_3day_sum",
+    "Rain_7day_sum",
+    "Rain_3day_avg",
+    "Max_Normalized_River_Level",
+    "Avg_Normalized_River_Level",
+    "Max_River_Rise"
+]
+
+# Columns scaled by the pre-fitted MinMaxScaler and their indices in FEATURE_COLS
+SCALE_COLS = ["Rain_3day_sum", "Rain_7day_sum", "Rain_3day_avg", "Max_River_Rise"]
+SCALE_INDICES = [0, 1, 2, 5]
+
+TIME_STEPS = 7
+N_FEATURES = len(FEATURE_COLS)
+
+# Upper bound for Max_River_Rise (cap extreme spikes, same as preprocessing)
+MAX_RIVER_RISE_CAP = 10.0
+# Dominance reduction applied to the max/avg normalized river levels
+LEVEL_DOMINANCE = 0.9
+
+
+def normalize_water_level_banded(level, warning_level, danger_level):
+    """
+    Banded normalization to prevent sigmoid saturation, vectorized over arrays.
+    Maps water levels to 0-1 range with safe/warning/danger zones.
+
+    warning_level and danger_level broadcast against level, so a (B, 7) level
+    array can be normalized with (B, 1) per-station thresholds. NaN readings stay
+    NaN. Training (flood_features.py) imports this same function.
+    """
+    level = np.asarray(level, dtype=float)
+    warning_level = np.asarray(warning_level, dtype=float)
+    danger_level = np.asarray(danger_level, dtype=float)
+
+    danger_range = danger_level - warning_level
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Safe to warning zone: 0.0 to 0.7
+        safe_zone = np.where(warning_level <= 0, 0.0, (level / warning_level) * 0.7)
+        # Warning to danger zone: 0.7 to 1.0
+        danger_zone = np.where(danger_range <= 0, 0.7,
+                               0.7 + ((level - warning_level) / danger_range) * 0.3)
+
+    normalized = np.where(level <= warning_level, safe_zone, danger_zone)
+    normalized = np.where(np.isnan(level), np.nan, normalized)
+
+    # Cap at 0.95 to prevent sigmoid saturation
+    return np.minimum(normalized, 0.95)
+
+
+def pad_rainfall(rainfall_data) -> np.ndarray:
+    """Left-pad rainfall with zeros and keep the last 7 days"""
+    rainfall = np.asarray(rainfall_data, dtype=float).ravel()[-TIME_STEPS:]
+    if len(rainfall) < TIME_STEPS:
+        rainfall = np.concatenate([np.zeros(TIME_STEPS - len(rainfall)), rainfall])
+    return rainfall
+
+
+def pad_water_levels(water_levels) -> np.ndarray:
+    """Right-pad water levels with the latest reading and keep the last 7 days"""
+    levels = np.asarray(water_levels, dtype=float).ravel()
+    if len(levels) == 0:
+        raise ValueError("At least one water level reading is required")
+    if len(levels) < TIME_STEPS:
+        levels = np.concatenate([levels, np.full(TIME_STEPS - len(levels), levels[-1])])
+    return levels[-TIME_STEPS:]
+
+
+def _stack_windows(batch, pad_fn) -> np.ndarray:
+    if isinstance(batch, np.ndarray) and batch.ndim == 2 and batch.shape[1] == TIME_STEPS:
+        return batch.astype(float, copy=False)
+    return np.stack([pad_fn(row) for row in batch])
+
+
+def stack_rainfall(rainfall_batch) -> np.ndarray:
+    """Pad a batch of rainfall series into a (B, 7) array"""
+    return _stack_windows(rainfall_batch, pad_rainfall)
+
+
+def stack_water_levels(water_levels_batch) -> np.ndarray:
+    """Pad a batch of water level series into a (B, 7) array"""
+    return _stack_windows(water_levels_batch, pad_water_levels)
+
+
+def build_features(rainfall, water_levels, warning_level, danger_level) -> np.ndarray:
+    """
+    Build the unscaled feature windows from padded 7-day inputs
+
+    Args:
+        rainfall: Daily rainfall, shape (7,) or (B, 7)
+        water_levels: Daily water levels, shape (7,) or (B, 7)
+        warning_level: Warning level, scalar or shape (B,)
+        danger_level: Danger level, scalar or shape (B,)
+
+    Returns:
+        Feature array of shape (7, 6) or (B, 7, 6), columns as in FEATURE_COLS
+    """
+    rainfall = np.asarray(rainfall, dtype=float)
+    water_levels = np.asarray(water_levels, dtype=float)
+    single = rainfall.ndim == 1
+
+    rainfall = np.atleast_2d(rainfall)
+    water_levels = np.atleast_2d(water_levels)
+    batch_size = rainfall.shape[0]
+    warning_level = np.broadcast_to(np.asarray(warning_level, dtype=float), (batch_size,))[:, None]
+    danger_level = np.broadcast_to(np.asarray(danger_level, dtype=float), (batch_size,))[:, None]
+
+    features = np.empty((batch_size, TIME_STEPS, N_FEATURES))
+
+    # Rain_3day_sum: r[i-2] + r[i-1] + r[i] (zero before day 0), same summation order as sum()
+    padded = np.concatenate([np.zeros((batch_size, 2)), rainfall], axis=1)
+    rain_3day_sum = (padded[:, :-2] + padded[:, 1:-1]) + padded[:, 2:]
+    features[:, :, 0] = rain_3day_sum
+
+    # Rain_7day_sum: cumulative rainfall up to day i
+    features[:, :, 1] = np.cumsum(rainfall, axis=1)
+
+    # Rain_3day_avg: average over the days actually available (1, 2, then 3)
+    features[:, :, 2] = rain_3day_sum / np.minimum(3, np.arange(1, TIME_STEPS + 1))
+
+    # Max/Avg normalized river level up to day i - with banding and reduced dominance
+    running_max = np.maximum.accumulate(water_levels, axis=1)
+    running_mean = np.cumsum(water_levels, axis=1) / np.arange(1, TIME_STEPS + 1)
+    features[:, :, 3] = normalize_water_level_banded(running_max, warning_level, danger_level) * LEVEL_DOMINANCE
+    features[:, :, 4] = normalize_water_level_banded(running_mean, warning_level, danger_level) * LEVEL_DOMINANCE
+
+    # Max river rise (maximum change in consecutive days up to day i), 0 on day 0
+    max_rise = np.zeros((batch_size, TIME_STEPS))
+    max_rise[:, 1:] = np.maximum.accumulate(np.diff(water_levels, axis=1), axis=1)
+    # Clean Max_River_Rise: remove negative values and cap extreme spikes
+    features[:, :, 5] = np.minimum(np.maximum(max_rise, 0), MAX_RIVER_RISE_CAP)
+
+    return features[0] if single else features
@@ -0,0 +1,152 @@
+import numpy as np
+
+from feature_engine import (
+    LEVEL_DOMINANCE, MAX_RIVER_RISE_CAP, N_FEATURES, TIME_STEPS, normalize_water_level_banded
+)
+
+
+class StationFeatureState:
+    """
+    Running 7-day feature window of one station, updated as readings arrive.
+
+    Holds the padded rainfall and water level windows plus per-row prefix aggregates
+    (cumulative sums, running max, running max rise), so a new reading only recomputes
+    the rows it affects: replacing today's value touches the last row, a new day shifts
+    the window and rebases the 7 rows. Nothing is re-read from history, and features()
+    matches build_features on the same inputs exactly.
+    """
+    __slots__ = (
+        "warning_level", "danger_level",
+        "rain", "n_rain", "levels", "n_levels",
+        "rows", "_rain_cum", "_level_cum", "_level_max", "_rise_max", "version"
+    )
+
+    def __init__(self, warning_level: float, danger_level: float, rainfall=(), water_levels=()):
+        self.warning_level = float(warning_level)
+        self.danger_level = float(danger_level)
+        # Rainfall window left-padded with zeros, as pad_rainfall does
+        self.rain = [0.0] * TIME_STEPS
+        self.n_rain = 0
+        # Actual water level readings (last 7); the window right-pads with the latest
+        self.levels = []
+        self.n_levels = 0
+        self.rows = [[0.0] * N_FEATURES for _ in range(TIME_STEPS)]
+        self._rain_cum = [0.0] * TIME_STEPS
+        self._level_cum = [0.0] * TIME_STEPS
+        self._level_max = [0.0] * TIME_STEPS
+        self._rise_max = [0.0] * TIME_STEPS
+        # Incremented on every change, so callers can tell whether to re-score
+        self.version = 0
+
+        self._update_rain(0)
+        for value in list(rainfall)[-TIME_STEPS:]:
+            self.add_rainfall(value)
+        for value in list(water_levels)[-TIME_STEPS:]:
+            self.add_water_level(value)
+
+    @property
+    def ready(self) -> bool:
+        """Whether there is at least one water level reading to build features from"""
+        return self.n_levels > 0
+
+    @property
+    def rainfall_data(self) -> list:
+        """Rainfall readings in the window, oldest first"""
+        return self.rain[TIME_STEPS - self.n_rain:]
+
+    @property
+    def water_levels(self) -> list:
+        """Water level readings in the window, oldest first"""
+        return list(self.levels)
+
+    def add_rainfall(self, rainfall: float, new_day: bool = True):
+        """Append a day's rainfall, or with new_day=False replace today's value"""
+        rainfall = float(rainfall)
+        if new_day or self.n_rain == 0:
+            del self.rain[0]
+            self.rain.append(rainfall)
+            self.n_rain = min(self.n_rain + 1, TIME_STEPS)
+            self._update_rain(0)
+        else:
+            self.rain[-1] = rainfall
+            self._update_rain(TIME_STEPS - 1)
+        self.version += 1
+
+    def add_water_level(self, level: float, new_day: bool = True):
+        """Append a day's water level, or with new_day=False replace today's reading"""
+        level = float(level)
+        if new_day or self.n_levels == 0:
+            if self.n_levels == TIME_STEPS:
+                del self.levels[0]
+                start = 0
+            else:
+                start = self.n_levels
+            self.levels.append(level)
+            self.n_levels = len(self.levels)
+        else:
+            self.levels[-1] = level
+            start = self.n_levels - 1
+        self._update_levels(start)
+        self.version += 1
+
+    def set_thresholds(self, warning_level: float, danger_level: float):
+        if (float(warning_level), float(danger_level)) == (self.warning_level, self.danger_level):
+            return
+        self.warning_level = float(warning_level)
+        self.danger_level = float(danger_level)
+        self._update_levels(0)
+        self.version += 1
+
+    def _update_rain(self, start: int):
+        rain, rows, cum = self.rain, self.rows, self._rain_cum
+        for i in range(start, TIME_STEPS):
+            # Same summation order as build_features (zeros before day 0)
+            rain_3day_sum = ((rain[i - 2] if i >= 2 else 0.0) + (rain[i - 1] if i >= 1 else 0.0)) + rain[i]
+            cum[i] = cum[i - 1] + rain[i] if i else rain[0]
+            row = rows[i]
+            row[0] = rain_3day_sum
+            row[1] = cum[i]
+            row[2] = rain_3day_sum / min(3, i + 1)
+
+    def _update_levels(self, start: int):
+        if not self.levels:
+            return
+        levels, rows = self.levels, self.rows
+        cum, running_max, rise_max = self._level_cum, self._level_max, self._rise_max
+        latest = levels[-1]
+        for i in range(start, TIME_STEPS):
+            level = levels[i] if i < self.n_levels else latest
+            if i == 0:
+                cum[0] = running_max[0] = level
+                rise_max[0] = 0.0
+            else:
+                previous = levels[i - 1] if i - 1 < self.n_levels else latest
+                cum[i] = cum[i - 1] + level
+                running_max[i] = max(running_max[i - 1], level)
+                rise = level - previous
+                rise_max[i] = rise if i == 1 else max(rise_max[i - 1], rise)
+            rows[i][5] = min(max(rise_max[i], 0.0), MAX_RIVER_RISE_CAP)
+
+        # Normalize the affected rows in one call to the same function build_features uses
+        span = range(start, TIME_STEPS)
+        max_normalized = normalize_water_level_banded(
+            [running_max[i] for i in span], self.warning_level, self.danger_level) * LEVEL_DOMINANCE
+        avg_normalized = normalize_water_level_banded(
+            [cum[i] / (i + 1) for i in span], self.warning_level, self.danger_level) * LEVEL_DOMINANCE
+        for i, max_level, avg_level in zip(span, max_normalized.tolist(), avg_normalized.tolist()):
+            rows[i][3] = max_level
+            rows[i][4] = avg_level
+
+    def features(self) -> np.ndarray:
+        """Unscaled (7, 6) feature window, columns as in FEATURE_COLS"""
+        if not self.ready:
+            raise ValueError("At least one water level reading is required")
+        return np.array(self.rows)
+
+
+def stack_state_features(states) -> np.ndarray:
+    """Unscaled (B, 7, 6) feature windows of many station states"""
+    for state in states:
+        if not state.ready:
+            raise ValueError("At least one water level reading is required")
+    return np.array([state.rows for state in states], dtype=float).reshape(-1, TIME_STEPS, N_FEATURES)
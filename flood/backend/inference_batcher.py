@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingMetrics:
+    """
+    Running counters for the micro-batching queue
+    """
+    def __init__(self):
+        self.batches = 0
+        self.samples = 0
+        self.max_batch_size = 0
+        self.last_batch_size = 0
+        self.batch_size_counts = {}
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.total_inference_time = 0.0
+        self.failed_batches = 0
+
+    def record_batch(self, batch_size: int, queue_waits: list, inference_time: float):
+        self.batches += 1
+        self.samples += batch_size
+        self.last_batch_size = batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.batch_size_counts[batch_size] = self.batch_size_counts.get(batch_size, 0) + 1
+        self.total_queue_wait += sum(queue_waits)
+        self.max_queue_wait = max([self.max_queue_wait] + queue_waits)
+        self.total_inference_time += inference_time
+
+    def snapshot(self):
+        """Return the metrics as a JSON-serializable dict (times in ms)"""
+        return {
+            "batches": self.batches,
+            "samples": self.samples,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": round(self.samples / self.batches, 3) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "last_batch_size": self.last_batch_size,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_size_counts.items())},
+            "avg_queue_wait_ms": round(self.total_queue_wait / self.samples * 1000, 3) if self.samples else 0.0,
+            "max_queue_wait_ms": round(self.max_queue_wait * 1000, 3),
+            "avg_inference_ms": round(self.total_inference_time / self.batches * 1000, 3) if self.batches else 0.0,
+        }
+
+
+class _PendingPrediction:
+    __slots__ = ("features", "rainfall_data", "water_levels", "warning_level",
+                 "danger_level", "future", "enqueued_at")
+
+    def __init__(self, features, rainfall_data, water_levels, warning_level, danger_level, future):
+        self.features = features
+        self.rainfall_data = rainfall_data
+        self.water_levels = water_levels
+        self.warning_level = warning_level
+        self.danger_level = danger_level
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceBatcher:
+    """
+    Collects concurrent prediction requests and runs them through the model as one batch.
+
+    Requests are gathered until either max_batch_size samples are queued or max_wait_ms
+    has passed since the first one arrived. The stacked (B, 7, 6) tensor is evaluated off
+    the event loop (worker thread or inference process pool), and each caller gets its own
+    result. Up to max_concurrent_batches batches may be evaluated at the same time.
+    """
+    def __init__(self, predictor, max_batch_size: int = 32, max_wait_ms: float = 5.0, infer=None,
+                 max_concurrent_batches: int = 1):
+        self.predictor = predictor
+        self.max_concurrent_batches = max(1, int(max_concurrent_batches))
+        # Async callable evaluating a (B, 7, 6) batch; defaults to the predictor in a worker thread
+        self.infer = infer or self._infer_in_thread
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.metrics = BatchingMetrics()
+        self.queue = None
+        self._worker = None
+        self._tasks = set()
+
+    async def _infer_in_thread(self, features: np.ndarray) -> np.ndarray:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.predictor.predict_proba_batch, features
+        )
+
+    async def start(self):
+        """Start the background batching task on the running event loop"""
+        if self._worker is not None and not self._worker.done():
+            return
+        self.queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._worker = asyncio.create_task(self._run())
+        logger.info(
+            f"Inference batcher started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:g})"
+        )
+
+    async def stop(self):
+        """
+        Stop the batching task, wait for batches already being evaluated and fail any
+        requests still waiting
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        # In-flight batches may be using the inference pool, which is stopped after this
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if not item.future.done():
+                item.future.set_exception(RuntimeError("Inference batcher stopped"))
+        logger.info("Inference batcher stopped")
+
+    async def predict(self, rainfall_data: list, water_levels: list,
+                      warning_level: float, danger_level: float, feature_water_levels: list = None):
+        """
+        Queue a prediction and wait for the batch it lands in to be evaluated
+
+        Args:
+            feature_water_levels: Daily water levels to build features from (default: water_levels)
+
+        Returns:
+            Same dict as FloodPredictor.predict
+        """
+        if self._worker is None or self._worker.done():
+            await self.start()
+
+        features = self.predictor.prepare_features(rainfall_data, feature_water_levels or water_levels,
+                                                   warning_level, danger_level)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_PendingPrediction(features, rainfall_data, water_levels,
+                                                warning_level, danger_level, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free evaluation slot before collecting, so the batch keeps
+            # growing while earlier batches are still running
+            await self._slots.acquire()
+            batch = []
+            try:
+                batch.append(await self.queue.get())
+                deadline = loop.time() + self.max_wait
+
+                while len(batch) < self.max_batch_size:
+                    if not self.queue.empty():
+                        batch.append(self.queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                self._slots.release()
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(RuntimeError("Inference batcher stopped"))
+                raise
+
+            task = asyncio.create_task(self._process_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task):
+        self._tasks.discard(task)
+        self._slots.release()
+
+    async def _process_batch(self, batch: list):
+        # Callers that gave up (client disconnect, timeout) don't need a model pass
+        batch = [item for item in batch if not item.future.done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        queue_waits = [started - item.enqueued_at for item in batch]
+        features = np.stack([item.features for item in batch])
+
+        try:
+            probabilities = await self.infer(features)
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(batch)} samples: {str(e)}")
+            self.metrics.failed_batches += 1
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        self.metrics.record_batch(len(batch), queue_waits, time.perf_counter() - started)
+
+        for item, probability in zip(batch, probabilities):
+            if item.future.done():
+                continue
+            try:
+                result = self.predictor.build_prediction(float(probability), item.rainfall_data,
+                                                         item.water_levels, item.warning_level,
+                                                         item.danger_level)
+            except Exception as e:
+                item.future.set_exception(e)
+            else:
+                item.future.set_result(result)
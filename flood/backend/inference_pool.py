@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from feature_engine import TIME_STEPS, N_FEATURES
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerCrashed(Exception):
+    """The worker process died or stopped responding"""
+
+
+def _worker_main(conn, input_name: str, output_name: str, max_batch: int, backend: str):
+    """
+    Worker process loop: load the model once, then evaluate batches written to the
+    shared input buffer and write probabilities to the shared output buffer. Only
+    small (command, n) tuples travel over the pipe.
+    """
+    from model_inference import FloodPredictor
+
+    shm_in = shared_memory.SharedMemory(name=input_name)
+    shm_out = shared_memory.SharedMemory(name=output_name)
+    inputs = np.ndarray((max_batch, TIME_STEPS, N_FEATURES), dtype=np.float64, buffer=shm_in.buf)
+    outputs = np.ndarray((max_batch,), dtype=np.float64, buffer=shm_out.buf)
+
+    try:
+        predictor = FloodPredictor(backend=backend)
+        if not predictor.load_model():
+            conn.send(("error", "Model not loaded"))
+            return
+        conn.send(("ready", predictor.warmup_ms))
+
+        while True:
+            try:
+                command, n = conn.recv()
+            except EOFError:
+                break
+            if command == "stop":
+                break
+            if command == "ping":
+                conn.send(("pong", n))
+                continue
+            try:
+                outputs[:n] = predictor.predict_proba_batch(inputs[:n])
+                conn.send(("ok", n))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    finally:
+        del inputs, outputs
+        shm_in.close()
+        shm_out.close()
+
+
+class _Worker:
+    """Parent-side handle of one worker process and its shared buffers"""
+    def __init__(self, ctx, worker_id: int, max_batch: int, backend: str):
+        self.ctx = ctx
+        self.worker_id = worker_id
+        self.max_batch = max_batch
+        self.backend = backend
+        self.shm_in = shared_memory.SharedMemory(
+            create=True, size=max_batch * TIME_STEPS * N_FEATURES * np.dtype(np.float64).itemsize)
+        self.shm_out = shared_memory.SharedMemory(
+            create=True, size=max_batch * np.dtype(np.float64).itemsize)
+        self.inputs = np.ndarray((max_batch, TIME_STEPS, N_FEATURES), dtype=np.float64, buffer=self.shm_in.buf)
+        self.outputs = np.ndarray((max_batch,), dtype=np.float64, buffer=self.shm_out.buf)
+        self.process = None
+        self.conn = None
+        self.lock = asyncio.Lock()
+        self.restarts = 0
+        self.tasks = 0
+        # Warm-up timings reported by the worker after loading the model
+        self.warmup_ms = {}
+
+    def spawn(self, timeout: float):
+        """Start the process and wait until it has loaded the model (blocking)"""
+        parent_conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.shm_in.name, self.shm_out.name, self.max_batch, self.backend),
+            name=f"inference-worker-{self.worker_id}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+        if not parent_conn.poll(timeout):
+            self.kill()
+            raise WorkerCrashed(f"Worker {self.worker_id} did not load the model within {timeout}s")
+        try:
+            status, detail = parent_conn.recv()
+        except EOFError:
+            self.kill()
+            raise WorkerCrashed(f"Worker {self.worker_id} exited during startup")
+        if status != "ready":
+            self.kill()
+            raise WorkerCrashed(f"Worker {self.worker_id} failed to start: {detail}")
+        self.warmup_ms = detail
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def _call(self, command: str, n: int, timeout: float):
+        # A worker whose respawn failed stays in the pool without a process; the
+        # request that picks it up triggers another restart
+        if self.conn is None or not self.is_alive():
+            raise WorkerCrashed(f"Worker {self.worker_id} is not running")
+        try:
+            self.conn.send((command, n))
+            if not self.conn.poll(timeout):
+                raise WorkerCrashed(f"Worker {self.worker_id} timed out after {timeout}s")
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise WorkerCrashed(f"Worker {self.worker_id} died: {str(e)}")
+
+    def run(self, features: np.ndarray, timeout: float) -> np.ndarray:
+        """Evaluate up to max_batch samples (blocking)"""
+        n = len(features)
+        self.inputs[:n] = features
+        status, detail = self._call("predict", n, timeout)
+        if status != "ok":
+            raise RuntimeError(f"Inference failed in worker {self.worker_id}: {detail}")
+        self.tasks += 1
+        return self.outputs[:n].copy()
+
+    def ping(self, timeout: float) -> bool:
+        try:
+            return self._call("ping", 0, timeout)[0] == "pong"
+        except WorkerCrashed:
+            return False
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if self.process is not None:
+            self.process.join(timeout=5)
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def close(self):
+        if self.is_alive():
+            try:
+                self.conn.send(("stop", 0))
+                self.process.join(timeout=5)
+            except (OSError, EOFError):
+                pass
+        self.kill()
+        del self.inputs, self.outputs
+        self.shm_in.close()
+        self.shm_in.unlink()
+        self.shm_out.close()
+        self.shm_out.unlink()
+
+
+class InferencePool:
+    """
+    Pool of worker processes that each load the model once and evaluate batches off
+    the event loop (and off the GIL).
+
+    Features and probabilities are exchanged through per-worker shared-memory buffers,
+    so nothing is pickled per request. A health check restarts workers that crashed
+    or stopped answering pings.
+    """
+    def __init__(self, n_workers: int, backend: str = None, max_batch: int = 256,
+                 timeout: float = 30.0, startup_timeout: float = 120.0,
+                 health_interval: float = 10.0):
+        self.n_workers = n_workers
+        self.backend = backend
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.health_interval = health_interval
+        self.workers = []
+        self._idle = None
+        self._health_task = None
+
+    async def start(self):
+        """Spawn the workers and wait until every one has loaded the model"""
+        if self.workers:
+            return
+        # spawn: TensorFlow is not fork-safe
+        ctx = multiprocessing.get_context("spawn")
+        loop = asyncio.get_running_loop()
+        self._idle = asyncio.Queue()
+        self.workers = [_Worker(ctx, i, self.max_batch, self.backend) for i in range(self.n_workers)]
+        results = await asyncio.gather(*[
+            loop.run_in_executor(None, worker.spawn, self.startup_timeout) for worker in self.workers
+        ], return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            # Stop the workers that did start and release every buffer, so a later
+            # start() spawns a fresh pool instead of returning early
+            await asyncio.gather(*[loop.run_in_executor(None, worker.close) for worker in self.workers])
+            self.workers = []
+            raise errors[0]
+        for worker in self.workers:
+            self._idle.put_nowait(worker)
+        self._health_task = asyncio.create_task(self._health_loop())
+        logger.info(f"Inference pool started with {self.n_workers} workers (max_batch={self.max_batch})")
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        loop = asyncio.get_running_loop()
+
+        async def close(worker):
+            # Let an in-flight batch finish with the shared buffers before they are unlinked
+            async with worker.lock:
+                await loop.run_in_executor(None, worker.close)
+
+        await asyncio.gather(*[close(worker) for worker in self.workers])
+        self.workers = []
+        logger.info("Inference pool stopped")
+
+    async def predict_proba_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Evaluate a (B, 7, 6) batch across the workers (split into max_batch chunks)
+
+        Returns:
+            Array of shape (B,) with raw flood probabilities
+        """
+        chunks = [features[i:i + self.max_batch] for i in range(0, len(features), self.max_batch)]
+        results = await asyncio.gather(*[self._run(chunk) for chunk in chunks])
+        return np.concatenate(results) if results else np.empty(0)
+
+    async def _run(self, features: np.ndarray) -> np.ndarray:
+        worker = await self._idle.get()
+        try:
+            async with worker.lock:
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(
+                        None, worker.run, features, self.timeout
+                    )
+                except WorkerCrashed as e:
+                    logger.error(f"{str(e)}, restarting")
+                    await self._restart(worker)
+                    raise
+        finally:
+            self._idle.put_nowait(worker)
+
+    async def _restart(self, worker: _Worker):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, worker.kill)
+        worker.restarts += 1
+        try:
+            await loop.run_in_executor(None, worker.spawn, self.startup_timeout)
+            logger.info(f"Restarted inference worker {worker.worker_id} (pid {worker.process.pid})")
+        except WorkerCrashed as e:
+            logger.error(f"Failed to restart inference worker: {str(e)}")
+
+    async def _health_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for worker in self.workers:
+                # Busy workers are checked by the request that is using them
+                if worker.lock.locked():
+                    continue
+                try:
+                    async with worker.lock:
+                        healthy = worker.is_alive() and await loop.run_in_executor(
+                            None, worker.ping, self.timeout
+                        )
+                        if not healthy:
+                            logger.warning(f"Inference worker {worker.worker_id} failed health check")
+                            await self._restart(worker)
+                except Exception as e:
+                    # Keep checking the other workers (and later rounds) after an unexpected error
+                    logger.error(f"Health check of inference worker {worker.worker_id} failed: {str(e)}")
+
+    def status(self):
+        return [
+            {
+                "worker": worker.worker_id,
+                "pid": worker.process.pid if worker.process is not None else None,
+                "alive": worker.is_alive(),
+                "busy": worker.lock.locked(),
+                "tasks": worker.tasks,
+                "restarts": worker.restarts,
+                "warmup_ms": worker.warmup_ms
+            }
+            for worker in self.workers
+        ]
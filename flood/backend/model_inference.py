@@ -1,24 +1,54 @@
 import numpy as np
 import pickle
-from tensorflow import keras
+import os
+import time
 import logging
 from pathlib import Path
-from sklearn.preprocessing import MinMaxScaler
+from feature_state import stack_state_features
+from feature_engine import (
+    N_FEATURES, SCALE_COLS, SCALE_INDICES, TIME_STEPS, build_features, normalize_water_level_banded,
+    pad_rainfall, pad_water_levels, stack_rainfall, stack_water_levels
+)
 
 logger = logging.getLogger(__name__)
 
+MODEL_BACKENDS = ("keras", "numpy")
+# Batch sizes evaluated once after loading so the first requests don't pay for tracing
+WARMUP_BATCH_SIZES = (1, 8, 32, 256)
+
 class FloodPredictor:
-    def __init__(self):
+    def __init__(self, backend: str = None, load_scaler: bool = True):
+        # "keras" evaluates the .keras model with TensorFlow, "numpy" uses the exported
+        # .npz weights with the pure-NumPy runtime (no TensorFlow import at serve time)
+        self.backend = (backend or os.environ.get('FLOOD_MODEL_BACKEND', 'keras')).lower()
+        if self.backend not in MODEL_BACKENDS:
+            raise ValueError(f"Unknown model backend '{self.backend}', expected one of {MODEL_BACKENDS}")
         self.model = None
+        # Fixed-signature inference function (keras backend), traced once for any batch size
+        self.infer_fn = None
+        self.warmup_batch_sizes = tuple(
+            int(size) for size in os.environ.get('MODEL_WARMUP_BATCH_SIZES', '').split(',') if size.strip()
+        ) or WARMUP_BATCH_SIZES
+        # Duration in ms of the warm-up pass for each batch size
+        self.warmup_ms = {}
         self.scaler = None
+        # MinMax affine parameters for SCALE_INDICES, extracted once from the scaler
+        self.scaler_scale = None
+        self.scaler_offset = None
+        self.scaler_clip = None
         self.model_path = Path(__file__).parent / "flood_lstm_binary_model.keras"
+        self.weights_path = Path(__file__).parent / "flood_lstm_binary_model.npz"
         #BASE_DIR = Path(__file__).resolve().parent.parent
         #self.model_path = BASE_DIR / "flood_lstm_binary_model.keras"
-        # Load the pre-fitted scaler
-        self.load_scaler()
+        # Load the pre-fitted scaler (callers that warm up in the background pass
+        # load_scaler=False and call load_scaler() themselves)
+        if load_scaler:
+            self.load_scaler()
         
     def load_scaler(self):
         """Load the pre-fitted MinMaxScaler"""
+        # Imported here so constructing a predictor does not pull in scikit-learn
+        from sklearn.preprocessing import MinMaxScaler
         try:
             scaler_path = Path(__file__).parent / "flood_scaler.pkl"
             if scaler_path.exists():
@@ -31,18 +61,91 @@ class FloodPredictor:
         except Exception as e:
             logger.error(f"Failed to load scaler: {str(e)}, using default")
             self.scaler = MinMaxScaler()
+
+        try:
+            self._compile_scaler()
+        except Exception as e:
+            logger.error(f"Failed to compile scaler: {str(e)}")
+
+    def _compile_scaler(self):
+        """
+        Extract the MinMax transform (x * scale_ + min_) for the scaled columns so
+        requests can apply it as a NumPy affine op instead of calling scaler.transform
+        """
+        self.scaler_scale = None
+        self.scaler_offset = None
+        self.scaler_clip = None
+
+        if not hasattr(self.scaler, "scale_"):
+            logger.warning("Scaler is not fitted, feature scaling is unavailable")
+            return
+
+        # Validate column order against the names the scaler was fitted with
+        order = list(range(len(SCALE_COLS)))
+        if hasattr(self.scaler, "feature_names_in_"):
+            fitted_cols = list(self.scaler.feature_names_in_)
+            missing = [col for col in SCALE_COLS if col not in fitted_cols]
+            if missing or len(fitted_cols) != len(SCALE_COLS):
+                raise ValueError(f"Scaler columns {fitted_cols} do not match expected {SCALE_COLS}")
+            order = [fitted_cols.index(col) for col in SCALE_COLS]
+            if order != sorted(order):
+                logger.warning(f"Scaler columns {fitted_cols} reordered to {SCALE_COLS}")
+        elif len(self.scaler.scale_) != len(SCALE_COLS):
+            raise ValueError(f"Scaler has {len(self.scaler.scale_)} columns, expected {len(SCALE_COLS)}")
+
+        self.scaler_scale = np.asarray(self.scaler.scale_, dtype=float)[order]
+        self.scaler_offset = np.asarray(self.scaler.min_, dtype=float)[order]
+        if getattr(self.scaler, "clip", False):
+            self.scaler_clip = tuple(self.scaler.feature_range)
         
-    def load_model(self):
-        """Load the trained LSTM model"""
+    def load_model(self, warm_up: bool = True):
+        """Load the trained LSTM model and (by default) run the warm-up passes"""
         try:
-            logger.info(f"Loading model from {self.model_path}")
-            self.model = keras.models.load_model(str(self.model_path))
+            if self.backend == "numpy":
+                from numpy_lstm import NumpyLSTMModel
+                logger.info(f"Loading NumPy model weights from {self.weights_path}")
+                self.model = NumpyLSTMModel.load(self.weights_path)
+                self.infer_fn = None
+            else:
+                import tensorflow as tf
+                from tensorflow import keras
+                logger.info(f"Loading model from {self.model_path}")
+                self.model = keras.models.load_model(str(self.model_path))
+                # One concrete graph with a dynamic batch dimension: no per-call
+                # model.predict setup and no retracing when the batch size changes
+                model = self.model
+                self.infer_fn = tf.function(
+                    lambda x: model(x, training=False),
+                    input_signature=[tf.TensorSpec([None, TIME_STEPS, N_FEATURES], tf.float32)]
+                )
             
             logger.info("Model loaded successfully. Using built-in preprocessing pipeline.")
-            return True
         except Exception as e:
             logger.error(f"Failed to load model: {str(e)}")
             return False
+
+        if warm_up:
+            try:
+                self.warm_up()
+            except Exception as e:
+                logger.error(f"Model warm-up failed: {str(e)}")
+        return True
+
+    def warm_up(self, batch_sizes: tuple = None):
+        """
+        Run one forward pass per batch size so graph tracing and kernel setup happen
+        at load time instead of on the first requests
+
+        Returns:
+            dict mapping batch size to the duration of its pass in ms
+        """
+        self.warmup_ms = {}
+        for size in batch_sizes or self.warmup_batch_sizes:
+            started = time.perf_counter()
+            self.predict_proba_batch(np.zeros((size, TIME_STEPS, N_FEATURES)))
+            self.warmup_ms[size] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Model warm-up passes (batch size: ms): {self.warmup_ms}")
+        return self.warmup_ms
     
     def prepare_features(self, rainfall_data: list, water_levels: list, 
                         warning_level: float, danger_level: float):
@@ -58,186 +161,183 @@ class FloodPredictor:
         - Max_River_Rise (scaled, cleaned)
         """
         try:
-            # Ensure we have 7 days of rainfall data
-            if len(rainfall_data) < 7:
-                # Pad with zeros if needed
-                rainfall_data = [0] * (7 - len(rainfall_data)) + rainfall_data
-            
-            rainfall_data = rainfall_data[-7:]  # Take last 7 days
-            
-            # Ensure we have water level data
-            if len(water_levels) < 4:
-                water_levels = water_levels + [water_levels[-1]] * (4 - len(water_levels))
-            
-            # Pad water levels to 7 days
-            water_levels = water_levels + [water_levels[-1]] * (7 - len(water_levels))
-            water_levels = water_levels[-7:]
-            
-            # Calculate features for each of the 7 days
-            features = []
-            
-            for i in range(7):
-                # Rain_3day_sum: sum of last 3 days rainfall up to day i
-                rain_3day_sum = sum(rainfall_data[max(0, i-2):i+1])
-                
-                # Rain_7day_sum: sum of all rainfall up to day i
-                rain_7day_sum = sum(rainfall_data[:i+1])
-                
-                # Rain_3day_avg: average of last 3 days
-                rain_3day_avg = rain_3day_sum / min(3, i+1)
-                # Normalize water levels using banded approach (prevents sigmoid saturation)
-                normalized_level = self._normalize_water_level_banded(water_levels[i], warning_level, danger_level)
-                
-                # Max normalized river level (up to day i) - with banding and reduced dominance
-                max_normalized = self._normalize_water_level_banded(max(water_levels[:i+1]), warning_level, danger_level) * 0.9
-                
-                # Avg normalized river level (up to day i) - with banding and reduced dominance
-                avg_normalized = self._normalize_water_level_banded(np.mean(water_levels[:i+1]), warning_level, danger_level) * 0.9
-                
-                # Max river rise (maximum change in consecutive days up to day i)
-                if i > 0:
-                    rises = [water_levels[j] - water_levels[j-1] for j in range(1, i+1)]
-                    max_rise = max(rises) if rises else 0
-                else:
-                    max_rise = 0
-                
-                # Clean Max_River_Rise (same as preprocessing)
-                max_rise = max(0, max_rise)  # Remove negative values
-                max_rise = min(max_rise, 10.0)  # Cap extreme spikes (using reasonable upper bound)
-                
-                features.append([
-                    rain_3day_sum,
-                    rain_7day_sum,
-                    rain_3day_avg,
-                    max_normalized,
-                    avg_normalized,
-                    max_rise
-                ])
-            
-            features = np.array(features)
-            
-            # Apply MinMax scaling to the same columns as training
-            # Scale ONLY: Rain_3day_sum, Rain_7day_sum, Rain_3day_avg, Max_River_Rise
-            scale_cols = ["Rain_3day_sum", "Rain_7day_sum", "Rain_3day_avg", "Max_River_Rise"]
-            scale_indices = [0, 1, 2, 5]  # Corresponding indices in features array
-            
-            # Extract columns to scale
-            features_to_scale = features[:, scale_indices]
-            
-            # Create DataFrame with proper column names to match scaler's training
-            import pandas as pd
-            df_to_scale = pd.DataFrame(features_to_scale, columns=scale_cols)
-            
-            # Transform using the pre-fitted scaler
-            scaled_values = self.scaler.transform(df_to_scale)
-            
-            # Put scaled values back into features array
-            scaled_features = features.copy()
-            scaled_features[:, scale_indices] = scaled_values
-            
-            # Leave Max/Avg_Normalized_River_Level as-is (already 0-1 normalized)
-            
-            return scaled_features
+            features = build_features(pad_rainfall(rainfall_data), pad_water_levels(water_levels),
+                                      warning_level, danger_level)
+            return self._scale_features(features)
             
         except Exception as e:
             logger.error(f"Feature preparation failed: {str(e)}")
             raise
+
+    def prepare_features_batch(self, rainfall_batch, water_levels_batch,
+                               warning_levels, danger_levels):
+        """
+        Prepare features for a batch of stations in one vectorized pass
+
+        Args:
+            rainfall_batch: (B, 7) array or list of per-station rainfall lists
+            water_levels_batch: (B, 7) array or list of per-station water level lists
+            warning_levels: Scalar or (B,) warning levels
+            danger_levels: Scalar or (B,) danger levels
+
+        Returns:
+            Scaled features of shape (B, 7, 6)
+        """
+        try:
+            features = build_features(stack_rainfall(rainfall_batch),
+                                      stack_water_levels(water_levels_batch),
+                                      warning_levels, danger_levels)
+            return self._scale_features(features)
+
+        except Exception as e:
+            logger.error(f"Batch feature preparation failed: {str(e)}")
+            raise
+
+    def prepare_features_from_states(self, states):
+        """
+        Scale the running feature windows of StationFeatureState objects
+
+        Returns:
+            Scaled features of shape (B, 7, 6)
+        """
+        try:
+            return self._scale_features(stack_state_features(states))
+
+        except Exception as e:
+            logger.error(f"State feature preparation failed: {str(e)}")
+            raise
+
+    def _scale_features(self, features: np.ndarray) -> np.ndarray:
+        """
+        Apply MinMax scaling to the same columns as training, in place
+        Scale ONLY: Rain_3day_sum, Rain_7day_sum, Rain_3day_avg, Max_River_Rise
+        """
+        if self.scaler_scale is None:
+            raise Exception("Scaler not fitted")
+
+        for i, col in enumerate(SCALE_INDICES):
+            column = features[..., col]
+            column *= self.scaler_scale[i]
+            column += self.scaler_offset[i]
+            if self.scaler_clip is not None:
+                np.clip(column, self.scaler_clip[0], self.scaler_clip[1], out=column)
+
+        # Leave Max/Avg_Normalized_River_Level as-is (already 0-1 normalized)
+
+        return features
     
     def predict(self, rainfall_data: list, water_levels: list,
-               warning_level: float, danger_level: float):
+               warning_level: float, danger_level: float, feature_water_levels: list = None):
         """
         Make flood prediction using LSTM model with rate-of-rise and rainfall rate overrides
 
+        Args:
+            feature_water_levels: Daily water levels to build features from (default: water_levels);
+                the overrides always use the scraped water_levels
+
         Returns:
             dict with prediction, probability, and status
         """
         try:
-            if self.model is None or self.scaler is None:
-                if not self.load_model():
-                    raise Exception("Model not loaded")
-
             # Prepare features (already scaled)
-            features_scaled = self.prepare_features(rainfall_data, water_levels,
+            features_scaled = self.prepare_features(rainfall_data, feature_water_levels or water_levels,
                                            warning_level, danger_level)
 
             # Reshape for LSTM: (1, 7, 6) - 1 sample, 7 timesteps, 6 features
             features_reshaped = features_scaled.reshape(1, 7, 6)
 
             # Make prediction
-            prediction = self.model.predict(features_reshaped, verbose=0)
-            flood_probability = float(prediction[0][0])
-            print(f"Raw flood probability: {flood_probability:.3f}")
-            # Calculate rate of water rise (last 4 readings)
-            water_rise_rate = self._calculate_water_rise_rate(water_levels)
+            flood_probability = float(self.predict_proba_batch(features_reshaped)[0])
 
-            # Calculate rainfall rate (mm/day for last 3 days)
-            rainfall_rate = self._calculate_rainfall_rate(rainfall_data)
+            return self.build_prediction(flood_probability, rainfall_data, water_levels,
+                                         warning_level, danger_level)
 
-            # Get current water level
-            current_level = water_levels[-1] if water_levels else 0
+        except Exception as e:
+            logger.error(f"Prediction failed: {str(e)}")
+            raise
 
-            # Apply rate-of-rise override logic
-            rate_of_rise_status = self._get_rate_of_rise_status(water_rise_rate, current_level, warning_level, danger_level)
+    def predict_proba_batch(self, features_batch: np.ndarray) -> np.ndarray:
+        """
+        Run a single forward pass over a batch of prepared feature windows
 
-            # Apply rainfall rate override logic
-            rainfall_status = self._get_rainfall_status(rainfall_rate)
+        Args:
+            features_batch: Scaled features of shape (B, 7, 6)
 
-            # Apply water level override logic
-            water_level_status = self._get_water_level_status(current_level, warning_level, danger_level)
+        Returns:
+            Array of shape (B,) with raw flood probabilities
+        """
+        if self.model is None or self.scaler is None:
+            if not self.load_model():
+                raise Exception("Model not loaded")
 
-            # Determine final status based on overrides (consensus-based)
-            final_status = self._combine_statuses(rate_of_rise_status, rainfall_status, water_level_status)
+        if self.infer_fn is not None:
+            prediction = self.infer_fn(np.asarray(features_batch, dtype=np.float32)).numpy()
+        else:
+            prediction = self.model.predict(features_batch, verbose=0)
+        return np.asarray(prediction, dtype=float).reshape(len(features_batch), -1)[:, 0]
 
-            # Soft probability adjustment based on status (preserves ML signal)
-            flood_probability = self._adjust_probability(flood_probability, final_status)
+    def build_prediction(self, flood_probability: float, rainfall_data: list, water_levels: list,
+                         warning_level: float, danger_level: float):
+        """
+        Apply rate-of-rise, rainfall and water level overrides to a raw model probability
 
-            # Final decision logic
-            if flood_probability >= 0.6 and final_status != "Safe":
-                prediction_label = "Flood"
-            elif flood_probability >= 0.75:
-                prediction_label = "Flood"
-            else:
-                prediction_label = "No Flood"
-
-            return {
-                "prediction": prediction_label,
-                "probability": round(flood_probability, 3),
-                "confidence": round(abs(flood_probability - 0.5) * 2, 3),
-                "status": final_status,
-                "current_water_level": current_level,
-                "warning_level": warning_level,
-                "danger_level": danger_level,
-                "water_rise_rate": round(water_rise_rate, 3),
-                "rainfall_rate": round(rainfall_rate, 3),
-                "rate_of_rise_status": rate_of_rise_status,
-                "rainfall_status": rainfall_status,
-                "water_level_status": water_level_status
-            }
+        Returns:
+            dict with prediction, probability, and status
+        """
+        logger.debug(f"Raw flood probability: {flood_probability:.3f}")
+        # Calculate rate of water rise (last 4 readings)
+        water_rise_rate = self._calculate_water_rise_rate(water_levels)
 
-        except Exception as e:
-            logger.error(f"Prediction failed: {str(e)}")
-            raise
+        # Calculate rainfall rate (mm/day for last 3 days)
+        rainfall_rate = self._calculate_rainfall_rate(rainfall_data)
+
+        # Get current water level
+        current_level = water_levels[-1] if water_levels else 0
+
+        # Apply rate-of-rise override logic
+        rate_of_rise_status = self._get_rate_of_rise_status(water_rise_rate, current_level, warning_level, danger_level)
+
+        # Apply rainfall rate override logic
+        rainfall_status = self._get_rainfall_status(rainfall_rate)
+
+        # Apply water level override logic
+        water_level_status = self._get_water_level_status(current_level, warning_level, danger_level)
+
+        # Determine final status based on overrides (consensus-based)
+        final_status = self._combine_statuses(rate_of_rise_status, rainfall_status, water_level_status)
+
+        # Soft probability adjustment based on status (preserves ML signal)
+        flood_probability = self._adjust_probability(flood_probability, final_status)
+
+        # Final decision logic
+        if flood_probability >= 0.6 and final_status != "Safe":
+            prediction_label = "Flood"
+        elif flood_probability >= 0.75:
+            prediction_label = "Flood"
+        else:
+            prediction_label = "No Flood"
+
+        return {
+            "prediction": prediction_label,
+            "probability": round(flood_probability, 3),
+            "confidence": round(abs(flood_probability - 0.5) * 2, 3),
+            "status": final_status,
+            "current_water_level": current_level,
+            "warning_level": warning_level,
+            "danger_level": danger_level,
+            "water_rise_rate": round(water_rise_rate, 3),
+            "rainfall_rate": round(rainfall_rate, 3),
+            "rate_of_rise_status": rate_of_rise_status,
+            "rainfall_status": rainfall_status,
+            "water_level_status": water_level_status
+        }
 
     def _normalize_water_level_banded(self, level: float, warning_level: float, danger_level: float) -> float:
         """
         Banded normalization to prevent sigmoid saturation.
         Maps water levels to 0-1 range with safe/warning/danger zones.
         """
-        if level <= warning_level:
-            # Safe to warning zone: 0.0 to 0.7
-            if warning_level <= 0:
-                return 0.0
-            normalized = (level / warning_level) * 0.7
-        else:
-            # Warning to danger zone: 0.7 to 1.0
-            danger_range = danger_level - warning_level
-            if danger_range <= 0:
-                return 0.7
-            warning_to_danger_ratio = (level - warning_level) / danger_range
-            normalized = 0.7 + (warning_to_danger_ratio * 0.3)
-        
-        # Cap at 0.95 to prevent sigmoid saturation
-        return min(normalized, 0.95)
+        return float(normalize_water_level_banded(level, warning_level, danger_level))
 
     def _calculate_water_rise_rate(self, water_levels: list) -> float:
         """Calculate the rate of water rise in m/hour"""
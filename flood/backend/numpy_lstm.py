@@ -0,0 +1,189 @@
+import json
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Maximum absolute difference from Keras accepted when verifying an export
+DEFAULT_TOLERANCE = 1e-5
+
+SUPPORTED_LAYERS = ("LSTM", "LayerNormalization", "Dropout", "Dense")
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+}
+
+
+class NumpyLSTMModel:
+    """
+    Forward-pass engine over exported Keras weights.
+
+    Exposes predict(x, verbose=0) like a Keras model so FloodPredictor can use
+    either backend interchangeably.
+    """
+    def __init__(self, layers: list):
+        # Each layer is (class_name, config dict, list of weight arrays)
+        self.layers = layers
+
+    @classmethod
+    def load(cls, path):
+        """Load a model exported with export_keras_model"""
+        with np.load(str(path), allow_pickle=False) as data:
+            meta = json.loads(str(data["architecture"]))
+            if meta.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported weights format: {meta.get('format_version')}")
+
+            layers = []
+            for i, layer in enumerate(meta["layers"]):
+                weights = [data[f"layer_{i}_{j}"] for j in range(layer["n_weights"])]
+                layers.append((layer["class_name"], layer["config"], weights))
+        return cls(layers)
+
+    def predict(self, x, verbose=0):
+        """Run the forward pass on a (B, time_steps, n_features) batch"""
+        out = np.asarray(x, dtype=np.float32)
+        for class_name, config, weights in self.layers:
+            if class_name == "LSTM":
+                out = self._lstm(out, config, *weights)
+            elif class_name == "LayerNormalization":
+                out = self._layer_norm(out, config, *weights)
+            elif class_name == "Dense":
+                out = self._dense(out, config, *weights)
+            # Dropout is the identity at inference time
+        return out
+
+    __call__ = predict
+
+    @staticmethod
+    def _lstm(x, config, kernel, recurrent_kernel, bias):
+        activation = ACTIVATIONS[config["activation"]]
+        recurrent_activation = ACTIVATIONS[config["recurrent_activation"]]
+        units = recurrent_kernel.shape[0]
+        batch_size, time_steps, _ = x.shape
+
+        # Input projection for every timestep at once; gates are ordered i, f, c, o
+        x_proj = x @ kernel + bias
+        h = np.zeros((batch_size, units), dtype=x.dtype)
+        c = np.zeros((batch_size, units), dtype=x.dtype)
+        outputs = []
+
+        for t in range(time_steps):
+            z = x_proj[:, t] + h @ recurrent_kernel
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if config["return_sequences"]:
+                outputs.append(h)
+
+        return np.stack(outputs, axis=1) if config["return_sequences"] else h
+
+    @staticmethod
+    def _layer_norm(x, config, gamma, beta):
+        mean = x.mean(axis=-1, keepdims=True)
+        variance = x.var(axis=-1, keepdims=True)
+        return (x - mean) / np.sqrt(variance + config["epsilon"]) * gamma + beta
+
+    @staticmethod
+    def _dense(x, config, kernel, bias):
+        return ACTIVATIONS[config["activation"]](x @ kernel + bias)
+
+
+def export_keras_model(model, npz_path):
+    """
+    Dump the weights of a loaded Keras model into the compact .npz format
+
+    Args:
+        model: Keras Sequential model built by build_lstm_model
+        npz_path: Output path for the .npz file
+    """
+    layers_meta = []
+    arrays = {}
+
+    for i, layer in enumerate(model.layers):
+        class_name = type(layer).__name__
+        if class_name not in SUPPORTED_LAYERS:
+            raise ValueError(f"Layer {layer.name} ({class_name}) is not supported by the NumPy runtime")
+
+        keras_config = layer.get_config()
+        if class_name == "LSTM":
+            if keras_config.get("go_backwards") or keras_config.get("stateful"):
+                raise ValueError(f"LSTM layer {layer.name} must be forward and stateless")
+            config = {key: keras_config[key] for key in
+                      ("activation", "recurrent_activation", "return_sequences")}
+        elif class_name == "LayerNormalization":
+            if list(keras_config["axis"]) not in ([-1], [2], [1]) or not (keras_config["center"] and keras_config["scale"]):
+                raise ValueError(f"LayerNormalization {layer.name} must normalize the last axis with center and scale")
+            config = {"epsilon": keras_config["epsilon"]}
+        elif class_name == "Dense":
+            config = {"activation": keras_config["activation"]}
+        else:
+            config = {}
+
+        if config.get("activation", "linear") not in ACTIVATIONS or \
+                config.get("recurrent_activation", "sigmoid") not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation in layer {layer.name}")
+
+        weights = layer.get_weights()
+        for j, weight in enumerate(weights):
+            arrays[f"layer_{i}_{j}"] = np.asarray(weight, dtype=np.float32)
+
+        layers_meta.append({
+            "name": layer.name,
+            "class_name": class_name,
+            "config": config,
+            "n_weights": len(weights)
+        })
+
+    architecture = json.dumps({"format_version": FORMAT_VERSION, "layers": layers_meta})
+    np.savez_compressed(str(npz_path), architecture=np.array(architecture), **arrays)
+    logger.info(f"Exported {len(layers_meta)} layers to {npz_path}")
+
+
+def compare_with_keras(keras_model, numpy_model, n_samples: int = 512, seed: int = 0) -> float:
+    """Return the maximum absolute output difference on random inputs in the scaled feature range"""
+    _, time_steps, n_features = keras_model.input_shape
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0.0, 1.0, size=(n_samples, time_steps, n_features)).astype(np.float32)
+
+    expected = keras_model.predict(x, verbose=0)
+    actual = numpy_model.predict(x)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def main(argv):
+    from tensorflow import keras
+
+    base_dir = Path(__file__).parent
+    keras_path = Path(argv[1]) if len(argv) > 1 else base_dir / "flood_lstm_binary_model.keras"
+    npz_path = Path(argv[2]) if len(argv) > 2 else keras_path.with_suffix(".npz")
+
+    keras_model = keras.models.load_model(str(keras_path))
+    export_keras_model(keras_model, npz_path)
+
+    max_diff = compare_with_keras(keras_model, NumpyLSTMModel.load(npz_path))
+    print(f"Exported {keras_path.name} -> {npz_path.name} (max abs diff vs Keras: {max_diff:.2e})")
+    if max_diff > DEFAULT_TOLERANCE:
+        print(f"NumPy runtime differs from Keras by more than {DEFAULT_TOLERANCE:g}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main(sys.argv))
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from utils import SOURCE_FALLBACK
+
+logger = logging.getLogger(__name__)
+
+
+def station_key(state: str, district: str, basin: str, river: str):
+    """Key of a station in the risk table (same fields /api/predict is called with)"""
+    return (state, district, basin, river)
+
+
+class RiskTable:
+    """
+    In-memory materialized table of the latest prediction per station, with timestamps
+    """
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, key, result: dict, computed_at: float = None):
+        self._entries[key] = (computed_at or time.time(), result)
+
+    def get(self, key, max_age: float):
+        """
+        Return (result, computed_at) if the entry is younger than max_age seconds, else None
+        """
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry[0] > max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1], entry[0]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RiskScheduler:
+    """
+    Periodically refreshes inputs for every station and materializes batched
+    predictions into a RiskTable, so /api/predict can answer from memory.
+    """
+    def __init__(self, runner, get_stations, table: RiskTable = None, interval: float = 3600.0):
+        self.runner = runner
+        # Callable returning the station records to refresh (re-read on every run,
+        # so station file reloads are picked up)
+        self.get_stations = get_stations
+        self.table = table or RiskTable()
+        self.interval = interval
+        self.last_refresh = None
+        self.last_refresh_seconds = None
+        self.last_refresh_count = 0
+        self._task = None
+
+    async def start(self):
+        """Start the background refresh loop (disabled when interval <= 0)"""
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Risk scheduler started (interval={self.interval:g}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Risk scheduler stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Risk table refresh failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def store(self, result: dict):
+        """
+        Materialize a prediction response; results computed from fallback inputs are
+        skipped so the next request retries the real sources
+        """
+        if "error" in result or SOURCE_FALLBACK in result.get("data_sources", {}).values():
+            return False
+        info = result["station_info"]
+        self.table.put(station_key(info["state"], info["district"], info["basin"], info["river"]), result)
+        return True
+
+    async def refresh(self):
+        """Run batched inference for all stations and update the table"""
+        started = time.perf_counter()
+        stations = self.get_stations()
+        stored = 0
+        async for result in self.runner.run(stations):
+            if self.store(result):
+                stored += 1
+
+        self.last_refresh = time.time()
+        self.last_refresh_seconds = time.perf_counter() - started
+        self.last_refresh_count = stored
+        logger.info(
+            f"Risk table refreshed: {stored}/{len(stations)} stations "
+            f"in {self.last_refresh_seconds:.1f}s"
+        )
+
+    def status(self):
+        return {
+            "entries": len(self.table),
+            "hits": self.table.hits,
+            "misses": self.table.misses,
+            "interval_seconds": self.interval,
+            "last_refresh": datetime.fromtimestamp(self.last_refresh).isoformat() if self.last_refresh else None,
+            "last_refresh_seconds": round(self.last_refresh_seconds, 3) if self.last_refresh_seconds is not None else None,
+            "last_refresh_stations": self.last_refresh_count
+        }
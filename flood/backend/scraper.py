@@ -2,31 +2,82 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
+import asyncio
 import random
 import os
+from collections import OrderedDict
+from types import MappingProxyType
+
+from utils import SOURCE_CACHED, SOURCE_FRESH
+from water_sources import WaterLevelCache, WaterLevelSource
 
 logger = logging.getLogger(__name__)
 
+# River-name n-gram length used by the substring index
+RIVER_NGRAM = 3
+
+def _normalize(value):
+    """Lowercased lookup key (None for missing values, which never match)"""
+    return value.lower() if isinstance(value, str) else None
+
 class MockDataProvider:
-    def __init__(self):
-        self.csv_path = os.path.join(os.path.dirname(__file__), 'mock_water_levels.csv')
+    def __init__(self, csv_path: str = None, match_cache_size: int = 4096):
+        self.csv_path = csv_path or os.path.join(os.path.dirname(__file__), 'mock_water_levels.csv')
         self.data = None
+        # Immutable station records in CSV order, shared by every lookup
+        self.records = ()
+        # (state, district, basin, river) lowercased -> first matching record
+        self._exact_index = {}
+        # Distinct lowercased river names, the first record of each, and an
+        # n-gram -> river ids index used for substring matches
+        self._rivers = []
+        self._river_first = []
+        self._river_ngrams = {}
+        self._match_cache = OrderedDict()
+        self.match_cache_size = match_cache_size
         self.load_data()
 
     def load_data(self):
         """Load mock water level data from CSV"""
         try:
             self.data = pd.read_csv(self.csv_path)
+            self._build_index()
             logger.info(f"Loaded {len(self.data)} stations from mock data CSV")
         except Exception as e:
             logger.error(f"Failed to load mock data CSV: {e}")
             self.data = None
+            self.records = ()
+
+    def _build_index(self):
+        """Build the exact-key hash index and river-name substring index"""
+        self.records = tuple(MappingProxyType(record) for record in self.data.to_dict('records'))
+        self._exact_index = {}
+        self._match_cache = OrderedDict()
+        river_ids = {}
+        self._rivers = []
+        self._river_first = []
+
+        for i, record in enumerate(self.records):
+            key = tuple(_normalize(record[col]) for col in ('state', 'district', 'basin', 'river'))
+            if None not in key:
+                self._exact_index.setdefault(key, i)
+
+            river = key[3]
+            if river is not None and river not in river_ids:
+                river_ids[river] = len(self._rivers)
+                self._rivers.append(river)
+                self._river_first.append(i)
+
+        self._river_ngrams = {}
+        for river_id, river in enumerate(self._rivers):
+            for gram in {river[j:j + RIVER_NGRAM] for j in range(len(river) - RIVER_NGRAM + 1)}:
+                self._river_ngrams.setdefault(gram, []).append(river_id)
 
     async def get_water_level_data(self, state: str, district: str, basin: str, river: str):
         """
         Get mock water level data for the specified station
         """
-        if self.data is None:
+        if not self.records:
             return self._get_fallback_mock_data()
 
         # Find matching station
@@ -66,30 +117,52 @@ class MockDataProvider:
 
     def _find_station(self, state: str, district: str, basin: str, river: str):
         """Find the best matching station in the CSV data"""
-        if self.data is None:
+        if not self.records:
             return None
 
         # Try exact matches first
-        exact_matches = self.data[
-            (self.data['state'].str.lower() == state.lower()) &
-            (self.data['district'].str.lower() == district.lower()) &
-            (self.data['basin'].str.lower() == basin.lower()) &
-            (self.data['river'].str.lower() == river.lower())
-        ]
-
-        if not exact_matches.empty:
-            return exact_matches.iloc[0].to_dict()
+        i = self._exact_index.get((state.lower(), district.lower(), basin.lower(), river.lower()))
+        if i is not None:
+            return self.records[i]
 
         # Try partial matches
-        river_matches = self.data[
-            self.data['river'].str.lower().str.contains(river.lower(), na=False)
-        ]
-
-        if not river_matches.empty:
-            return river_matches.iloc[0].to_dict()
+        i = self._match_river(river.lower())
+        if i is not None:
+            return self.records[i]
 
         # Return first station as fallback
-        return self.data.iloc[0].to_dict() if not self.data.empty else None
+        return self.records[0]
+
+    def _match_river(self, query: str):
+        """
+        Index of the first record whose river name contains query (None if none does).
+        Candidates come from the n-gram index and results are cached per query.
+        """
+        if query in self._match_cache:
+            self._match_cache.move_to_end(query)
+            return self._match_cache[query]
+
+        if len(query) >= RIVER_NGRAM:
+            candidates = None
+            for gram in {query[j:j + RIVER_NGRAM] for j in range(len(query) - RIVER_NGRAM + 1)}:
+                postings = self._river_ngrams.get(gram)
+                if postings is None:
+                    candidates = ()
+                    break
+                if candidates is None or len(postings) < len(candidates):
+                    candidates = postings
+        else:
+            candidates = range(len(self._rivers))
+
+        match = min(
+            (self._river_first[river_id] for river_id in candidates if query in self._rivers[river_id]),
+            default=None
+        )
+
+        self._match_cache[query] = match
+        if len(self._match_cache) > self.match_cache_size:
+            self._match_cache.popitem(last=False)
+        return match
 
     def _generate_water_levels(self, station):
         """Generate realistic water levels with some variation"""
@@ -113,7 +186,8 @@ class MockDataProvider:
 
         return water_levels
 
-    def _get_fallback_mock_data(self):
+    @staticmethod
+    def _get_fallback_mock_data():
         """Fallback mock data when CSV is not available"""
         return {
             "station_name": "Fallback Station",
@@ -127,10 +201,126 @@ class MockDataProvider:
             "is_mock": True
         }
 
+class MockWaterLevelSource(WaterLevelSource):
+    """
+    Water level source serving MockDataProvider data. Every fetch generates new
+    random readings, so responses are not cached (each request sees new data, as
+    before caching was added); use water_level_fixture_server.py with the http
+    source to exercise the cache.
+    """
+    name = "mock"
+    cacheable = False
+
+    def __init__(self, provider: MockDataProvider = None):
+        self.provider = provider or MockDataProvider()
+
+    async def fetch(self, state: str, district: str, basin: str, river: str):
+        return await self.provider.get_water_level_data(state, district, basin, river)
+
+    def status(self):
+        return {"stations": len(self.provider.records)}
+
 # Backward compatibility - create an instance that mimics the old scraper
 class RiverDataScraper:
-    def __init__(self):
-        self.provider = MockDataProvider()
+    """
+    Fetches water level data from a pluggable source (MockDataProvider by default).
+
+    Responses are cached per station for cache_ttl seconds; for stale_ttl seconds
+    after that the cached value is still served while a background refresh runs
+    (stale-while-revalidate). Sources with cacheable = False (the mock source) are
+    never cached. Concurrent fetches for the same station are coalesced.
+    """
+    def __init__(self, source: WaterLevelSource = None, cache_ttl: float = 300.0,
+                 stale_ttl: float = 900.0, cache_size: int = 4096):
+        self.source = source or MockWaterLevelSource()
+        self.cache = WaterLevelCache(ttl=cache_ttl, stale_ttl=stale_ttl, maxsize=cache_size)
+        self.use_cache = self.cache.ttl > 0 and self.source.cacheable
+        self._inflight = {}
+        self.stats = {"cache_hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                      "upstream_requests": 0, "upstream_errors": 0}
+
+    @property
+    def provider(self):
+        """MockDataProvider of the mock source (None for other sources)"""
+        return getattr(self.source, "provider", None)
+
+    async def start(self):
+        await self.source.start()
+
+    async def close(self):
+        await self.source.close()
 
     async def scrape_water_level(self, state: str, district: str, basin: str, river: str):
-        return await self.provider.get_water_level_data(state, district, basin, river)
+        key = (state.lower(), district.lower(), basin.lower(), river.lower())
+        cached = self.cache.get(key) if self.use_cache else None
+        if cached is not None:
+            water_data, age = cached
+            if age <= self.cache.ttl:
+                self.stats["cache_hits"] += 1
+            else:
+                self.stats["stale_hits"] += 1
+                self._revalidate(key, state, district, basin, river)
+            return {**water_data, "source": SOURCE_CACHED}
+
+        self.stats["misses"] += 1
+        water_data = await self._single_flight(key, lambda: self._fetch(key, state, district, basin, river))
+        return {**water_data, "source": SOURCE_FRESH}
+
+    async def _fetch(self, key, state: str, district: str, basin: str, river: str):
+        self.stats["upstream_requests"] += 1
+        try:
+            water_data = await self.source.fetch(state, district, basin, river)
+        except Exception:
+            self.stats["upstream_errors"] += 1
+            raise
+        if self.use_cache:
+            self.cache.set(key, water_data)
+        return water_data
+
+    async def _single_flight(self, key, fetch):
+        """Run fetch() once per key, sharing the result with concurrent callers"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._inflight.pop(key, None)
+                               if self._inflight.get(key) is done else None)
+        return await asyncio.shield(task)
+
+    def _revalidate(self, key, state: str, district: str, basin: str, river: str):
+        """
+        Refresh a stale entry in the background (at most one refresh per station). The
+        refresh is the fetch itself, so a cache miss that joins it through _single_flight
+        gets the fetched data (or the fetch's error).
+        """
+        if key in self._inflight:
+            return
+
+        def done(task):
+            if self._inflight.get(key) is task:
+                self._inflight.pop(key, None)
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"Background water level refresh failed for {river}: {str(task.exception())}")
+
+        task = asyncio.ensure_future(self._fetch(key, state, district, basin, river))
+        self._inflight[key] = task
+        task.add_done_callback(done)
+
+    def get_fallback_data(self):
+        """Water level data to use when scraping fails or times out"""
+        return MockDataProvider._get_fallback_mock_data()
+
+    def status(self):
+        source_status = getattr(self.source, "status", None)
+        return {
+            "source": self.source.name,
+            "cache_enabled": self.use_cache,
+            "cache_entries": len(self.cache),
+            "cache_ttl_seconds": self.cache.ttl,
+            "stale_ttl_seconds": self.cache.stale_ttl,
+            **self.stats,
+            "upstream": source_status() if source_status is not None else {}
+        }
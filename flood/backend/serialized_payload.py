@@ -0,0 +1,95 @@
+import gzip
+import hashlib
+import json
+import logging
+
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+
+class SerializedPayload:
+    """
+    A JSON response body that is encoded (and compressed) once and served as bytes.
+
+    Each representation gets a strong ETag derived from the content hash, and
+    requests whose If-None-Match matches are answered with 304 Not Modified.
+    """
+    def __init__(self, payload):
+        # Same encoding options as starlette's JSONResponse
+        self.body = json.dumps(
+            payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+
+        # encoding -> (body, etag); identity is always present
+        self.representations = {"identity": (self.body, f'"{digest}"')}
+        self.representations["gzip"] = (gzip.compress(self.body, compresslevel=9, mtime=0),
+                                        f'"{digest}-gzip"')
+        if brotli is not None:
+            self.representations["br"] = (brotli.compress(self.body), f'"{digest}-br"')
+
+        self._etags = {etag for _, etag in self.representations.values()}
+        logger.info(
+            f"Serialized payload: {len(self.body)} bytes, "
+            + ", ".join(f"{enc} {len(body)} bytes" for enc, (body, _) in self.representations.items()
+                        if enc != "identity")
+        )
+
+    def _choose_encoding(self, accept_encoding: str) -> str:
+        """
+        Accepted representation with the highest q-value; ties prefer br, then gzip,
+        then identity. identity is also the fallback when nothing else is acceptable.
+        """
+        accepted = {}
+        for part in accept_encoding.split(","):
+            coding, *params = part.split(";")
+            quality = 1.0
+            for param in params:
+                name, _, value = param.strip().partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            coding = coding.strip().lower()
+            if coding:
+                accepted[coding] = quality
+
+        best, best_quality = "identity", 0.0
+        for encoding in ("br", "gzip", "identity"):
+            quality = accepted.get(encoding, accepted.get("*", 0.0))
+            if encoding in self.representations and quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def _not_modified(self, if_none_match: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag in self._etags:
+                return True
+        return False
+
+    def to_response(self, request) -> Response:
+        """Build the response for a request, honouring Accept-Encoding and If-None-Match"""
+        encoding = self._choose_encoding(request.headers.get("accept-encoding", ""))
+        body, etag = self.representations[encoding]
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+        if self._not_modified(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
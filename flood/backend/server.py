@@ -1,13 +1,22 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from startup import ModelLoader, StartupTimings
+
+# Import time per module is included in the startup timing log
+startup_timings = StartupTimings()
+
+with startup_timings.measure("import fastapi"):
+    from fastapi import FastAPI, APIRouter, HTTPException, Request
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel
 from typing import List, Optional
-import pandas as pd
+from contextlib import asynccontextmanager
 import json
+import asyncio
+from datetime import datetime
 import numpy as np
 
 class CustomJSONEncoder(json.JSONEncoder):
@@ -16,15 +25,69 @@ class CustomJSONEncoder(json.JSONEncoder):
             return None
         return super().default(obj)
 
-from scraper import RiverDataScraper
-from model_inference import FloodPredictor
-from utils import WeatherAPI
+with startup_timings.measure("import scraper"):
+    from scraper import RiverDataScraper
+with startup_timings.measure("import water_sources"):
+    from water_sources import HTTPClientPool, HTTPWaterLevelSource
+with startup_timings.measure("import model_inference"):
+    from model_inference import FloodPredictor
+with startup_timings.measure("import utils"):
+    from utils import WeatherAPI
+with startup_timings.measure("import inference_batcher"):
+    from inference_batcher import InferenceBatcher
+with startup_timings.measure("import inference_pool"):
+    from inference_pool import InferencePool
+with startup_timings.measure("import station_index"):
+    from station_index import StationIndex
+with startup_timings.measure("import timeseries_store"):
+    from timeseries_store import TimeSeriesStore
+with startup_timings.measure("import acquisition"):
+    from acquisition import InputAcquirer, feature_water_levels
+with startup_timings.measure("import batch_prediction"):
+    from batch_prediction import BatchPredictionRunner, prediction_response
+with startup_timings.measure("import risk_scheduler"):
+    from risk_scheduler import RiskScheduler, station_key
+with startup_timings.measure("import stream_scoring"):
+    from stream_scoring import ContinuousScorer, UnknownStation
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await weather_api.start()
+    await scraper.start()
+    loading = model_loader.start()
+    stations_loading = asyncio.create_task(load_stations())
+    if MODEL_LOAD_MODE != 'background':
+        await loading
+        await stations_loading
+    await batcher.start()
+    stations_watcher = asyncio.create_task(watch_stations_file(stations_loading))
+    scheduler_start = asyncio.create_task(start_risk_scheduler())
+    yield
+    scheduler_start.cancel()
+    stations_loading.cancel()
+    await continuous_scorer.stop()
+    await risk_scheduler.stop()
+    stations_watcher.cancel()
+    await batcher.stop()
+    await model_loader.stop()
+    if inference_pool is not None:
+        await inference_pool.stop()
+    await scraper.close()
+    await weather_api.close()
+    if history is not None:
+        history.close()
+
+async def start_risk_scheduler():
+    """Start precomputing risk and scoring ingested readings once the model can serve batches"""
+    if await model_loader.wait_ready():
+        await risk_scheduler.start()
+        await continuous_scorer.start()
+
 # Create the main app
-app = FastAPI(json_encoder=CustomJSONEncoder)
+app = FastAPI(json_encoder=CustomJSONEncoder, lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -37,25 +100,137 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Initialize components
-scraper = RiverDataScraper()
-predictor = FloodPredictor()
-weather_api = WeatherAPI()
+# WATER_LEVEL_SOURCE selects where water levels come from: "mock" (MockDataProvider)
+# or "http" (an endpoint such as water_level_fixture_server.py at WATER_LEVEL_SOURCE_URL)
+WATER_LEVEL_SOURCE = os.environ.get('WATER_LEVEL_SOURCE', 'mock').lower()
+water_level_source = HTTPWaterLevelSource(
+    os.environ.get('WATER_LEVEL_SOURCE_URL', 'http://localhost:8002/water-level'),
+    HTTPClientPool(
+        host_concurrency=int(os.environ.get('WATER_LEVEL_HOST_CONCURRENCY', '4')),
+        rate_limit=float(os.environ.get('WATER_LEVEL_RATE_LIMIT', '5'))
+    )
+) if WATER_LEVEL_SOURCE == 'http' else None
+scraper = RiverDataScraper(
+    source=water_level_source,
+    cache_ttl=float(os.environ.get('WATER_LEVEL_CACHE_TTL', '300')),
+    stale_ttl=float(os.environ.get('WATER_LEVEL_STALE_TTL', '900'))
+)
+# The scaler and model are loaded by model_loader when the app starts
+predictor = FloodPredictor(load_scaler=False)
+weather_api = WeatherAPI(
+    base_url=os.environ.get('WEATHER_API_URL', 'https://api.open-meteo.com/v1/forecast'),
+    cache_ttl=float(os.environ.get('WEATHER_CACHE_TTL', '900'))
+)
+# INFERENCE_WORKERS > 0 runs the model in that many worker processes instead of a thread
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '0'))
+inference_pool = InferencePool(
+    INFERENCE_WORKERS,
+    backend=predictor.backend,
+    timeout=float(os.environ.get('INFERENCE_WORKER_TIMEOUT', '30'))
+) if INFERENCE_WORKERS > 0 else None
+infer = inference_pool.predict_proba_batch if inference_pool is not None else None
+# MODEL_LOAD_MODE=background binds the port first and warms the model up afterwards
+# (see /api/ready); the default "eager" finishes loading before serving requests
+MODEL_LOAD_MODE = os.environ.get('MODEL_LOAD_MODE', 'eager').lower()
+# How long model endpoints wait for a loading model before answering 503
+MODEL_READY_TIMEOUT = float(os.environ.get('MODEL_READY_TIMEOUT', '30'))
+model_loader = ModelLoader(predictor, pool=inference_pool, timings=startup_timings)
+# Local history of water level and rainfall readings (HISTORY_DB='' disables it)
+HISTORY_DB = os.environ.get('HISTORY_DB', str(ROOT_DIR / 'history.sqlite3'))
+history = None
+if HISTORY_DB:
+    try:
+        history = TimeSeriesStore(
+            HISTORY_DB,
+            retention_days=float(os.environ.get('HISTORY_RETENTION_DAYS', '90'))
+        )
+    except Exception as e:
+        logger.error(f"Failed to open time-series store {HISTORY_DB}: {e}")
+acquirer = InputAcquirer(
+    weather_api,
+    scraper,
+    rainfall_timeout=float(os.environ.get('RAINFALL_TIMEOUT', '5')),
+    water_level_timeout=float(os.environ.get('WATER_LEVEL_TIMEOUT', '5')),
+    scrape_concurrency=int(os.environ.get('BATCH_SCRAPE_CONCURRENCY', '16')),
+    history=history,
+    history_max_age=float(os.environ.get('WEATHER_CACHE_TTL', '900')),
+    history_min_days=int(os.environ.get('HISTORY_MIN_DAYS', '2'))
+)
+batch_runner = BatchPredictionRunner(
+    predictor,
+    acquirer,
+    chunk_size=int(os.environ.get('BATCH_PREDICT_CHUNK_SIZE', '256')),
+    infer=infer
+)
+# Precomputed predictions served by /api/predict while younger than RISK_MAX_AGE seconds
+RISK_MAX_AGE = float(os.environ.get('RISK_MAX_AGE', '3600'))
+risk_scheduler = RiskScheduler(
+    batch_runner,
+    lambda: list(station_index.by_state_river.values()) if station_index is not None else [],
+    interval=float(os.environ.get('RISK_REFRESH_INTERVAL', '3600'))
+)
+batcher = InferenceBatcher(
+    predictor,
+    max_batch_size=int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', '32')),
+    max_wait_ms=float(os.environ.get('INFERENCE_BATCH_WINDOW_MS', '5')),
+    infer=infer,
+    max_concurrent_batches=max(1, INFERENCE_WORKERS)
+)
+
+# Re-scores stations whose pushed sensor readings changed (see /api/ingest)
+continuous_scorer = ContinuousScorer(
+    predictor,
+    infer=infer,
+    max_batch_size=int(os.environ.get('INGEST_SCORE_BATCH_SIZE', '256')),
+    window_ms=float(os.environ.get('INGEST_SCORE_WINDOW_MS', '50')),
+    # Only stations in the station list get a state (any station until it has loaded)
+    known_station=lambda key: station_index is None or station_index.has_station(*key),
+    max_stations=int(os.environ.get('INGEST_MAX_STATIONS', '10000'))
+)
+# Seconds between keep-alive comments on idle /api/stream/status connections
+SSE_KEEPALIVE_INTERVAL = float(os.environ.get('SSE_KEEPALIVE_INTERVAL', '15'))
 
 # Load stations data
 STATIONS_FILE = ROOT_DIR / "stations.xlsx"
+STATIONS_RELOAD_INTERVAL = float(os.environ.get('STATIONS_RELOAD_INTERVAL', '30'))
+# Loaded off the event loop when the app starts (see load_stations); station endpoints
+# answer "Stations data not loaded" until then
 stations_df = None
+station_index = None
 
-try:
-    stations_df = pd.read_excel(STATIONS_FILE)
-    # Clean NaN values in string columns
-    stations_df['Basin Name'] = stations_df['Basin Name'].fillna('')
-    stations_df['River Name'] = stations_df['River Name'].fillna('')
-    logger.info(f"Loaded {len(stations_df)} stations")
-except Exception as e:
-    logger.error(f"Failed to load stations data: {e}")
+async def load_stations():
+    """Build the station index from the stations file without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    try:
+        with startup_timings.measure("station load"):
+            index = await loop.run_in_executor(None, StationIndex.from_file, STATIONS_FILE)
+        set_station_index(index)
+        logger.info(f"Loaded {len(index)} stations")
+    except Exception as e:
+        logger.error(f"Failed to load stations data: {e}")
+
+def set_station_index(index: StationIndex):
+    """Swap in a new station index (single reference assignment, so readers never see a partial one)"""
+    global station_index, stations_df
+    station_index = index
+    stations_df = index.stations_df
 
-# Load model at startup
-predictor.load_model()
+async def watch_stations_file(initial_load: asyncio.Task = None):
+    """Rebuild the station index in the background whenever the stations file changes"""
+    loop = asyncio.get_running_loop()
+    if initial_load is not None:
+        await initial_load
+    while True:
+        await asyncio.sleep(STATIONS_RELOAD_INTERVAL)
+        try:
+            mtime = STATIONS_FILE.stat().st_mtime
+            if station_index is not None and mtime == station_index.source_mtime:
+                continue
+            index = await loop.run_in_executor(None, StationIndex.from_file, STATIONS_FILE)
+            set_station_index(index)
+            logger.info(f"Reloaded {len(index)} stations from {STATIONS_FILE.name}")
+        except Exception as e:
+            logger.error(f"Failed to reload stations data: {e}")
 
 # Define Models
 class StationInfo(BaseModel):
@@ -75,6 +250,27 @@ class PredictionRequest(BaseModel):
     river: str
     station_name: Optional[str] = None
 
+class BatchPredictionRequest(BaseModel):
+    state: Optional[str] = None
+    district: Optional[str] = None
+    basin: Optional[str] = None
+    station_names: Optional[List[str]] = None
+
+class SensorReading(BaseModel):
+    state: str
+    district: str
+    basin: str
+    river: str
+    water_level: Optional[float] = None
+    rainfall: Optional[float] = None
+    warning_level: Optional[float] = None
+    danger_level: Optional[float] = None
+    # False replaces today's value instead of starting a new day
+    new_day: bool = True
+
+class IngestRequest(BaseModel):
+    readings: List[SensorReading]
+
 class PredictionResponse(BaseModel):
     prediction: str
     probability: float
@@ -91,40 +287,72 @@ class PredictionResponse(BaseModel):
 async def root():
     return {"message": "FloodWatch India API", "version": "1.0"}
 
+@api_router.get("/ready")
+async def readiness():
+    """
+    Model load state and startup timing breakdown; 503 until the model can serve predictions
+    """
+    status = model_loader.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+async def require_model():
+    """Wait (up to MODEL_READY_TIMEOUT) for the model to finish loading"""
+    if not await model_loader.wait_ready(MODEL_READY_TIMEOUT):
+        raise HTTPException(status_code=503, detail=f"Model not ready ({model_loader.state})")
+
+@api_router.get("/metrics/inference")
+async def get_inference_metrics():
+    """
+    Batch size and queue wait metrics for the inference batcher
+    """
+    metrics = batcher.metrics.snapshot()
+    if inference_pool is not None:
+        metrics["workers"] = inference_pool.status()
+    return metrics
+
+@api_router.get("/metrics/water-level")
+async def get_water_level_status():
+    """
+    Cache, coalescing and upstream throttling counters of the water level scraper
+    """
+    return scraper.status()
+
+@api_router.get("/metrics/history")
+async def get_history_status():
+    """
+    Size of the local water level and rainfall history
+    """
+    if history is None:
+        return {"enabled": False}
+    return {"enabled": True, **await asyncio.get_running_loop().run_in_executor(None, history.status)}
+
+@api_router.get("/metrics/ingest")
+async def get_ingest_status():
+    """
+    Readings ingested, stations scored and status events published by the continuous scorer
+    """
+    return continuous_scorer.status()
+
+@api_router.get("/metrics/risk-table")
+async def get_risk_table_status():
+    """
+    Size, hit rate and last refresh of the materialized risk table
+    """
+    return risk_scheduler.status()
+
 @api_router.get("/stations")
-async def get_stations():
+async def get_stations(request: Request):
     """
     Get all stations data with filter options
     """
-    if stations_df is None:
+    index = station_index
+    if index is None:
         raise HTTPException(status_code=500, detail="Stations data not loaded")
     
-    # Get unique values for dropdowns
-    states = sorted(stations_df['State name'].unique().tolist())
-    
-    # Get all stations as list, filtering out invalid coordinates
-    stations = []
-    for _, row in stations_df.iterrows():
-        # Skip stations with invalid coordinates
-        if pd.isna(row['Latitude']) or pd.isna(row['longitude']):
-            continue
-            
-        stations.append({
-            "station_name": row['Station Name'],
-            "state": row['State name'],
-            "district": row['District / Town'],
-            "basin": row['Basin Name'],
-            "river": row['River Name'],
-            "latitude": float(row['Latitude']),
-            "longitude": float(row['longitude']),
-            "type": row['Type Of Site']
-        })
-    
-    return {
-        "states": states,
-        "stations": stations,
-        "total": len(stations)
-    }
+    # Pre-serialized when the station index is built; supports ETag / If-None-Match
+    return index.stations_payload.to_response(request)
 
 @api_router.get("/stations/filters")
 async def get_filter_options(state: Optional[str] = None, 
@@ -133,24 +361,11 @@ async def get_filter_options(state: Optional[str] = None,
     """
     Get cascading filter options based on selections
     """
-    if stations_df is None:
+    index = station_index
+    if index is None:
         raise HTTPException(status_code=500, detail="Stations data not loaded")
     
-    filtered_df = stations_df.copy()
-    
-    if state:
-        filtered_df = filtered_df[filtered_df['State name'] == state]
-    if district:
-        filtered_df = filtered_df[filtered_df['District / Town'] == district]
-    if basin:
-        filtered_df = filtered_df[filtered_df['Basin Name'] == basin]
-    
-    return {
-        "districts": sorted(filtered_df['District / Town'].unique().tolist()) if state else [],
-        "basins": sorted(filtered_df['Basin Name'].unique().tolist()) if district else [],
-        "rivers": sorted(filtered_df['River Name'].unique().tolist()) if basin else [],
-        "stations": filtered_df['Station Name'].unique().tolist()
-    }
+    return index.get_filter_options(state, district, basin)
 
 @api_router.post("/scrape-water-level")
 async def scrape_water_level(request: PredictionRequest):
@@ -180,42 +395,53 @@ async def predict_flood(request: PredictionRequest):
     """
     try:
         # Get station info
-        if stations_df is None:
+        index = station_index
+        if index is None:
             raise HTTPException(status_code=500, detail="Stations data not loaded")
         
-        station_row = stations_df[
-            (stations_df['State name'] == request.state) &
-            (stations_df['River Name'] == request.river)
-        ]
+        station = index.find_station(request.state, request.river)
         
-        if station_row.empty:
+        if station is None:
             raise HTTPException(status_code=404, detail="Station not found")
         
-        station = station_row.iloc[0]
-        latitude = float(station['Latitude'])
-        longitude = float(station['longitude'])
+        # Serve from the materialized risk table when it is fresh enough
+        key = station_key(request.state, request.district, request.basin, request.river)
+        materialized = risk_scheduler.table.get(key, RISK_MAX_AGE)
+        if materialized is not None:
+            result, computed_at = materialized
+            return {
+                **result,
+                "served_from": "materialized",
+                "computed_at": datetime.fromtimestamp(computed_at).isoformat()
+            }
         
-        #logger.info(f"Predicting flood for {station['Station Name']}")
+        latitude = station['latitude']
+        longitude = station['longitude']
+        
+        #logger.info(f"Predicting flood for {station['station_name']}")
         logger.info(
-            f"Predicting flood for station: {station['Station Name']} | "
+            f"Predicting flood for station: {station['station_name']} | "
             f"Latitude: {latitude}, Longitude: {longitude}"
         )
-        # Fetch rainfall data (last 7 days)
-        logger.info("Fetching rainfall data...")
-        rainfall_data = await weather_api.get_rainfall_data(latitude, longitude, days=7)
-        logger.info(
-            f"Rainfall data (last 7 days) for "
-            f"{station['Station Name']} "
-            f"[{latitude}, {longitude}]: {rainfall_data}"
-        )
-        # Scrape water level data
-        logger.info("Scraping water level data...")
-        water_data = await scraper.scrape_water_level(
+        # Fetch rainfall data (last 7 days) and scrape water level data concurrently
+        logger.info("Fetching rainfall and water level data...")
+        inputs = await acquirer.acquire(
+            latitude,
+            longitude,
             request.state,
             request.district,
             request.basin,
-            request.river
+            request.river,
+            days=7
+        )
+        rainfall_data = inputs["rainfall_data"]
+        water_data = inputs["water_data"]
+        logger.info(
+            f"Rainfall data (last 7 days) for "
+            f"{station['station_name']} "
+            f"[{latitude}, {longitude}]: {rainfall_data}"
         )
+        logger.info(f"Data sources: {inputs['data_sources']} ({inputs['acquisition_ms']} ms)")
         
         # Log scraped data
         logger.info("===== SCRAPED WATER LEVEL DATA =====")
@@ -233,32 +459,23 @@ async def predict_flood(request: PredictionRequest):
         danger_level = water_data.get('danger_level', 52.0)
         
         # Make prediction
+        await require_model()
         logger.info("Making prediction...")
-        prediction_result = predictor.predict(
+        prediction_result = await batcher.predict(
             rainfall_data,
             water_levels,
             warning_level,
-            danger_level
+            danger_level,
+            feature_water_levels(water_data)
         )
         
         # Combine results
-        response = {
-            **prediction_result,
-            "rainfall_data": rainfall_data,
-            "water_levels": water_levels,
-            "station_info": {
-                "name": station['Station Name'],
-                "state": station['State name'],
-                "district": station['District / Town'],
-                "basin": station['Basin Name'],
-                "river": station['River Name'],
-                "latitude": latitude,
-                "longitude": longitude
-            },
-            "is_mock": water_data.get('is_mock', False)
-        }
+        response = prediction_response(station, prediction_result, inputs)
+        # Write through to the risk table when the request matches the station record
+        if key == station_key(station['state'], station['district'], station['basin'], station['river']):
+            risk_scheduler.store(response)
         
-        return response
+        return {**response, "served_from": "computed", "computed_at": datetime.now().isoformat()}
         
     except HTTPException:
         raise
@@ -266,6 +483,96 @@ async def predict_flood(request: PredictionRequest):
         logger.error(f"Prediction failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@api_router.post("/predict/batch")
+async def predict_flood_batch(request: BatchPredictionRequest):
+    """
+    Batch prediction for every station matching a state/district/basin filter and/or
+    a list of station names. Results are streamed back as NDJSON, one station per line.
+    """
+    index = station_index
+    if index is None:
+        raise HTTPException(status_code=500, detail="Stations data not loaded")
+    
+    if not (request.state or request.district or request.basin or request.station_names):
+        raise HTTPException(status_code=400, detail="Specify a state, district, basin or station_names")
+    
+    stations = index.select(request.state, request.district, request.basin, request.station_names)
+    if not stations:
+        raise HTTPException(status_code=404, detail="No stations match the filter")
+    
+    await require_model()
+    logger.info(f"Batch prediction for {len(stations)} stations")
+    
+    async def stream():
+        async for result in batch_runner.run(stations):
+            yield json.dumps(result, cls=CustomJSONEncoder) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@api_router.post("/ingest")
+async def ingest_readings(request: Request):
+    """
+    Push sensor readings. Accepts {"readings": [...]} as JSON, or a chunked NDJSON body
+    (Content-Type: application/x-ndjson, one reading per line) that is applied as it
+    streams in. Stations whose inputs changed are re-scored in the background.
+    """
+    accepted = queued = rejected = 0
+    
+    def apply(reading: SensorReading):
+        nonlocal accepted, queued, rejected
+        try:
+            changed = continuous_scorer.ingest(reading.model_dump())
+        except UnknownStation:
+            rejected += 1
+            return
+        accepted += 1
+        if changed:
+            queued += 1
+    
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            buffer = b""
+            async for chunk in request.stream():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        apply(SensorReading(**json.loads(line)))
+            if buffer.strip():
+                apply(SensorReading(**json.loads(buffer)))
+        else:
+            for reading in IngestRequest(**await request.json()).readings:
+                apply(reading)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid reading after {accepted} accepted: {str(e)}")
+    
+    return {"accepted": accepted, "queued_for_scoring": queued, "rejected_unknown_station": rejected}
+
+@api_router.get("/stream/status")
+async def stream_status(request: Request, state: Optional[str] = None):
+    """
+    Server-Sent Events stream of station status transitions (e.g. Safe -> Warning)
+    from the continuous scorer, optionally limited to one state
+    """
+    queue = continuous_scorer.broadcaster.subscribe()
+    
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if state is not None and event["station"]["state"] != state:
+                    continue
+                yield f"event: status\ndata: {json.dumps(event, cls=CustomJSONEncoder)}\n\n"
+        finally:
+            continuous_scorer.broadcaster.unsubscribe(queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Model load states reported by /api/ready
+STATE_PENDING = "pending"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class StartupTimings:
+    """
+    Records how long each startup step took (imports, scaler, model, stations)
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps = {}
+
+    @contextmanager
+    def measure(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = self.steps.get(name, 0.0) + time.perf_counter() - started
+
+    def snapshot(self):
+        """Return step durations in ms (JSON-serializable)"""
+        return {name: round(seconds * 1000, 1) for name, seconds in self.steps.items()}
+
+    def log_summary(self, title: str = "Startup timings"):
+        breakdown = ", ".join(f"{name}={ms:g}ms" for name, ms in self.snapshot().items())
+        logger.info(f"{title} ({(time.perf_counter() - self.started):.2f}s since import): {breakdown}")
+
+
+class ModelLoader:
+    """
+    Loads the scaler and model (or starts the inference worker pool) off the event loop,
+    so the server can bind its port and answer non-model endpoints while it warms up.
+    """
+    def __init__(self, predictor, pool=None, timings: StartupTimings = None):
+        self.predictor = predictor
+        # When a worker pool is used the workers load their own model copies and
+        # this process only needs the scaler for feature preparation
+        self.pool = pool
+        self.timings = timings or StartupTimings()
+        self.state = STATE_PENDING
+        self.error = None
+        self.ready_at = None
+        self._ready = None
+        self._task = None
+
+    def start(self):
+        """Start loading in the background (idempotent)"""
+        if self._task is not None:
+            return self._task
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self.load())
+        return self._task
+
+    async def load(self):
+        """Load everything and wait for it; the result is reflected in state"""
+        loop = asyncio.get_running_loop()
+        self.state = STATE_LOADING
+        try:
+            with self.timings.measure("scaler load"):
+                await loop.run_in_executor(None, self.predictor.load_scaler)
+            if self.pool is not None:
+                with self.timings.measure("model load"):
+                    await self.pool.start()
+            else:
+                with self.timings.measure("model load"):
+                    if not await loop.run_in_executor(None, self.predictor.load_model, False):
+                        raise RuntimeError("Model could not be loaded")
+                with self.timings.measure("model warm-up"):
+                    await loop.run_in_executor(None, self.predictor.warm_up)
+        except Exception as e:
+            logger.error(f"Model warm-up failed: {str(e)}")
+            self.state = STATE_FAILED
+            self.error = str(e)
+        else:
+            self.state = STATE_READY
+            self.ready_at = time.time()
+        finally:
+            if self._ready is not None:
+                self._ready.set()
+        self.timings.log_summary()
+        return self.state == STATE_READY
+
+    async def wait_ready(self, timeout: float = None) -> bool:
+        """Wait until loading finished (or timeout) and return whether the model is usable"""
+        if self.state == STATE_READY:
+            return True
+        if self._ready is None:
+            return False
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready.wait()), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.state == STATE_READY
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == STATE_READY
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "error": self.error,
+            "backend": self.predictor.backend,
+            "workers": self.pool.n_workers if self.pool is not None else 0,
+            "warmup_ms": self.predictor.warmup_ms,
+            "startup_ms": self.timings.snapshot()
+        }
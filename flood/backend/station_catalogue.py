@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_VERSION = 1
+
+# String columns whose NaN values are cleaned to '' (same as the Excel loader always did)
+FILL_EMPTY_COLS = ['Basin Name', 'River Name']
+
+
+def catalogue_dir(source_path) -> Path:
+    """Cache directory for a station file, e.g. stations.xlsx -> stations.cache/"""
+    source_path = Path(source_path)
+    return source_path.with_name(source_path.stem + ".cache")
+
+
+def _file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _source_key(path: Path, with_hash: bool = True) -> dict:
+    stat = path.stat()
+    key = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    if with_hash:
+        key["sha256"] = _file_sha256(path)
+    return key
+
+
+def read_stations_excel(path) -> pd.DataFrame:
+    """Read the stations Excel file and clean NaN values in string columns"""
+    stations_df = pd.read_excel(path)
+    for col in FILL_EMPTY_COLS:
+        stations_df[col] = stations_df[col].fillna('')
+    return stations_df
+
+
+def _write_json(path: Path, data: dict):
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False))
+    os.replace(tmp_path, path)
+
+
+def build_catalogue(source_path, stations_df: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Convert the station file into the columnar binary cache
+
+    String columns are interned into a per-column string table and stored as int32
+    codes; numeric columns are stored as-is. Rows live in one structured array
+    (table.npy), read back with a single np.load, and meta.json holds the column
+    layout, string tables and the source file's mtime/size/sha256.
+
+    Returns:
+        The stations DataFrame that was cached
+    """
+    source_path = Path(source_path)
+    if stations_df is None:
+        stations_df = read_stations_excel(source_path)
+
+    fields = []
+    columns = []
+    strings = {}
+    values = {}
+    for i, col in enumerate(stations_df.columns):
+        field = f"c{i}"
+        series = stations_df[col]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            dtype = series.to_numpy().dtype
+            fields.append((field, dtype))
+            values[field] = series.to_numpy()
+            columns.append({"name": col, "field": field, "kind": "numeric"})
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            fields.append((field, np.int32))
+            values[field] = codes.astype(np.int32)
+            strings[field] = [str(value) for value in uniques]
+            columns.append({"name": col, "field": field, "kind": "string"})
+
+    table = np.empty(len(stations_df), dtype=fields)
+    for field, column in values.items():
+        table[field] = column
+
+    cache_dir = catalogue_dir(source_path)
+    cache_dir.mkdir(exist_ok=True)
+    tmp_table = cache_dir / "table.npy.tmp"
+    with open(tmp_table, "wb") as f:
+        np.save(f, table)
+    os.replace(tmp_table, cache_dir / "table.npy")
+
+    # meta.json is written last, so a cache is only valid once both files are in place
+    _write_json(cache_dir / "meta.json", {
+        "version": CATALOGUE_VERSION,
+        "source": _source_key(source_path),
+        "rows": len(stations_df),
+        "columns": columns,
+        "strings": strings
+    })
+    logger.info(f"Built station catalogue for {len(stations_df)} stations in {cache_dir}")
+    return stations_df
+
+
+def load_catalogue(source_path):
+    """
+    Load the cached station catalogue if it is still valid for the source file
+
+    Returns:
+        stations DataFrame, or None if the cache is missing or stale
+    """
+    source_path = Path(source_path)
+    cache_dir = catalogue_dir(source_path)
+    meta_path = cache_dir / "meta.json"
+    if not meta_path.exists():
+        return None
+
+    meta = json.loads(meta_path.read_text())
+    if meta.get("version") != CATALOGUE_VERSION:
+        return None
+
+    # Cheap check first; if mtime/size moved (e.g. the file was copied or touched),
+    # fall back to comparing content hashes and refresh the recorded key
+    cached_key = meta["source"]
+    current_key = _source_key(source_path, with_hash=False)
+    if (cached_key["mtime_ns"], cached_key["size"]) != (current_key["mtime_ns"], current_key["size"]):
+        if _file_sha256(source_path) != cached_key["sha256"]:
+            return None
+        meta["source"] = _source_key(source_path)
+        try:
+            _write_json(meta_path, meta)
+        except OSError:
+            pass
+
+    # The DataFrame decodes every column anyway, so the (small) table is read in one
+    # go rather than memory-mapped
+    table = np.load(cache_dir / "table.npy")
+    if len(table) != meta["rows"]:
+        return None
+
+    data = {}
+    for column in meta["columns"]:
+        codes = table[column["field"]]
+        if column["kind"] == "numeric":
+            data[column["name"]] = codes
+        else:
+            lookup = np.array(meta["strings"].get(column["field"], []) + [np.nan], dtype=object)
+            # NA sentinel -1 indexes the trailing NaN
+            data[column["name"]] = lookup[codes]
+
+    stations_df = pd.DataFrame(data)
+    for col in FILL_EMPTY_COLS:
+        if col in stations_df:
+            stations_df[col] = stations_df[col].fillna('')
+    return stations_df
+
+
+def load_stations(source_path) -> pd.DataFrame:
+    """
+    Load the stations table from the binary catalogue, rebuilding it from the
+    Excel file when it is missing or stale
+    """
+    try:
+        stations_df = load_catalogue(source_path)
+        if stations_df is not None:
+            logger.info(f"Loaded {len(stations_df)} stations from catalogue cache")
+            return stations_df
+    except Exception as e:
+        logger.warning(f"Station catalogue unreadable, rebuilding: {e}")
+
+    stations_df = read_stations_excel(source_path)
+    try:
+        build_catalogue(source_path, stations_df)
+    except Exception as e:
+        # Read-only deployments still work, just without the cache
+        logger.warning(f"Failed to write station catalogue: {e}")
+    return stations_df
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / "stations.xlsx"
+    build_catalogue(source)
@@ -0,0 +1,138 @@
+import logging
+import math
+from itertools import product
+from pathlib import Path
+
+import pandas as pd
+
+from serialized_payload import SerializedPayload
+from station_catalogue import load_stations
+
+logger = logging.getLogger(__name__)
+
+# Filter fields in cascade order: (query parameter, station record key)
+FILTER_FIELDS = (("state", "state"), ("district", "district"), ("basin", "basin"))
+
+
+class StationIndex:
+    """
+    Lookup tables over the station list, built once per station file version.
+
+    Every endpoint query (predict station lookup, cascading filters, station list)
+    becomes a dictionary lookup instead of a DataFrame scan. The index is never
+    mutated after construction; reloads build a new index and swap the reference.
+    """
+    def __init__(self, stations_df: pd.DataFrame, source_mtime: float = None):
+        self.stations_df = stations_df
+        self.source_mtime = source_mtime
+
+        # One record per row, in file order
+        self.records = [
+            {
+                "station_name": row['Station Name'],
+                "state": row['State name'],
+                "district": row['District / Town'],
+                "basin": row['Basin Name'],
+                "river": row['River Name'],
+                "latitude": float(row['Latitude']),
+                "longitude": float(row['longitude']),
+                "type": row['Type Of Site']
+            }
+            for row in stations_df.to_dict('records')
+        ]
+
+        # (state, river) -> first matching station, as used by /api/predict
+        self.by_state_river = {}
+        for record in self.records:
+            self.by_state_river.setdefault((record["state"], record["river"]), record)
+
+        # (state, district, basin, river) of every station, the key pushed readings use
+        self.station_keys = {
+            (record["state"], record["district"], record["basin"], record["river"]) for record in self.records
+        }
+
+        # state -> district -> basin -> river -> station records
+        self.hierarchy = {}
+        for record in self.records:
+            rivers = (self.hierarchy.setdefault(record["state"], {})
+                      .setdefault(record["district"], {})
+                      .setdefault(record["basin"], {}))
+            rivers.setdefault(record["river"], []).append(record)
+
+        # Stations with usable coordinates for the map
+        self.stations = [
+            record for record in self.records
+            if not (math.isnan(record["latitude"]) or math.isnan(record["longitude"]))
+        ]
+        self.states = sorted({record["state"] for record in self.records})
+
+        # /api/stations body, serialized and compressed once per station file version
+        self.stations_payload = SerializedPayload({
+            "states": self.states,
+            "stations": self.stations,
+            "total": len(self.stations)
+        })
+
+        self.filter_groups = self._build_filter_groups()
+        self.filter_options = self._build_filter_options()
+        logger.info(f"Built station index for {len(self.records)} stations")
+
+    def __len__(self):
+        return len(self.records)
+
+    def _build_filter_groups(self):
+        """
+        Group station records by every combination of state/district/basin
+        that occurs in the data (None = not filtered)
+        """
+        groups = {}
+        for record in self.records:
+            values = [record[field] for _, field in FILTER_FIELDS]
+            for mask in product((False, True), repeat=len(FILTER_FIELDS)):
+                key = tuple(value if used else None for value, used in zip(values, mask))
+                groups.setdefault(key, []).append(record)
+        return groups
+
+    def _build_filter_options(self):
+        """Pre-compute the cascading filter response for every filter group"""
+        options = {}
+        for (state, district, basin), records in self.filter_groups.items():
+            options[(state, district, basin)] = {
+                "districts": sorted({r["district"] for r in records}) if state else [],
+                "basins": sorted({r["basin"] for r in records}) if district else [],
+                "rivers": sorted({r["river"] for r in records}) if basin else [],
+                "stations": list(dict.fromkeys(r["station_name"] for r in records))
+            }
+        return options
+
+    def find_station(self, state: str, river: str):
+        """Return the first station on the given state and river, or None"""
+        return self.by_state_river.get((state, river))
+
+    def has_station(self, state: str, district: str, basin: str, river: str) -> bool:
+        """Whether a station with these fields is in the station list"""
+        return (state, district, basin, river) in self.station_keys
+
+    def get_filter_options(self, state: str = None, district: str = None, basin: str = None):
+        """Cascading filter options for the given selections"""
+        key = (state or None, district or None, basin or None)
+        options = self.filter_options.get(key)
+        if options is None:
+            return {"districts": [], "basins": [], "rivers": [], "stations": []}
+        return options
+
+    def select(self, state: str = None, district: str = None, basin: str = None,
+               station_names: list = None):
+        """Station records matching the given filters, in file order"""
+        records = self.filter_groups.get((state or None, district or None, basin or None), [])
+        if station_names:
+            wanted = set(station_names)
+            records = [record for record in records if record["station_name"] in wanted]
+        return records
+
+    @classmethod
+    def from_file(cls, path):
+        """Load the stations file (via the binary catalogue cache) and build its index"""
+        path = Path(path)
+        mtime = path.stat().st_mtime
+        return cls(load_stations(path), source_mtime=mtime)
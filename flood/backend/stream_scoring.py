@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+
+from feature_state import StationFeatureState
+from risk_scheduler import station_key
+
+logger = logging.getLogger(__name__)
+
+# Thresholds assumed for a station until a reading provides them (same defaults as /api/predict)
+DEFAULT_WARNING_LEVEL = 50.0
+DEFAULT_DANGER_LEVEL = 52.0
+
+
+class UnknownStation(ValueError):
+    """A reading was pushed for a station that is not in the station list"""
+
+
+class StatusBroadcaster:
+    """
+    Fan-out of status events to subscribers, one bounded queue each. A subscriber
+    that falls behind loses its oldest events instead of blocking the publisher.
+    """
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        self.published += 1
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(event)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+class ContinuousScorer:
+    """
+    Keeps a StationFeatureState per station, updated from pushed sensor readings, and
+    re-scores changed stations in batches in the background. Status transitions
+    (e.g. Safe -> Warning) are published through a StatusBroadcaster.
+
+    Readings for stations that known_station rejects are refused, and at most
+    max_stations states are kept (the least recently updated one is evicted), so
+    memory stays bounded whatever keys clients push.
+    """
+    def __init__(self, predictor, infer=None, max_batch_size: int = 256, window_ms: float = 50.0,
+                 broadcaster: StatusBroadcaster = None, known_station=None, max_stations: int = 10000):
+        self.predictor = predictor
+        # Async callable evaluating a (B, 7, 6) batch; defaults to the predictor in a worker thread
+        self.infer = infer or self._infer_in_thread
+        self.max_batch_size = max(1, max_batch_size)
+        # Readings arriving within this window are scored together
+        self.window = max(0.0, window_ms) / 1000
+        self.broadcaster = broadcaster or StatusBroadcaster()
+        # Callable (station key) -> bool; None accepts every station
+        self.known_station = known_station
+        self.max_stations = max(1, max_stations)
+        # Least recently updated first
+        self.states = OrderedDict()
+        self.stations = {}
+        self.last_results = {}
+        # Stations waiting to be scored (dict as an insertion-ordered set)
+        self._dirty = {}
+        self._wake = None
+        self._task = None
+        self.stats = {"readings": 0, "rejected": 0, "evicted": 0, "scored": 0, "batches": 0, "transitions": 0,
+                      "failed_batches": 0}
+
+    async def _infer_in_thread(self, features):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.predictor.predict_proba_batch, features
+        )
+
+    async def start(self):
+        """Start the background scoring loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        if self._dirty:
+            self._wake.set()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Continuous scorer started (max_batch_size={self.max_batch_size})")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Continuous scorer stopped")
+
+    def ingest(self, reading: dict) -> bool:
+        """
+        Apply one sensor reading (state, district, basin, river and any of water_level,
+        rainfall, warning_level, danger_level, new_day) to the station's state
+
+        Returns:
+            True if the station's inputs changed and it was queued for re-scoring
+
+        Raises:
+            UnknownStation: The station is not in the station list
+        """
+        key = station_key(reading["state"], reading["district"], reading["basin"], reading["river"])
+        state = self.states.get(key)
+        if state is None:
+            if self.known_station is not None and not self.known_station(key):
+                self.stats["rejected"] += 1
+                raise UnknownStation(f"Unknown station {'/'.join(key)}")
+            if len(self.states) >= self.max_stations:
+                self._evict()
+            warning_level = reading.get("warning_level")
+            danger_level = reading.get("danger_level")
+            state = StationFeatureState(
+                warning_level if warning_level is not None else DEFAULT_WARNING_LEVEL,
+                danger_level if danger_level is not None else DEFAULT_DANGER_LEVEL
+            )
+            self.states[key] = state
+            self.stations[key] = {
+                "state": reading["state"],
+                "district": reading["district"],
+                "basin": reading["basin"],
+                "river": reading["river"]
+            }
+        else:
+            self.states.move_to_end(key)
+        if reading.get("warning_level") is not None or reading.get("danger_level") is not None:
+            state.set_thresholds(
+                reading.get("warning_level") if reading.get("warning_level") is not None else state.warning_level,
+                reading.get("danger_level") if reading.get("danger_level") is not None else state.danger_level
+            )
+
+        version = state.version
+        new_day = reading.get("new_day", True)
+        if reading.get("rainfall") is not None:
+            state.add_rainfall(reading["rainfall"], new_day=new_day)
+        if reading.get("water_level") is not None:
+            state.add_water_level(reading["water_level"], new_day=new_day)
+
+        self.stats["readings"] += 1
+        if state.version == version or not state.ready:
+            return False
+        self._dirty[key] = None
+        if self._wake is not None:
+            self._wake.set()
+        return True
+
+    def _evict(self):
+        """Drop the least recently updated station's state"""
+        key, _ = self.states.popitem(last=False)
+        del self.stations[key]
+        self.last_results.pop(key, None)
+        self._dirty.pop(key, None)
+        self.stats["evicted"] += 1
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if self.window:
+                await asyncio.sleep(self.window)
+            while self._dirty:
+                keys = []
+                for key in self._dirty:
+                    keys.append(key)
+                    if len(keys) >= self.max_batch_size:
+                        break
+                for key in keys:
+                    del self._dirty[key]
+                try:
+                    await self._score(keys)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats["failed_batches"] += 1
+                    logger.error(f"Continuous scoring failed for {len(keys)} stations: {str(e)}")
+
+    async def _score(self, keys: list):
+        # Stations evicted while waiting are skipped
+        keys = [key for key in keys if key in self.states]
+        if not keys:
+            return
+        states = [self.states[key] for key in keys]
+        features = self.predictor.prepare_features_from_states(states)
+        probabilities = await self.infer(features)
+        self.stats["batches"] += 1
+
+        scored_at = datetime.now().isoformat()
+        for key, state, probability in zip(keys, states, probabilities):
+            result = self.predictor.build_prediction(
+                float(probability), state.rainfall_data, state.water_levels,
+                state.warning_level, state.danger_level
+            )
+            previous = self.last_results.get(key)
+            self.last_results[key] = (result, scored_at)
+            self.stats["scored"] += 1
+
+            previous_status = previous[0]["status"] if previous is not None else None
+            if previous_status != result["status"]:
+                self.stats["transitions"] += 1
+                self.broadcaster.publish({
+                    "station": self.stations[key],
+                    "previous_status": previous_status,
+                    "status": result["status"],
+                    "prediction": result["prediction"],
+                    "probability": result["probability"],
+                    "current_water_level": result["current_water_level"],
+                    "scored_at": scored_at
+                })
+
+    def status(self):
+        return {
+            **self.stats,
+            "stations": len(self.states),
+            "pending": len(self._dirty),
+            "subscribers": len(self.broadcaster),
+            "events_published": self.broadcaster.published,
+            "events_dropped": self.broadcaster.dropped
+        }
@@ -0,0 +1,179 @@
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS water_level_readings (
+    station TEXT NOT NULL,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    level REAL NOT NULL,
+    PRIMARY KEY (station, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS water_level_station_day ON water_level_readings (station, day);
+CREATE TABLE IF NOT EXISTS rainfall_daily (
+    location TEXT NOT NULL,
+    day TEXT NOT NULL,
+    rainfall REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (location, day)
+) WITHOUT ROWID;
+"""
+
+# SQLite limits the number of bound parameters per statement
+QUERY_CHUNK_SIZE = 500
+
+# Readings are bucketed into Indian days, the same days the weather API reports rainfall
+# for (timezone=Asia/Kolkata); IST has no DST, so a fixed offset is exact
+STATION_TZ = timezone(timedelta(hours=5, minutes=30), "Asia/Kolkata")
+
+
+def station_history_key(state: str, district: str, basin: str, river: str) -> str:
+    return "|".join(value.lower() for value in (state, district, basin, river))
+
+
+def location_history_key(latitude: float, longitude: float, precision: int = 2) -> str:
+    return f"{round(latitude, precision)},{round(longitude, precision)}"
+
+
+def _date(ts: float) -> date:
+    return datetime.fromtimestamp(ts, STATION_TZ).date()
+
+
+def _day(ts: float) -> str:
+    return _date(ts).isoformat()
+
+
+class TimeSeriesStore:
+    """
+    Embedded SQLite (WAL) store of water level readings and daily rainfall.
+
+    Water level readings are append-only, keyed by station and timestamp, and read
+    back as one value (the latest reading) per day. Daily rainfall is keyed by rounded
+    location; a day's value is replaced until the day is over, after which it is final.
+    Methods are blocking and thread-safe; call them from a worker thread in async code.
+    """
+    def __init__(self, path, retention_days: float = 90.0):
+        self.path = str(path)
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if retention_days > 0:
+            self.prune(retention_days)
+        logger.info(f"Opened time-series store {self.path}")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def record_water_level(self, station: str, level: float, timestamp: float = None) -> bool:
+        """
+        Record one water level reading at the time it was taken (default: now). Only
+        real readings are stored; no past days are filled in.
+
+        Returns:
+            True if the reading was stored (False for a duplicate timestamp)
+        """
+        timestamp = timestamp or time.time()
+        with self._lock:
+            return self.conn.execute(
+                "INSERT OR IGNORE INTO water_level_readings VALUES (?, ?, ?, ?)",
+                (station, timestamp, _day(timestamp), float(level))
+            ).rowcount > 0
+
+    def water_level_window(self, station: str, days: int, now: float = None) -> list:
+        """Latest reading of each of the last `days` days that have one, oldest first"""
+        since = _day((now or time.time()) - (days - 1) * 86400)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT day, level, MAX(ts) FROM water_level_readings "
+                "WHERE station = ? AND day >= ? GROUP BY day ORDER BY day",
+                (station, since)
+            ).fetchall()
+        return [level for _, level, _ in rows]
+
+    def record_rainfall(self, location: str, values: list, now: float = None):
+        """Record daily rainfall values for the days ending today (last value = today)"""
+        now = now or time.time()
+        today = _date(now)
+        rows = [
+            (location, (today - timedelta(days=offset)).isoformat(), float(value), now)
+            for offset, value in enumerate(reversed(values)) if value is not None
+        ]
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO rainfall_daily VALUES (?, ?, ?, ?)", rows)
+
+    def rainfall_windows(self, locations: list, days: int, max_age: float, now: float = None) -> dict:
+        """
+        Complete rainfall windows (last `days` days ending today) from history
+
+        A window is complete when every day is stored, each past day was recorded
+        after it ended, and today's value is younger than max_age seconds.
+
+        Returns:
+            dict mapping location to its rainfall list (incomplete locations are omitted)
+        """
+        now = now or time.time()
+        today = _date(now)
+        day_list = [(today - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+        # A past day is final once it was updated after its end (midnight of the next day)
+        final_after = {
+            day: datetime.combine(date.fromisoformat(day) + timedelta(days=1), datetime.min.time(),
+                                  STATION_TZ).timestamp()
+            for day in day_list[:-1]
+        }
+        final_after[day_list[-1]] = now - max_age
+
+        rows_by_location = {}
+        locations = list(dict.fromkeys(locations))
+        with self._lock:
+            for i in range(0, len(locations), QUERY_CHUNK_SIZE):
+                chunk = locations[i:i + QUERY_CHUNK_SIZE]
+                rows = self.conn.execute(
+                    f"SELECT location, day, rainfall, updated_at FROM rainfall_daily "
+                    f"WHERE location IN ({','.join('?' * len(chunk))}) AND day >= ?",
+                    chunk + [day_list[0]]
+                ).fetchall()
+                for location, day, rainfall, updated_at in rows:
+                    if updated_at >= final_after.get(day, float("inf")):
+                        rows_by_location.setdefault(location, {})[day] = rainfall
+
+        return {
+            location: [values[day] for day in day_list]
+            for location, values in rows_by_location.items()
+            if len(values) == days
+        }
+
+    def rainfall_window(self, location: str, days: int, max_age: float, now: float = None):
+        """Rainfall window for one location, or None when history is incomplete"""
+        return self.rainfall_windows([location], days, max_age, now).get(location)
+
+    def prune(self, retention_days: float):
+        """Delete readings older than retention_days"""
+        cutoff = time.time() - retention_days * 86400
+        with self._lock:
+            self.conn.execute("DELETE FROM water_level_readings WHERE ts < ?", (cutoff,))
+            self.conn.execute("DELETE FROM rainfall_daily WHERE day < ?", (_day(cutoff),))
+
+    def status(self):
+        with self._lock:
+            readings, stations = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT station) FROM water_level_readings"
+            ).fetchone()
+            rainfall_days, locations = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT location) FROM rainfall_daily"
+            ).fetchone()
+        return {
+            "path": self.path,
+            "water_level_readings": readings,
+            "water_level_stations": stations,
+            "rainfall_days": rainfall_days,
+            "rainfall_locations": locations
+        }
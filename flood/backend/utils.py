@@ -1,81 +1,294 @@
 import httpx
 import asyncio
+import time
+import numpy as np
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rainfall returned when the upstream API is unavailable
+FALLBACK_RAINFALL = [2.5, 5.0, 8.3, 12.1, 6.7, 3.2, 1.8]
+
+# Where a piece of input data came from
+SOURCE_FRESH = "fresh"
+SOURCE_CACHED = "cached"
+SOURCE_FALLBACK = "fallback"
+SOURCE_HISTORY = "history"
+
+class TTLCache:
+    """
+    Small LRU cache whose entries expire after a fixed time-to-live
+    """
+    def __init__(self, maxsize: int = 4096, ttl: float = 900.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
 class WeatherAPI:
     """
     Fetch rainfall data from Open-Meteo API
+
+    Requests share one pooled httpx.AsyncClient (opened with start(), closed with close()),
+    responses are cached per rounded location and date range, and concurrent lookups for
+    the same key are coalesced into a single upstream request.
     """
-    def __init__(self):
-        self.base_url = "https://api.open-meteo.com/v1/forecast"
-    
+    def __init__(self, base_url: str = "https://api.open-meteo.com/v1/forecast",
+                 cache_ttl: float = 900.0, cache_size: int = 4096,
+                 coord_precision: int = 2, max_connections: int = 20,
+                 batch_chunk_size: int = 100, batch_concurrency: int = 4):
+        self.base_url = base_url
+        self.coord_precision = coord_precision
+        # Locations per multi-location request and concurrent requests for get_rainfall_batch
+        self.batch_chunk_size = batch_chunk_size
+        self.batch_concurrency = batch_concurrency
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_connections)
+        self.client = None
+        self.rainfall_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.weather_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._inflight = {}
+        self.stats = {"cache_hits": 0, "coalesced": 0, "upstream_requests": 0}
+
+    async def start(self):
+        """Open the shared connection pool"""
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=10.0, limits=self.limits)
+
+    async def close(self):
+        """Close the shared connection pool"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _get_json(self, params: dict):
+        if self.client is None:
+            await self.start()
+        self.stats["upstream_requests"] += 1
+        response = await self.client.get(self.base_url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def _single_flight(self, key, fetch):
+        """Run fetch() once per key, sharing the result with concurrent callers"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._inflight.pop(key, None)
+                               if self._inflight.get(key) is done else None)
+        return await asyncio.shield(task)
+
+    def _round_coords(self, latitude: float, longitude: float):
+        return round(latitude, self.coord_precision), round(longitude, self.coord_precision)
+
+    def _date_range(self, days: int):
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+
+    def _rainfall_params(self, latitude, longitude, start_date: str, end_date: str):
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "start_date": start_date,
+            "end_date": end_date,
+            "daily": "precipitation_sum",
+            "timezone": "Asia/Kolkata"
+        }
+
     async def get_rainfall_data(self, latitude: float, longitude: float, days: int = 7):
         """
         Get last N days rainfall data for a location
-        
+
         Args:
             latitude: Latitude of location
             longitude: Longitude of location
             days: Number of past days to fetch (default 7)
-        
+
         Returns:
             List of daily rainfall amounts in mm
         """
+        rainfall, _ = await self.get_rainfall_data_with_source(latitude, longitude, days)
+        return rainfall
+
+    async def get_rainfall_data_with_source(self, latitude: float, longitude: float, days: int = 7):
+        """
+        Same as get_rainfall_data, also reporting where the data came from
+
+        Returns:
+            Tuple of (rainfall list, source) with source one of "fresh", "cached", "fallback"
+        """
         try:
             # Calculate date range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            params = {
-                "latitude": latitude,
-                "longitude": longitude,
-                "start_date": start_date.strftime("%Y-%m-%d"),
-                "end_date": end_date.strftime("%Y-%m-%d"),
-                "daily": "precipitation_sum",
-                "timezone": "Asia/Kolkata"
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.base_url, params=params, timeout=10.0)
-                response.raise_for_status()
-                
-                data = response.json()
-                
+            start_date, end_date = self._date_range(days)
+            latitude, longitude = self._round_coords(latitude, longitude)
+
+            params = self._rainfall_params(latitude, longitude, start_date, end_date)
+            key = (latitude, longitude, start_date, end_date, days)
+
+            cached = self.rainfall_cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return list(cached), SOURCE_CACHED
+
+            async def fetch():
+                data = await self._get_json(params)
+
                 if "daily" in data and "precipitation_sum" in data["daily"]:
                     rainfall = data["daily"]["precipitation_sum"]
                     # Return last 'days' values
-                    return rainfall[-days:] if len(rainfall) >= days else rainfall
+                    rainfall = rainfall[-days:] if len(rainfall) >= days else rainfall
                 else:
-                    logger.warning("No rainfall data in API response")
-                    return [0.0] * days
-                    
+                    # Not cached, so the next lookup asks the API again
+                    logger.warning("No rainfall data in API response, using fallback data")
+                    return FALLBACK_RAINFALL[-days:], SOURCE_FALLBACK
+
+                self.rainfall_cache.set(key, rainfall)
+                return rainfall, SOURCE_FRESH
+
+            rainfall, source = await self._single_flight(("rainfall",) + key, fetch)
+            return list(rainfall), source
+
         except Exception as e:
             logger.error(f"Failed to fetch rainfall data: {str(e)}")
             # Return mock data as fallback
-            return [2.5, 5.0, 8.3, 12.1, 6.7, 3.2, 1.8][-days:]
-    
+            return FALLBACK_RAINFALL[-days:], SOURCE_FALLBACK
+
+    async def get_rainfall_batch(self, coords, days: int = 7, with_sources: bool = False):
+        """
+        Get last N days rainfall data for many locations using multi-location requests
+
+        Locations are rounded and de-duplicated, served from the cache where possible,
+        and the rest are fetched in chunks of batch_chunk_size with at most
+        batch_concurrency requests in flight.
+
+        Args:
+            coords: Sequence of (latitude, longitude) pairs
+            days: Number of past days to fetch (default 7)
+
+        Returns:
+            Array of shape (len(coords), days) in mm; rows that could not be fetched
+            (and missing days) are NaN. With with_sources=True, a tuple of the array
+            and a per-row list of "fresh"/"cached"/"fallback"
+        """
+        coords = list(coords)
+        rainfall = np.full((len(coords), days), np.nan)
+        sources = [SOURCE_FALLBACK] * len(coords)
+        start_date, end_date = self._date_range(days)
+
+        rows_by_location = {}
+        for row, (latitude, longitude) in enumerate(coords):
+            rows_by_location.setdefault(self._round_coords(latitude, longitude), []).append(row)
+
+        def fill(location, values, source):
+            values = np.array(values[-days:], dtype=float)
+            if len(values):
+                rainfall[rows_by_location[location], days - len(values):] = values
+            for row in rows_by_location[location]:
+                sources[row] = source
+
+        missing = []
+        for location in rows_by_location:
+            cached = self.rainfall_cache.get(location + (start_date, end_date, days))
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                fill(location, cached, SOURCE_CACHED)
+            else:
+                missing.append(location)
+
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def fetch_chunk(chunk):
+            params = self._rainfall_params(
+                ",".join(str(latitude) for latitude, _ in chunk),
+                ",".join(str(longitude) for _, longitude in chunk),
+                start_date, end_date
+            )
+            try:
+                async with semaphore:
+                    data = await self._get_json(params)
+            except Exception as e:
+                logger.error(f"Failed to fetch rainfall for {len(chunk)} locations: {str(e)}")
+                return
+
+            # A single location comes back as an object, several as an array of objects
+            results = data if isinstance(data, list) else [data]
+            for location, result in zip(chunk, results):
+                values = result.get("daily", {}).get("precipitation_sum")
+                if values is None:
+                    logger.warning(f"No rainfall data in API response for {location}")
+                    continue
+                values = values[-days:]
+                self.rainfall_cache.set(location + (start_date, end_date, days), values)
+                fill(location, values, SOURCE_FRESH)
+
+        chunk_size = max(1, self.batch_chunk_size)
+        await asyncio.gather(*[
+            fetch_chunk(missing[i:i + chunk_size]) for i in range(0, len(missing), chunk_size)
+        ])
+
+        logger.info(
+            f"Fetched rainfall for {len(coords)} locations "
+            f"({len(rows_by_location) - len(missing)} cached, {len(missing)} requested)"
+        )
+        return (rainfall, sources) if with_sources else rainfall
+
     async def get_current_weather(self, latitude: float, longitude: float):
         """
         Get current weather conditions
         """
         try:
+            latitude, longitude = self._round_coords(latitude, longitude)
             params = {
                 "latitude": latitude,
                 "longitude": longitude,
                 "current": "temperature_2m,precipitation,weathercode",
                 "timezone": "Asia/Kolkata"
             }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.base_url, params=params, timeout=10.0)
-                response.raise_for_status()
-                
-                data = response.json()
-                return data.get("current", {})
-                
+            key = (latitude, longitude)
+
+            cached = self.weather_cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return dict(cached)
+
+            async def fetch():
+                data = await self._get_json(params)
+                current = data.get("current", {})
+                self.weather_cache.set(key, current)
+                return current
+
+            return dict(await self._single_flight(("current",) + key, fetch))
+
         except Exception as e:
             logger.error(f"Failed to fetch current weather: {str(e)}")
             return {}
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import random
+
+from fastapi import FastAPI, HTTPException
+from starlette.responses import JSONResponse
+
+from scraper import MockDataProvider
+
+
+def create_app(csv_path: str = None, latency_ms: float = 0.0, error_rate: float = 0.0,
+               throttle_rate: float = 0.0):
+    """
+    Local HTTP fixture serving MockDataProvider data in the format HTTPWaterLevelSource
+    expects, with optional latency and error/429 rates, so the scraper's limits and
+    caching can be exercised without hitting a real site. /stats reports how many
+    requests it received.
+
+    Run with `python water_level_fixture_server.py --port 8002 --latency-ms 200` and start
+    the backend with WATER_LEVEL_SOURCE=http WATER_LEVEL_SOURCE_URL=http://localhost:8002/water-level
+    """
+    app = FastAPI()
+    provider = MockDataProvider(csv_path)
+    stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0}
+
+    @app.get("/water-level")
+    async def water_level(state: str, district: str, basin: str, river: str):
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            if latency_ms:
+                await asyncio.sleep(latency_ms / 1000)
+            if random.random() < throttle_rate:
+                return JSONResponse(status_code=429, content={"detail": "Too many requests"},
+                                    headers={"Retry-After": "1"})
+            if random.random() < error_rate:
+                raise HTTPException(status_code=503, detail="Fixture error")
+            data = await provider.get_water_level_data(state, district, basin, river)
+            return {**data, "is_mock": False}
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Water level fixture server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--csv", default=None, help="Station CSV (default: mock_water_levels.csv)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_app(args.csv, args.latency_ms, args.error_rate, args.throttle_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
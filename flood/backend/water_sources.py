@@ -0,0 +1,222 @@
+import abc
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Pause applied to a host that answers 429 without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 30.0
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` requests per second with bursts of up to `burst`.
+    Waiters are served in arrival order.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for the given time (e.g. after a 429)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        """Wait for a token; returns the time spent waiting in seconds"""
+        started = time.monotonic()
+        async with self._lock:
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            if self.rate > 0:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    self.tokens = 1.0
+                    self.updated = time.monotonic()
+                self.tokens -= 1
+        return time.monotonic() - started
+
+
+class HTTPClientPool:
+    """
+    Shared httpx.AsyncClient for water level sources, with a concurrency limit and a
+    rate limit per upstream host so no single site gets hammered.
+    """
+    def __init__(self, max_connections: int = 20, host_concurrency: int = 4,
+                 rate_limit: float = 5.0, timeout: float = 10.0):
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_connections)
+        self.host_concurrency = max(1, host_concurrency)
+        # Requests per second per host (0 disables rate limiting)
+        self.rate_limit = rate_limit
+        self.timeout = timeout
+        self.client = None
+        self._semaphores = {}
+        self._limiters = {}
+        self._in_flight = {}
+        self.stats = {"requests": 0, "throttled": 0, "throttle_wait_seconds": 0.0, "rate_limited": 0}
+
+    async def start(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _host_limits(self, host: str):
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.host_concurrency)
+            self._limiters[host] = RateLimiter(self.rate_limit, burst=self.host_concurrency)
+            self._in_flight[host] = 0
+        return self._semaphores[host], self._limiters[host]
+
+    async def get_json(self, url: str, params: dict = None):
+        """GET url within the host's concurrency and rate limits and return the JSON body"""
+        if self.client is None:
+            await self.start()
+        host = httpx.URL(url).host
+        semaphore, limiter = self._host_limits(host)
+
+        async with semaphore:
+            waited = await limiter.acquire()
+            if waited > 0.001:
+                self.stats["throttled"] += 1
+                self.stats["throttle_wait_seconds"] += waited
+            self.stats["requests"] += 1
+            self._in_flight[host] += 1
+            try:
+                response = await self.client.get(url, params=params)
+            finally:
+                self._in_flight[host] -= 1
+
+        if response.status_code == 429:
+            self.stats["rate_limited"] += 1
+            try:
+                retry_after = float(response.headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+            except ValueError:
+                retry_after = DEFAULT_RETRY_AFTER
+            limiter.pause(retry_after)
+            logger.warning(f"{host} answered 429, pausing requests for {retry_after:g}s")
+        response.raise_for_status()
+        return response.json()
+
+    def status(self):
+        return {
+            **self.stats,
+            "throttle_wait_seconds": round(self.stats["throttle_wait_seconds"], 3),
+            "hosts": {
+                host: {
+                    "in_flight": in_flight,
+                    "paused": self._limiters[host].paused_until > time.monotonic()
+                }
+                for host, in_flight in self._in_flight.items()
+            }
+        }
+
+
+class WaterLevelSource(abc.ABC):
+    """
+    Base class for water level sources used by RiverDataScraper.
+
+    fetch() returns a dict with station_name, water_levels, warning_level,
+    danger_level, hfl, latitude, longitude and timestamp, or raises on failure.
+    Sources whose responses should not be reused (cacheable = False) bypass the
+    scraper's WaterLevelCache.
+    """
+    name = "base"
+    cacheable = True
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abc.abstractmethod
+    async def fetch(self, state: str, district: str, basin: str, river: str):
+        """Fetch the latest water level data of a station"""
+
+
+class HTTPWaterLevelSource(WaterLevelSource):
+    """
+    Water level source backed by an HTTP endpoint that takes state, district, basin
+    and river as query parameters and answers with the fetch() dict as JSON
+    (e.g. water_level_fixture_server.py). Scrapers for other sites override
+    request_params() and parse().
+    """
+    name = "http"
+
+    def __init__(self, url: str, http: HTTPClientPool = None):
+        self.url = url
+        self.http = http or HTTPClientPool()
+
+    async def start(self):
+        await self.http.start()
+
+    async def close(self):
+        await self.http.close()
+
+    def request_params(self, state: str, district: str, basin: str, river: str):
+        return {"state": state, "district": district, "basin": basin, "river": river}
+
+    def parse(self, payload: dict):
+        if not payload.get("water_levels"):
+            raise ValueError("Response has no water levels")
+        return payload
+
+    async def fetch(self, state: str, district: str, basin: str, river: str):
+        payload = await self.http.get_json(self.url, self.request_params(state, district, basin, river))
+        return self.parse(payload)
+
+    def status(self):
+        return {"url": self.url, **self.http.status()}
+
+
+class WaterLevelCache:
+    """
+    LRU of the latest water level response per station. Entries are fresh for ttl
+    seconds and may be served stale (while being revalidated) for stale_ttl more.
+    """
+    def __init__(self, ttl: float = 300.0, stale_ttl: float = 900.0, maxsize: int = 4096):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        """Return (value, age in seconds), or None if missing or past the stale window"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        fetched_at, value = entry
+        age = time.monotonic() - fetched_at
+        if age > self.ttl + self.stale_ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value, age
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import random
+from datetime import date
+
+from fastapi import FastAPI, HTTPException
+
+
+def _precipitation(latitude: float, longitude: float, day: date) -> float:
+    """Deterministic daily rainfall (mm) of a location, so repeated requests agree"""
+    rng = random.Random(f"{latitude:.2f},{longitude:.2f},{day.isoformat()}")
+    return round(rng.random() * 30.0, 1) if rng.random() < 0.6 else 0.0
+
+
+def create_app(latency_ms: float = 0.0, error_rate: float = 0.0, missing_rate: float = 0.0):
+    """
+    Local HTTP fixture answering Open-Meteo daily precipitation_sum requests (single and
+    comma-separated multi-location), with optional latency, 503 errors and responses
+    that leave out precipitation_sum, so WeatherAPI's caching and fallbacks can be
+    exercised without hitting the real API. /stats reports how many requests it received.
+
+    Run with `python weather_fixture_server.py --port 8003 --missing-rate 0.2` and start
+    the backend with WEATHER_API_URL=http://localhost:8003/v1/forecast
+    """
+    app = FastAPI()
+    stats = {"requests": 0, "locations": 0}
+
+    @app.get("/v1/forecast")
+    async def forecast(latitude: str, longitude: str, start_date: str, end_date: str,
+                       daily: str = "precipitation_sum", timezone: str = "GMT"):
+        stats["requests"] += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if random.random() < error_rate:
+            raise HTTPException(status_code=503, detail="Fixture error")
+
+        latitudes = [float(value) for value in latitude.split(",")]
+        longitudes = [float(value) for value in longitude.split(",")]
+        if len(latitudes) != len(longitudes):
+            raise HTTPException(status_code=400, detail="latitude and longitude lengths differ")
+        first, last = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        days = [date.fromordinal(ordinal) for ordinal in range(first.toordinal(), last.toordinal() + 1)]
+        stats["locations"] += len(latitudes)
+
+        results = []
+        for lat, lon in zip(latitudes, longitudes):
+            result = {"latitude": lat, "longitude": lon, "timezone": timezone,
+                      "daily": {"time": [day.isoformat() for day in days]}}
+            if "precipitation_sum" in daily and random.random() >= missing_rate:
+                result["daily"]["precipitation_sum"] = [_precipitation(lat, lon, day) for day in days]
+            results.append(result)
+        # Like Open-Meteo: one location is an object, several are an array
+        return results[0] if len(results) == 1 else results
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Open-Meteo fixture server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8003)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--missing-rate", type=float, default=0.0,
+                        help="Fraction of locations answered without precipitation_sum")
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.error_rate, args.missing_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from flood_sequences import TIME_STEPS, create_sequences, sequence_dataset
+
+logger = logging.getLogger(__name__)
+
+# Walk-forward folds used so far: (train end, validation end) as fractions of the sequences
+DEFAULT_FOLDS = [
+    (0.5, 0.71),
+    (0.71, 0.95)
+]
+
+DEFAULT_TRAINING = {
+    "epochs": 50,
+    "batch_size": 32,
+    "patience": 5,
+    # Validation predictions above this percentile of y_prob count as floods
+    "threshold_percentile": 80
+}
+
+# Sequences of in-memory datasets, loaded once per process
+_sequences = {}
+
+
+def walk_forward_folds(n_folds: int, start: float = 0.5, end: float = 0.95) -> list:
+    """n_folds consecutive (train end, validation end) folds evenly covering [start, end]"""
+    bounds = np.linspace(start, end, n_folds + 1)
+    return [(round(float(bounds[i]), 4), round(float(bounds[i + 1]), 4)) for i in range(n_folds)]
+
+
+def parse_folds(spec: str) -> list:
+    """Parse folds given as 'train_end:val_end,...' (e.g. '0.5:0.71,0.71:0.95')"""
+    folds = []
+    for item in spec.split(","):
+        train_end, val_end = (float(value) for value in item.split(":"))
+        if not 0 < train_end < val_end <= 1:
+            raise ValueError(f"Invalid fold '{item}' (expected 0 < train_end < val_end <= 1)")
+        folds.append((train_end, val_end))
+    return folds
+
+
+# Read by OpenMP/MKL/OpenBLAS when they load, i.e. before any pool initializer runs
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+@contextmanager
+def worker_thread_env(threads: int):
+    """
+    Set the BLAS/OpenMP thread limits in this process's environment while worker
+    processes are spawned (they inherit it at start), then restore the previous values
+    """
+    previous = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update({var: str(threads) for var in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for var, value in previous.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def limit_threads(threads: int):
+    """
+    Cap the threads TensorFlow uses in this process. Must run before TensorFlow
+    executes any op (process pool initializer); the BLAS limits come from
+    worker_thread_env.
+    """
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(min(2, threads))
+
+
+def _load_sequences(data: dict):
+    key = (data["csv"], tuple(data["feature_cols"]), data["label_col"])
+    if key not in _sequences:
+        import pandas as pd
+
+        df = pd.read_csv(data["csv"])
+        X = df[data["feature_cols"]].values
+        y = df[data["label_col"]].values.astype(int)
+        _sequences[key] = create_sequences(X, y, TIME_STEPS)
+    return _sequences[key]
+
+
+def load_split(data: dict, start_fraction: float, end_fraction: float, name: str, batch_size: int = 32):
+    """
+    Sequences of a walk-forward split as (inputs, labels): arrays in memory, or a
+    batched tf.data dataset and its label counts when data has "shards"
+
+    Args:
+        data: {"csv", "feature_cols", "label_col"} and optionally {"shards", "cache"}
+        name: Split name, used for the tf.data cache file
+    """
+    if data.get("shards"):
+        from flood_streaming import label_counts, make_dataset
+
+        cache = data.get("cache")
+        if cache:
+            os.makedirs(cache, exist_ok=True)
+            cache = os.path.join(cache, name)
+        dataset = make_dataset(data["shards"], start_fraction, end_fraction, batch_size=batch_size, cache=cache)
+        return dataset, label_counts(data["shards"], start_fraction, end_fraction)
+
+    X_seq, y_seq = _load_sequences(data)
+    start, end = int(start_fraction * len(X_seq)), int(end_fraction * len(X_seq))
+    return X_seq[start:end], y_seq[start:end]
+
+
+def balanced_class_weight(counts) -> dict:
+    """Balanced class weights (as sklearn's compute_class_weight) from label counts"""
+    counts = np.asarray(counts)
+    classes = np.flatnonzero(counts)
+    weights = counts.sum() / (len(classes) * counts[classes])
+    return dict(zip(classes.tolist(), weights.tolist()))
+
+
+def fit_model(model, inputs, labels, validation=None, class_weight=None, epochs: int = 50,
+              batch_size: int = 32, callbacks=None, verbose=1, initial_epoch: int = 0):
+    """
+    model.fit on sequence arrays or on a streamed dataset
+
+    Arrays (window views of the feature rows) are fed batch by batch through
+    sequence_dataset rather than copied into one dense tensor, in time order.
+    """
+    if isinstance(inputs, np.ndarray):
+        # 🚨 No shuffling: batches follow time order, as required for time series
+        inputs = sequence_dataset(inputs, labels, batch_size)
+        if validation is not None:
+            validation = (sequence_dataset(*validation, batch_size), None)
+    # Streamed datasets are batched by the pipeline, which keeps each station's sequences in time order
+    return model.fit(
+        inputs,
+        validation_data=None if validation is None else validation[0],
+        epochs=epochs,
+        initial_epoch=initial_epoch,
+        class_weight=class_weight,
+        callbacks=callbacks,
+        verbose=verbose
+    )
+
+
+def predict_split(model, inputs, labels, batch_size: int = 256):
+    """(y_true, y_prob) of a split; batches are predicted as they are read"""
+    if isinstance(inputs, np.ndarray):
+        inputs = sequence_dataset(inputs, labels, batch_size)
+    y_true, y_prob = [], []
+    for X_batch, y_batch in inputs:
+        y_true.append(y_batch.numpy())
+        y_prob.append(model.predict_on_batch(X_batch).ravel())
+    return np.concatenate(y_true), np.concatenate(y_prob)
+
+
+def evaluate_split(model, inputs, labels, threshold_percentile: float = 80) -> dict:
+    """
+    Validation metrics of a trained model; predictions above the threshold_percentile
+    of the predicted probabilities count as floods
+    """
+    from sklearn.metrics import classification_report, confusion_matrix, precision_score, recall_score, roc_auc_score
+
+    y_true, y_prob = predict_split(model, inputs, labels)
+    threshold = float(np.percentile(y_prob, threshold_percentile))
+    y_pred = (y_prob >= threshold).astype(int)
+
+    return {
+        "threshold": threshold,
+        "accuracy": float(np.mean(y_pred == y_true)),
+        "recall_flood": float(recall_score(y_true, y_pred, pos_label=1, zero_division=0)),
+        "precision_flood": float(precision_score(y_true, y_pred, pos_label=1, zero_division=0)),
+        "auc": float(roc_auc_score(y_true, y_prob)) if len(np.unique(y_true)) == 2 else None,
+        "confusion_matrix": confusion_matrix(y_true, y_pred, labels=[0, 1]).tolist(),
+        "classification_report": classification_report(y_true, y_pred, zero_division=0)
+    }
+
+
+def run_fold(fold_id: int, train_end: float, val_end: float, data: dict, training: dict = None,
+             verbose=1) -> dict:
+    """
+    Train and evaluate one walk-forward fold: train on [0, train_end), validate on
+    [train_end, val_end)
+
+    Returns:
+        Fold metrics (sample counts, epochs, accuracy, flood recall/precision, AUC, ...)
+    """
+    import tensorflow as tf
+
+    from flood_model import build_lstm_model
+
+    training = {**DEFAULT_TRAINING, **(training or {})}
+    started = time.perf_counter()
+
+    X_train, y_train = load_split(data, 0.0, train_end, f"fold{fold_id}_train", training["batch_size"])
+    X_val, y_val = load_split(data, train_end, val_end, f"fold{fold_id}_val", training["batch_size"])
+    streaming = bool(data.get("shards"))
+    train_counts = y_train if streaming else np.bincount(y_train, minlength=2)
+    val_counts = y_val if streaming else np.bincount(y_val, minlength=2)
+
+    # Class weights (train only)
+    class_weight = balanced_class_weight(train_counts)
+
+    model = build_lstm_model(TIME_STEPS, len(data["feature_cols"]))
+    early_stop = tf.keras.callbacks.EarlyStopping(
+        monitor="val_loss",
+        patience=training["patience"],
+        restore_best_weights=True
+    )
+    history = fit_model(
+        model, X_train, y_train, validation=(X_val, y_val), class_weight=class_weight,
+        epochs=training["epochs"], batch_size=training["batch_size"], callbacks=[early_stop], verbose=verbose
+    )
+
+    return {
+        "fold": fold_id,
+        "train_end": train_end,
+        "val_end": val_end,
+        "train_samples": int(train_counts.sum()),
+        "val_samples": int(val_counts.sum()),
+        "floods_in_val": int(val_counts[1]),
+        "class_weight": {str(label): weight for label, weight in class_weight.items()},
+        "epochs_trained": len(history.history["loss"]),
+        "best_val_loss": float(min(history.history["val_loss"])),
+        **evaluate_split(model, X_val, y_val, training["threshold_percentile"]),
+        "train_seconds": round(time.perf_counter() - started, 2),
+        "pid": os.getpid()
+    }
+
+
+def summarize(fold_results: list) -> dict:
+    """Mean of the numeric fold metrics over the folds that completed"""
+    completed = [result for result in fold_results if "error" not in result]
+    metrics = ("accuracy", "recall_flood", "precision_flood", "auc", "best_val_loss", "epochs_trained")
+    summary = {"folds_completed": len(completed), "folds_failed": len(fold_results) - len(completed)}
+    for metric in metrics:
+        values = [result[metric] for result in completed if result.get(metric) is not None]
+        summary[metric] = float(np.mean(values)) if values else None
+    return summary
+
+
+def run_cross_validation(folds: list, data: dict, training: dict = None, workers: int = 1,
+                         threads_per_worker: int = None, results_path: str = None) -> dict:
+    """
+    Run walk-forward folds, concurrently in a process pool when workers > 1
+
+    Each worker is a spawned process whose TensorFlow/BLAS thread pools are limited to
+    threads_per_worker (default: CPU count / workers), so folds do not oversubscribe
+    the machine. A failing fold is recorded with its error instead of aborting the run.
+
+    Args:
+        folds: (train_end, val_end) fractions, any number
+        data: Data source, see load_split
+        training: Overrides of DEFAULT_TRAINING
+        workers: Folds trained at the same time
+        threads_per_worker: Thread limit of each worker process
+        results_path: Write the results as JSON to this file
+
+    Returns:
+        {"config": ..., "folds": [fold metrics in fold order], "summary": mean metrics}
+    """
+    training = {**DEFAULT_TRAINING, **(training or {})}
+    workers = max(1, min(workers, len(folds)))
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    started = time.perf_counter()
+
+    fold_results = []
+    if workers == 1:
+        for fold_id, (train_end, val_end) in enumerate(folds, start=1):
+            fold_results.append(_run_fold_safe(fold_id, train_end, val_end, data, training, 1))
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with worker_thread_env(threads_per_worker), \
+                ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                    initializer=limit_threads, initargs=(threads_per_worker,)) as pool:
+            futures = [
+                pool.submit(_run_fold_safe, fold_id, train_end, val_end, data, training, 2)
+                for fold_id, (train_end, val_end) in enumerate(folds, start=1)
+            ]
+            fold_results = [future.result() for future in futures]
+
+    results = {
+        "config": {
+            "folds": [list(fold) for fold in folds],
+            "data": data,
+            "training": training,
+            "workers": workers,
+            "threads_per_worker": threads_per_worker if workers > 1 else None
+        },
+        "folds": fold_results,
+        "summary": {**summarize(fold_results), "wall_seconds": round(time.perf_counter() - started, 2)}
+    }
+    if results_path:
+        with open(results_path, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def _run_fold_safe(fold_id, train_end, val_end, data, training, verbose) -> dict:
+    try:
+        return run_fold(fold_id, train_end, val_end, data, training, verbose)
+    except Exception as e:
+        logger.error(f"Fold {fold_id} failed: {str(e)}")
+        return {"fold": fold_id, "train_end": train_end, "val_end": val_end, "error": str(e)}
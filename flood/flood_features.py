@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# The banded normalization is shared with the backend, so training and serving use one implementation
+from backend.feature_engine import normalize_water_level_banded
+
+# Feature layout of the model-ready dataset (same order as the LSTM input)
+FEATURE_COLS = [
+    "Rain_3day_sum",
+    "Rain_7day_sum",
+    "Rain_3day_avg",
+    "Max_Normalized_River_Level",
+    "Avg_Normalized_River_Level",
+    "Max_River_Rise"
+]
+
+# Chennai reservoir thresholds as a fraction of each gauge's maximum level
+WARNING_RATIO = 0.7  # 70% of max capacity
+DANGER_RATIO = 0.85  # 85% of max capacity
+
+# Dominance reduction applied to the max/avg normalized river levels
+LEVEL_DOMINANCE = 0.8
+
+
+def _group_starts(groups, n_rows: int) -> np.ndarray:
+    """Index of the first row of each row's group (groups must be contiguous)"""
+    if groups is None:
+        return np.zeros(n_rows, dtype=np.int64)
+    groups = np.asarray(groups)
+    boundary = np.ones(n_rows, dtype=bool)
+    boundary[1:] = groups[1:] != groups[:-1]
+    return np.maximum.accumulate(np.where(boundary, np.arange(n_rows), 0))
+
+
+def rolling_sum(values, window: int, groups=None) -> np.ndarray:
+    """
+    Trailing rolling sum along axis 0, like pandas rolling(window).sum()
+
+    Rows without a full window (the first window - 1 rows, or of each group when
+    groups is given) are NaN, as is any window containing a NaN.
+
+    Args:
+        values: Array of shape (T,) or (T, G)
+        window: Window length in rows
+        groups: Optional group label per row; windows never span two groups
+
+    Returns:
+        Array of the same shape as values
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window, axis=0)
+        # Same left-to-right summation order as a running sum over the window
+        total = windows[..., 0].copy()
+        for offset in range(1, window):
+            total += windows[..., offset]
+        out[window - 1:] = total
+
+    complete = np.arange(len(values)) - _group_starts(groups, len(values)) >= window - 1
+    out[~complete] = np.nan
+    return out
+
+
+def rolling_mean(values, window: int, groups=None) -> np.ndarray:
+    """Trailing rolling mean along axis 0, like pandas rolling(window).mean()"""
+    return rolling_sum(values, window, groups) / window
+
+
+def diff(values, groups=None) -> np.ndarray:
+    """First difference along axis 0, NaN on the first row (of each group)"""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    out[1:] = values[1:] - values[:-1]
+    out[_group_starts(groups, len(values)) == np.arange(len(values))] = np.nan
+    return out
+
+
+def gauge_thresholds(levels, warning_ratio: float = WARNING_RATIO, danger_ratio: float = DANGER_RATIO,
+                     groups=None):
+    """
+    Warning and danger levels of each gauge as fractions of its maximum reading
+
+    Args:
+        levels: Gauge readings, shape (T, G)
+        groups: Optional group label per row; thresholds are then per group and gauge
+
+    Returns:
+        (warning_level, danger_level), each of shape (G,) or, with groups, (T, G)
+    """
+    levels = np.asarray(levels, dtype=float)
+    if groups is None:
+        max_level = np.nanmax(levels, axis=0) if len(levels) else np.full(levels.shape[1:], np.nan)
+    else:
+        max_level = pd.DataFrame(levels).groupby(np.asarray(groups), sort=False).transform("max").to_numpy()
+    return warning_ratio * max_level, danger_ratio * max_level
+
+
+def _nanmean(values: np.ndarray, axis: int) -> np.ndarray:
+    """nanmean without the all-NaN RuntimeWarning (all-NaN rows give NaN)"""
+    present = ~np.isnan(values)
+    count = present.sum(axis=axis)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count > 0, np.where(present, values, 0.0).sum(axis=axis) / count, np.nan)
+
+
+def extract_features_arrays(rainfall, levels, warning_level, danger_level, groups=None,
+                            level_dominance: float = LEVEL_DOMINANCE) -> np.ndarray:
+    """
+    Build the model features from time-ordered rainfall and gauge level arrays
+
+    Args:
+        rainfall: Daily rainfall, shape (T,)
+        levels: Daily level of each gauge, shape (T, G); G may be any number of gauges
+        warning_level: Warning level per gauge, shape (G,) or (T, G)
+        danger_level: Danger level per gauge, shape (G,) or (T, G)
+        groups: Optional group label per row (e.g. a region); rows of a group must be
+            contiguous and rolling windows and differences never cross groups
+        level_dominance: Factor applied to the aggregated normalized river levels
+
+    Returns:
+        Array of shape (T, 6), columns as in FEATURE_COLS (NaN where a window is incomplete)
+    """
+    rainfall = np.asarray(rainfall, dtype=float).ravel()
+    levels = np.asarray(levels, dtype=float)
+    if levels.ndim == 1:
+        levels = levels[:, None]
+    if len(levels) != len(rainfall):
+        raise ValueError("rainfall and levels must have the same number of rows")
+
+    features = np.empty((len(rainfall), len(FEATURE_COLS)))
+
+    # Rainfall features (cause)
+    features[:, 0] = rolling_sum(rainfall, 3, groups)
+    features[:, 1] = rolling_sum(rainfall, 7, groups)
+    features[:, 2] = rolling_mean(rainfall, 3, groups)
+
+    # Aggregate river behaviour over all gauges (removes river identity)
+    normalized = normalize_water_level_banded(levels, warning_level, danger_level)
+    with np.errstate(invalid="ignore"):
+        features[:, 3] = np.fmax.reduce(normalized, axis=1) * level_dominance
+    features[:, 4] = _nanmean(normalized, axis=1) * level_dominance
+
+    # Rate of rise (danger signal)
+    features[:, 5] = np.fmax.reduce(diff(levels, groups), axis=1)
+
+    return features
+
+
+def extract_features(df: pd.DataFrame, gauge_cols: list, rainfall_col: str = "Rainfall",
+                     date_col: str = "Date", group_col: str = None,
+                     warning_ratio: float = WARNING_RATIO, danger_ratio: float = DANGER_RATIO,
+                     level_dominance: float = LEVEL_DOMINANCE, dropna: bool = True) -> pd.DataFrame:
+    """
+    Model-ready features from a raw daily dataset with one column per gauge
+
+    Rows are sorted by date (within group_col when given) before the rolling windows
+    are computed. Each gauge's thresholds are warning_ratio/danger_ratio of its maximum
+    reading (per group when group_col is given).
+
+    Args:
+        df: Raw dataset with date_col, rainfall_col and the gauge columns
+        gauge_cols: Gauge (reservoir/river level) columns, any number
+        group_col: Optional column of independent series (e.g. regions)
+        dropna: Drop rows whose rolling windows are incomplete
+
+    Returns:
+        DataFrame with FEATURE_COLS (plus date_col and group_col when present)
+    """
+    sort_cols = ([group_col] if group_col else []) + ([date_col] if date_col in df.columns else [])
+    if sort_cols:
+        df = df.sort_values(sort_cols, kind="stable").reset_index(drop=True)
+    groups = df[group_col].to_numpy() if group_col else None
+
+    levels = df[list(gauge_cols)].to_numpy(dtype=float)
+    warning_level, danger_level = gauge_thresholds(levels, warning_ratio, danger_ratio, groups)
+    features = extract_features_arrays(
+        df[rainfall_col].to_numpy(dtype=float), levels, warning_level, danger_level,
+        groups, level_dominance
+    )
+
+    result = pd.DataFrame(features, columns=FEATURE_COLS)
+    for col in reversed(sort_cols):
+        result.insert(0, col, df[col].to_numpy())
+    if dropna:
+        result = result.dropna(subset=FEATURE_COLS).reset_index(drop=True)
+    return result
@@ -2,6 +2,8 @@ import numpy as np
 import pandas as pd
 import tensorflow as tf
 
+from flood_sequences import TIME_STEPS, create_sequences, sequence_dataset
+
 from sklearn.metrics import confusion_matrix, classification_report, accuracy_score
 
 # =====================================
@@ -32,15 +34,7 @@ y = df[LABEL_COL].values.astype(int)
 # =====================================
 # 3. CREATE LSTM SEQUENCES
 # =====================================
-TIME_STEPS = 7
-
-def create_sequences(X, y, window):
-    X_seq, y_seq = [], []
-    for i in range(len(X) - window):
-        X_seq.append(X[i:i + window])
-        y_seq.append(y[i + window])
-    return np.array(X_seq), np.array(y_seq)
-
+# Zero-copy views of X and y (see flood_sequences.py)
 X_seq, y_seq = create_sequences(X, y, TIME_STEPS)
 
 
@@ -60,7 +54,8 @@ print("Floods in test:", np.sum(y_test == 1))
 # =====================================
 # 5. MODEL PREDICTION
 # =====================================
-y_prob = model.predict(X_test).ravel()
+# Batches are copied one at a time from the views
+y_prob = model.predict(sequence_dataset(X_test, y_test, 256)).ravel()
 
 # ⚠️ IMPORTANT:
 # Threshold MUST be fixed (no tuning here)
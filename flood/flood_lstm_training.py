@@ -1,51 +1,18 @@
+import argparse
 
 import numpy as np
 import pandas as pd
-import tensorflow as tf
 
-from sklearn.utils.class_weight import compute_class_weight
-from sklearn.metrics import confusion_matrix, classification_report, recall_score
+from flood_cv import (
+    DEFAULT_FOLDS, DEFAULT_TRAINING, balanced_class_weight, fit_model, load_split, parse_folds,
+    run_cross_validation, walk_forward_folds
+)
+from flood_model import build_lstm_model
+from flood_sequences import TIME_STEPS
+from flood_streaming import has_manifest, write_shards
 
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout, LayerNormalization, Input
-from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping
 
-# =====================================
-# 0. MODEL BUILDER (BINARY)
-# =====================================
-def build_lstm_model(time_steps, n_features):
-    model = Sequential([
-        Input(shape=(time_steps, n_features)),
-
-        LSTM(64, return_sequences=True),
-        LayerNormalization(),
-        Dropout(0.3),
-
-        LSTM(32),
-        LayerNormalization(),
-        Dropout(0.3),
-
-        Dense(32, activation="relu"),
-        Dense(1, activation="sigmoid")   # ✅ Binary output
-    ])
-
-    model.compile(
-        optimizer=Adam(learning_rate=0.001),
-        loss="binary_crossentropy",       # ✅ Correct loss
-        metrics=[
-            tf.keras.metrics.AUC(name="auc"),        # main quality signal
-            tf.keras.metrics.Precision(name="precision"),
-            tf.keras.metrics.Recall(name="recall")
-        ]
-    )
-    return model
-
-
-# =====================================
-# 1. LOAD DATA
-# =====================================
-df = pd.read_csv("flood_preprocessed.csv")
 
 FEATURE_COLS = [
     "Rain_3day_sum",
@@ -58,159 +25,156 @@ FEATURE_COLS = [
 
 LABEL_COL = "Flood_Label"   # 0 = No Flood, 1 = Flood
 
-X = df[FEATURE_COLS].values
-y = df[LABEL_COL].values.astype(int)
-
-
-# =====================================
-# 2. CREATE LSTM SEQUENCES
-# =====================================
-TIME_STEPS = 7
-
-def create_sequences(X, y, window):
-    X_seq, y_seq = [], []
-    for i in range(len(X) - window):
-        X_seq.append(X[i:i + window])
-        y_seq.append(y[i + window])
-    return np.array(X_seq), np.array(y_seq)
-
-X_seq, y_seq = create_sequences(X, y, TIME_STEPS)
-
-print("Sequence shape:", X_seq.shape)
-print("Label shape   :", y_seq.shape)
-
-
-# =====================================
-# 3. WALK-FORWARD TIME SERIES CV
-# =====================================
-N_FEATURES = X_seq.shape[2]
-
-# (train %, val %)
-"""folds = [
-    (0.55, 0.65),
-    (0.65, 0.85)
-]"""
-folds = [
-    (0.5, 0.71),
-    (0.71, 0.95)
-]
-
-cv_results = []
-
-
-# =====================================
-# 4. CV TRAINING LOOP
-# =====================================
-for fold_id, (train_end, val_end) in enumerate(folds, start=1):
-    print(f"\n================ FOLD {fold_id} ================")
-
-    train_idx = int(train_end * len(X_seq))
-    val_idx   = int(val_end * len(X_seq))
-
-    X_train, X_val = X_seq[:train_idx], X_seq[train_idx:val_idx]
-    y_train, y_val = y_seq[:train_idx], y_seq[train_idx:val_idx]
-
-    print("Train samples:", len(X_train))
-    print("Val samples  :", len(X_val))
-    print("Floods in Val:", np.sum(y_val == 1))
-
-    # ---------------------------------
-    # CLASS WEIGHTS (TRAIN ONLY)
-    # ---------------------------------
-    classes = np.unique(y_train)
-    weights = compute_class_weight(
-        class_weight="balanced",
-        classes=classes,
-        y=y_train
+BATCH_SIZE = DEFAULT_TRAINING["batch_size"]
+
+
+# Worker processes of the CV runner import this module, so training only runs as a script
+def main():
+    # =====================================
+    # 1. LOAD DATA
+    # =====================================
+    parser = argparse.ArgumentParser(description="Train the binary flood LSTM")
+    parser.add_argument("--shards", default=None,
+                        help="Stream training data from this shard directory with tf.data "
+                             "(written from flood_preprocessed.csv if it has no manifest yet)")
+    parser.add_argument("--cache", default=None,
+                        help="Cache streamed sequences in files under this directory ('' caches in memory)")
+    parser.add_argument("--rows-per-shard", type=int, default=100_000)
+    parser.add_argument("--folds", default=None,
+                        help="Walk-forward folds as train_end:val_end,... (default 0.5:0.71,0.71:0.95)")
+    parser.add_argument("--n-folds", type=int, default=None,
+                        help="Use this many evenly spaced walk-forward folds between 0.5 and 0.95 instead")
+    parser.add_argument("--workers", type=int, default=1, help="Folds trained concurrently in worker processes")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="TensorFlow/BLAS threads per worker (default: CPU count / workers)")
+    parser.add_argument("--results", default="cv_results.json", help="Write fold metrics to this JSON file")
+    args = parser.parse_args()
+
+    streaming = args.shards is not None
+    data = {
+        "csv": "flood_preprocessed.csv",
+        "feature_cols": FEATURE_COLS,
+        "label_col": LABEL_COL,
+        "shards": args.shards,
+        "cache": args.cache
+    }
+
+    if streaming:
+        # Out-of-core: sequences are streamed from NPY/Parquet shards (see flood_streaming.py)
+        if not has_manifest(args.shards):
+            write_shards(pd.read_csv(data["csv"]), args.shards, FEATURE_COLS, LABEL_COL,
+                         rows_per_shard=args.rows_per_shard, window=TIME_STEPS)
+        print("Streaming sequences from", args.shards)
+
+    # =====================================
+    # 2. CREATE LSTM SEQUENCES
+    # =====================================
+    # Zero-copy views of the feature rows (see flood_sequences.py), or a tf.data dataset when streaming
+    X_seq, y_seq = load_split(data, 0.0, 1.0, "full", BATCH_SIZE)
+
+    if not streaming:
+        print("Sequence shape:", X_seq.shape)
+        print("Label shape   :", y_seq.shape)
+
+    # =====================================
+    # 3. WALK-FORWARD TIME SERIES CV
+    # =====================================
+    n_features = len(FEATURE_COLS)
+
+    # (train %, val %)
+    """folds = [
+        (0.55, 0.65),
+        (0.65, 0.85)
+    ]"""
+    if args.folds:
+        folds = parse_folds(args.folds)
+    elif args.n_folds:
+        folds = walk_forward_folds(args.n_folds)
+    else:
+        folds = DEFAULT_FOLDS
+
+    # =====================================
+    # 4. CV TRAINING (folds run concurrently with --workers, see flood_cv.py)
+    # =====================================
+    cv = run_cross_validation(
+        folds,
+        data,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        results_path=args.results
     )
-    class_weight = dict(zip(classes, weights))
-    print("Class weights:", class_weight)
-
-    # ---------------------------------
-    # BUILD & TRAIN MODEL
-    # ---------------------------------
-    model = build_lstm_model(TIME_STEPS, N_FEATURES)
+    cv_results = cv["folds"]
+
+    for r in cv_results:
+        print(f"\n================ FOLD {r['fold']} ================")
+        if "error" in r:
+            print("Failed:", r["error"])
+            continue
+
+        print("Train samples:", r["train_samples"])
+        print("Val samples  :", r["val_samples"])
+        print("Floods in Val:", r["floods_in_val"])
+        print("Class weights:", r["class_weight"])
+
+        print("\nConfusion Matrix:")
+        print(np.array(r["confusion_matrix"]))
+
+        print("\nClassification Report:")
+        print(r["classification_report"])
+
+    # =====================================
+    # 5. CV SUMMARY
+    # =====================================
+    print("\n================ CV SUMMARY ================")
+
+    completed = [r for r in cv_results if "error" not in r]
+    for r in completed:
+        print(
+            f"Fold {r['fold']} → "
+            f"Acc: {r['accuracy']:.3f}, "
+            f"Recall(Flood): {r['recall_flood']:.3f}"
+        )
+
+    print("\nMEAN CV METRICS")
+    if completed:
+        print(f"Accuracy      : {cv['summary']['accuracy']:.3f}")
+        print(f"Recall(Flood) : {cv['summary']['recall_flood']:.3f}")
+    print(f"CV wall time  : {cv['summary']['wall_seconds']:.1f}s ({cv['config']['workers']} worker(s))")
+    if args.results:
+        print("📁 CV results saved to", args.results)
+
+    # =====================================
+    # 6. TRAIN FINAL MODEL (2015–2019)
+    # =====================================
+    # Class weights of the last fold, or of the full data if it failed
+    if completed and completed[-1]["fold"] == len(folds):
+        class_weight = {int(label): weight for label, weight in completed[-1]["class_weight"].items()}
+    else:
+        class_weight = balanced_class_weight(y_seq if streaming else np.bincount(y_seq, minlength=2))
 
     early_stop = EarlyStopping(
         monitor="val_loss",
-        patience=5,
+        patience=DEFAULT_TRAINING["patience"],
         restore_best_weights=True,
        # mode=max
     )
 
-    model.fit(
-        X_train,
-        y_train,
-        validation_data=(X_val, y_val),
-        epochs=50,
-        batch_size=32,
+    final_model = build_lstm_model(TIME_STEPS, n_features)
+
+    fit_model(
+        final_model,
+        X_seq,
+        y_seq,
         class_weight=class_weight,
-        shuffle=False,              # 🚨 REQUIRED for time series
+        epochs=DEFAULT_TRAINING["epochs"],
+        batch_size=BATCH_SIZE,
         callbacks=[early_stop],
         verbose=1
     )
 
-    # ---------------------------------
-    # EVALUATION
-    # ---------------------------------
-    y_prob = model.predict(X_val).ravel()
-    #y_pred = (y_prob >= 0.4).astype(int)   # ✅ Threshold tuned for recall
-    threshold = np.percentile(y_prob, 80)
-    y_pred = (y_prob >= threshold).astype(int)
-
-    print("\nConfusion Matrix:")
-    print(confusion_matrix(y_val, y_pred))
-
-    print("\nClassification Report:")
-    print(classification_report(y_val, y_pred, zero_division=0))
-
-    recall_flood = recall_score(
-        y_val, y_pred,
-        pos_label=1,
-        zero_division=0
-    )
-
-    acc = np.mean(y_pred == y_val)
-
-    cv_results.append({
-        "fold": fold_id,
-        "accuracy": acc,
-        "recall_flood": recall_flood
-    })
-
+    final_model.save("flood_lstm_binary_model.keras")
+    print("\n✅ Final Binary Flood LSTM model saved successfully")
 
-# =====================================
-# 5. CV SUMMARY
-# =====================================
-print("\n================ CV SUMMARY ================")
-
-for r in cv_results:
-    print(
-        f"Fold {r['fold']} → "
-        f"Acc: {r['accuracy']:.3f}, "
-        f"Recall(Flood): {r['recall_flood']:.3f}"
-    )
-
-print("\nMEAN CV METRICS")
-print(f"Accuracy      : {np.mean([r['accuracy'] for r in cv_results]):.3f}")
-print(f"Recall(Flood) : {np.mean([r['recall_flood'] for r in cv_results]):.3f}")
-
-
-# =====================================
-# 6. TRAIN FINAL MODEL (2015–2019)
-# =====================================
-final_model = build_lstm_model(TIME_STEPS, N_FEATURES)
-
-final_model.fit(
-    X_seq,
-    y_seq,
-    epochs=50,
-    batch_size=32,
-    class_weight=class_weight,
-    shuffle=False,
-    callbacks=[early_stop],
-    verbose=1
-)
 
-final_model.save("flood_lstm_binary_model.keras")
-print("\n✅ Final Binary Flood LSTM model saved successfully")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import tensorflow as tf
+
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import LSTM, Dense, Dropout, LayerNormalization, Input
+from tensorflow.keras.optimizers import Adam
+
+
+# =====================================
+# MODEL BUILDER (BINARY)
+# =====================================
+def build_lstm_model(time_steps, n_features, lstm_units=(64, 32), dropout=0.3, dense_units=32,
+                     learning_rate=0.001):
+    """
+    Stacked LSTM binary classifier. The defaults are the production model; the
+    hyperparameter sweep (flood_sweep.py) varies the rest.
+
+    Args:
+        lstm_units: Units of each LSTM layer, first to last
+        dropout: Dropout after each LSTM layer
+        dense_units: Units of the hidden Dense layer (0 to leave it out)
+        learning_rate: Adam learning rate
+    """
+    layers = [Input(shape=(time_steps, n_features))]
+    for i, units in enumerate(lstm_units):
+        layers += [
+            LSTM(units, return_sequences=i < len(lstm_units) - 1),
+            LayerNormalization(),
+            Dropout(dropout)
+        ]
+    if dense_units:
+        layers.append(Dense(dense_units, activation="relu"))
+    layers.append(Dense(1, activation="sigmoid"))   # ✅ Binary output
+
+    model = Sequential(layers)
+
+    model.compile(
+        optimizer=Adam(learning_rate=learning_rate),
+        loss="binary_crossentropy",       # ✅ Correct loss
+        metrics=[
+            tf.keras.metrics.AUC(name="auc"),        # main quality signal
+            tf.keras.metrics.Precision(name="precision"),
+            tf.keras.metrics.Recall(name="recall")
+        ]
+    )
+    return model
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Days of history per LSTM input sequence
+TIME_STEPS = 7
+
+
+def window_view(X, window: int) -> np.ndarray:
+    """
+    Read-only (len(X) - window + 1, window, F) view of every window of X
+
+    Built with sliding_window_view, so no row of X is copied.
+    """
+    X = np.asarray(X)
+    if X.ndim == 1:
+        X = X[:, None]
+    if len(X) < window:
+        return np.empty((0, window, X.shape[1]), dtype=X.dtype)
+    return sliding_window_view(X, window, axis=0).transpose(0, 2, 1)
+
+
+def valid_window_starts(n_rows: int, window: int, groups=None) -> np.ndarray:
+    """
+    Start rows of the windows that have a label row (start + window) in the same group
+
+    Args:
+        n_rows: Number of rows in the dataset
+        window: Window length
+        groups: Optional group (station) label per row; rows of a group must be contiguous
+
+    Returns:
+        Sorted int64 array of window start indices
+    """
+    starts = np.arange(max(n_rows - window, 0), dtype=np.int64)
+    if groups is None or len(starts) == 0:
+        return starts
+    groups = np.asarray(groups)
+    # Groups are contiguous, so a window stays in one group iff its first and label rows do
+    return starts[groups[starts] == groups[starts + window]]
+
+
+def create_sequences(X, y, window: int = TIME_STEPS):
+    """
+    LSTM sequences of a single time series: X[i:i + window] labelled with y[i + window]
+
+    Args:
+        X: Feature rows in time order, shape (T, F)
+        y: Labels, shape (T,)
+        window: Days per sequence
+
+    Returns:
+        (X_seq, y_seq) of shapes (T - window, window, F) and (T - window,), both views
+        into X and y (no data is copied)
+    """
+    windows = window_view(X, window)
+    return windows[:max(len(X) - window, 0)], np.asarray(y)[window:]
+
+
+class SequenceWindows:
+    """
+    LSTM sequences of a multi-station dataset without materializing them.
+
+    Keeps the feature rows once (sorted by station, then time) and the start row of
+    every window that does not cross a station boundary. Batches are gathered from a
+    sliding-window view on demand, so memory stays at one copy of the dataset plus
+    the batch being trained on, instead of `window` copies of it.
+    """
+    def __init__(self, X, y, window: int = TIME_STEPS, groups=None, starts=None):
+        self.X = np.asarray(X)
+        self.y = np.asarray(y)
+        self.window = window
+        self.groups = None if groups is None else np.asarray(groups)
+        self.windows = window_view(self.X, window)
+        self.starts = valid_window_starts(len(self.X), window, self.groups) if starts is None else starts
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, feature_cols: list, label_col: str, window: int = TIME_STEPS,
+                   group_col: str = None, time_col: str = None):
+        """
+        Build from a long-format DataFrame (one row per station and day)
+
+        Rows are sorted by group_col and time_col first when given.
+        """
+        sort_cols = [col for col in (group_col, time_col) if col]
+        if sort_cols:
+            df = df.sort_values(sort_cols, kind="stable")
+        groups = df[group_col].to_numpy() if group_col else None
+        return cls(
+            df[feature_cols].to_numpy(dtype=np.float32),
+            df[label_col].to_numpy().astype(int),
+            window,
+            groups
+        )
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def shape(self):
+        return (len(self.starts), self.window, self.X.shape[1])
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Label of every sequence, shape (N,)"""
+        return self.y[self.starts + self.window]
+
+    def __getitem__(self, index):
+        """Gather sequences (int, slice or index array) as (X_batch, y_batch) copies"""
+        starts = self.starts[index]
+        return self.windows[starts], self.y[starts + self.window]
+
+    def subset(self, index) -> "SequenceWindows":
+        """Sequences selected by a slice, index or boolean array, sharing the same data"""
+        return SequenceWindows(self.X, self.y, self.window, self.groups, self.starts[index])
+
+    def split(self, start_fraction: float, end_fraction: float) -> "SequenceWindows":
+        """
+        Sequences in [start_fraction, end_fraction) of each station's history, so a
+        walk-forward split covers the same period of every station
+        """
+        if self.groups is None:
+            return self.subset(slice(int(start_fraction * len(self)), int(end_fraction * len(self))))
+        groups = self.groups[self.starts]
+        boundary = np.ones(len(groups), dtype=bool)
+        boundary[1:] = groups[1:] != groups[:-1]
+        group_index = np.cumsum(boundary) - 1
+        count = np.bincount(group_index)[group_index]
+        position = np.arange(len(groups)) - np.flatnonzero(boundary)[group_index]
+        mask = (position >= (start_fraction * count).astype(int)) & (position < (end_fraction * count).astype(int))
+        return self.subset(mask)
+
+    def batches(self, batch_size: int = 32, shuffle: bool = False, seed: int = None):
+        """Yield (X_batch, y_batch) pairs covering every sequence once"""
+        order = np.arange(len(self))
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+        for i in range(0, len(order), batch_size):
+            yield self[order[i:i + batch_size]]
+
+    def arrays(self):
+        """
+        All sequences as (X_seq, y_seq). These are views when the windows are one
+        contiguous run (a single station); otherwise the windows are gathered into a copy.
+        """
+        if len(self.starts) and self.starts[-1] - self.starts[0] == len(self.starts) - 1:
+            first = int(self.starts[0])
+            return (self.windows[first:first + len(self.starts)],
+                    self.y[first + self.window:first + self.window + len(self.starts)])
+        return self[:]
+
+
+def sequence_dataset(sequences, labels=None, batch_size: int = 32):
+    """
+    Batched tf.data dataset over sequences, gathering one batch at a time in order
+
+    Passing window views straight to model.fit/predict would first copy every sequence
+    into one dense (N, window, F) tensor; here only the current batch is copied.
+
+    Args:
+        sequences: (N, window, F) array (e.g. a create_sequences view) or SequenceWindows
+        labels: Labels of array sequences, shape (N,)
+        batch_size: Sequences per batch
+    """
+    import tensorflow as tf
+
+    def generate():
+        if isinstance(sequences, SequenceWindows):
+            batches = sequences.batches(batch_size)
+        else:
+            batches = ((sequences[i:i + batch_size], labels[i:i + batch_size])
+                       for i in range(0, len(sequences), batch_size))
+        for X_batch, y_batch in batches:
+            yield np.asarray(X_batch, dtype=np.float32), np.asarray(y_batch, dtype=np.int32)
+
+    _, window, n_features = sequences.shape
+    dataset = tf.data.Dataset.from_generator(
+        generate,
+        output_signature=(
+            tf.TensorSpec([None, window, n_features], tf.float32),
+            tf.TensorSpec([None], tf.int32)
+        )
+    )
+    n_batches = -(-len(sequences) // batch_size)
+    return dataset.apply(tf.data.experimental.assert_cardinality(n_batches)).prefetch(1)
@@ -0,0 +1,205 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from flood_sequences import TIME_STEPS
+
+MANIFEST_FILE = "manifest.json"
+SHARD_FORMATS = ("npy", "parquet")
+
+
+def load_manifest(shard_dir) -> dict:
+    with open(os.path.join(shard_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def has_manifest(shard_dir) -> bool:
+    return os.path.exists(os.path.join(shard_dir, MANIFEST_FILE))
+
+
+def write_shards(df: pd.DataFrame, shard_dir, feature_cols: list, label_col: str, group_col: str = None,
+                 time_col: str = None, rows_per_shard: int = 100_000, window: int = TIME_STEPS,
+                 fmt: str = "npy") -> dict:
+    """
+    Write a preprocessed dataset as columnar shards for streaming training
+
+    Each station's rows (sorted by time) are split into shards of at most rows_per_shard
+    rows. Consecutive shards of a station overlap by `window` rows, so every sequence lies
+    in exactly one shard. NPY shards hold a float32 (rows, features + 1) array with the
+    label in the last column; Parquet shards (needs pyarrow) hold the same columns.
+
+    Calling this again on the same directory appends shards to the manifest, so a
+    national dataset can be written one region at a time.
+
+    Returns:
+        The updated manifest
+    """
+    if fmt not in SHARD_FORMATS:
+        raise ValueError(f"Unknown shard format '{fmt}' (expected one of {SHARD_FORMATS})")
+    if rows_per_shard <= window:
+        raise ValueError("rows_per_shard must be larger than window")
+
+    os.makedirs(shard_dir, exist_ok=True)
+    if has_manifest(shard_dir):
+        manifest = load_manifest(shard_dir)
+        if (manifest["feature_cols"], manifest["label_col"], manifest["window"]) != (list(feature_cols), label_col, window):
+            raise ValueError(f"Shards in {shard_dir} were written with different columns or window")
+    else:
+        manifest = {"feature_cols": list(feature_cols), "label_col": label_col, "window": window, "shards": []}
+
+    sort_cols = [col for col in (group_col, time_col) if col]
+    if sort_cols:
+        df = df.sort_values(sort_cols, kind="stable")
+    columns = list(feature_cols) + [label_col]
+    stations = df.groupby(group_col, sort=False) if group_col else [(None, df)]
+
+    for station, rows in stations:
+        data = rows[columns].to_numpy(dtype=np.float32)
+        if len(data) <= window:
+            continue
+        start = 0
+        while True:
+            end = min(start + rows_per_shard, len(data))
+            name = f"shard-{len(manifest['shards']):06d}.{fmt}"
+            path = os.path.join(shard_dir, name)
+            if fmt == "npy":
+                np.save(path, data[start:end])
+            else:
+                pd.DataFrame(data[start:end], columns=columns).to_parquet(path, index=False)
+            manifest["shards"].append({
+                "path": name,
+                "station": None if station is None else str(station),
+                "offset": start,
+                "rows": end - start,
+                "station_rows": len(data)
+            })
+            if end == len(data):
+                break
+            start = end - window
+
+    with open(os.path.join(shard_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def _read_shard(path) -> np.ndarray:
+    path = path.decode() if isinstance(path, bytes) else path
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path).to_numpy(dtype=np.float32)
+    return np.load(path).astype(np.float32, copy=False)
+
+
+def _split_ranges(manifest: dict, start_fraction: float, end_fraction: float) -> list:
+    """
+    (path, first, last) sequence range of each shard inside a walk-forward split, with
+    each station's shards together and in time order
+
+    Positions are counted over each station's sequences, like SequenceWindows.split,
+    so a split covers the same fraction of every station's history.
+    """
+    window = manifest["window"]
+    stations = {}
+    for shard in manifest["shards"]:
+        stations.setdefault(shard["station"], []).append(shard)
+    ranges = []
+    for shard in (shard for shards in stations.values() for shard in sorted(shards, key=lambda s: s["offset"])):
+        n_sequences = shard["station_rows"] - window
+        lo = int(start_fraction * n_sequences) - shard["offset"]
+        hi = int(end_fraction * n_sequences) - shard["offset"]
+        first, last = max(lo, 0), min(hi, shard["rows"] - window)
+        if first < last:
+            ranges.append((shard["station"], shard["path"], first, last))
+    return ranges
+
+
+def label_counts(shard_dir, start_fraction: float = 0.0, end_fraction: float = 1.0) -> np.ndarray:
+    """Number of sequences per label in a split, read from the shards' label column only"""
+    manifest = load_manifest(shard_dir)
+    window = manifest["window"]
+    counts = np.zeros(2, dtype=np.int64)
+    for _, path, first, last in _split_ranges(manifest, start_fraction, end_fraction):
+        path = os.path.join(shard_dir, path)
+        if path.endswith(".parquet"):
+            labels = pd.read_parquet(path, columns=[manifest["label_col"]]).to_numpy().ravel()
+        else:
+            labels = np.load(path, mmap_mode="r")[:, -1]
+        shard_counts = np.bincount(np.asarray(labels[first + window:last + window], dtype=np.int64))
+        if len(shard_counts) > len(counts):
+            counts = np.pad(counts, (0, len(shard_counts) - len(counts)))
+        counts[:len(shard_counts)] += shard_counts
+    return counts
+
+
+def make_dataset(shard_dir, start_fraction: float = 0.0, end_fraction: float = 1.0, batch_size: int = 32,
+                 cycle_length: int = 4, block_length: int = None, cache: str = None,
+                 shuffle_buffer: int = 0, seed: int = None):
+    """
+    tf.data pipeline of (window, features) sequences and labels streamed from shards
+
+    Stations are read in parallel (interleave with cycle_length stations open at once),
+    each station's shards one after another, and windowed with tf.signal.frame, so
+    memory is bounded by a few shards regardless of the dataset size. Every station's
+    sequences come out in time order; a single-station dataset yields exactly the
+    sequences of create_sequences, in order.
+
+    Args:
+        shard_dir: Directory written by write_shards
+        start_fraction, end_fraction: Walk-forward split of each station's sequences
+        batch_size: Sequences per batch
+        cycle_length: Stations read concurrently
+        block_length: Consecutive sequences taken from one station (default: batch_size)
+        cache: Cache the sequences after the first epoch, in memory ("") or in files
+            with this prefix; None disables caching
+        shuffle_buffer: Shuffle buffer size (0 keeps time order)
+        seed: Shuffle seed
+
+    Returns:
+        Batched, prefetched tf.data.Dataset of (X_batch, y_batch)
+    """
+    import tensorflow as tf
+
+    manifest = load_manifest(shard_dir)
+    window = manifest["window"]
+    n_features = len(manifest["feature_cols"])
+    ranges = _split_ranges(manifest, start_fraction, end_fraction)
+
+    def read(path, first, last):
+        data = tf.numpy_function(_read_shard, [path], tf.float32)
+        data.set_shape([None, n_features + 1])
+        # Sequences first..last-1 of the shard: frames of rows [i, i + window), label of row i + window
+        rows = data[first:last + window]
+        sequences = tf.signal.frame(rows[:, :n_features], window, 1, axis=0)[:-1]
+        labels = tf.cast(rows[window:, n_features], tf.int32)
+        return tf.data.Dataset.from_tensor_slices((sequences, labels))
+
+    paths = tf.constant([os.path.join(shard_dir, path) for _, path, _, _ in ranges], dtype=tf.string)
+    firsts = tf.constant([first for _, _, first, _ in ranges], dtype=tf.int64)
+    lasts = tf.constant([last for _, _, _, last in ranges], dtype=tf.int64)
+
+    # [start, end) shard index range of each station (ranges keep a station's shards together)
+    bounds = [i for i in range(len(ranges)) if i == 0 or ranges[i][0] != ranges[i - 1][0]] + [len(ranges)]
+
+    def read_station(start, end):
+        shard_indices = tf.data.Dataset.range(start, end)
+        return shard_indices.flat_map(
+            lambda i: read(tf.gather(paths, i), tf.gather(firsts, i), tf.gather(lasts, i))
+        )
+
+    dataset = tf.data.Dataset.from_tensor_slices((
+        np.array(bounds[:-1], dtype=np.int64),
+        np.array(bounds[1:], dtype=np.int64)
+    ))
+    dataset = dataset.interleave(
+        read_station,
+        cycle_length=cycle_length,
+        block_length=block_length or batch_size,
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=True
+    )
+    if cache is not None:
+        dataset = dataset.cache(cache)
+    if shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,350 @@
+import argparse
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from flood_cv import (
+    DEFAULT_TRAINING, balanced_class_weight, evaluate_split, fit_model, limit_threads, load_split,
+    worker_thread_env
+)
+from flood_sequences import TIME_STEPS
+
+logger = logging.getLogger(__name__)
+
+# Values tried for each build_lstm_model argument
+SEARCH_SPACE = {
+    "lstm_units": [[64, 32], [32, 16], [16, 8], [32], [16], [8]],
+    "dropout": [0.1, 0.2, 0.3],
+    "dense_units": [32, 16, 8, 0],
+    "learning_rate": [0.003, 0.001, 0.0003]
+}
+
+SWEEP_FILE = "sweep.json"
+TRIALS_FILE = "trials.jsonl"
+
+
+def sample_configs(space: dict, n: int, seed: int = 0) -> list:
+    """n distinct random configurations from the search space (all of them if it is smaller)"""
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    random.Random(seed).shuffle(grid)
+    return grid[:n]
+
+
+def rung_budgets(min_epochs: int, max_epochs: int, eta: int) -> list:
+    """Epoch budgets of successive-halving rungs: min_epochs * eta^k, capped at max_epochs"""
+    budgets = [min_epochs]
+    while budgets[-1] < max_epochs:
+        budgets.append(min(budgets[-1] * eta, max_epochs))
+    return budgets
+
+
+def hyperband_brackets(max_epochs: int, eta: int, min_epochs: int = 1) -> list:
+    """
+    (n_trials, first_budget) of each Hyperband bracket, from the most exploratory
+    (many trials, small budget) to a plain full-budget run
+    """
+    s_max = int(math.floor(math.log(max_epochs / min_epochs, eta) + 1e-9))
+    return [
+        (int(math.ceil((s_max + 1) / (s + 1) * eta ** s)), max(min_epochs, int(round(max_epochs / eta ** s))))
+        for s in range(s_max, -1, -1)
+    ]
+
+
+def score(result: dict, objective: str):
+    """Sort key of a trial result: objective first, then the smaller model"""
+    if "error" in result or result.get(objective) is None:
+        return (float("-inf"), 0)
+    value = result[objective]
+    # Lower is better for losses
+    if objective.endswith("loss"):
+        value = -value
+    return (value, -result["n_params"])
+
+
+def run_trial(trial_id: str, params: dict, epochs: int, initial_epoch: int, data: dict, fold: list,
+              training: dict, sweep_dir: str) -> dict:
+    """
+    Train one trial up to `epochs` epochs and evaluate it on the fold's validation split
+
+    A trial promoted from a lower rung continues from that rung's checkpoint instead of
+    starting over; the model is checkpointed per budget so an interrupted rung can rerun.
+    """
+    import tensorflow as tf
+
+    from flood_model import build_lstm_model
+
+    started = time.perf_counter()
+    train_end, val_end = fold
+    X_train, y_train = load_split(data, 0.0, train_end, "sweep_train", training["batch_size"])
+    X_val, y_val = load_split(data, train_end, val_end, "sweep_val", training["batch_size"])
+    streaming = bool(data.get("shards"))
+    train_counts = y_train if streaming else np.bincount(y_train, minlength=2)
+
+    checkpoint = _checkpoint_path(sweep_dir, trial_id, initial_epoch)
+    if initial_epoch and os.path.exists(checkpoint):
+        model = tf.keras.models.load_model(checkpoint)
+    else:
+        if initial_epoch:
+            logger.warning(f"Trial {trial_id}: no checkpoint at {initial_epoch} epochs, training from scratch")
+        model = build_lstm_model(TIME_STEPS, len(data["feature_cols"]), **params)
+        initial_epoch = 0
+
+    early_stop = tf.keras.callbacks.EarlyStopping(
+        monitor="val_loss",
+        patience=training["patience"],
+        restore_best_weights=True
+    )
+    history = fit_model(
+        model, X_train, y_train, validation=(X_val, y_val), class_weight=balanced_class_weight(train_counts),
+        epochs=epochs, batch_size=training["batch_size"], callbacks=[early_stop], verbose=0,
+        initial_epoch=initial_epoch
+    )
+    model.save(_checkpoint_path(sweep_dir, trial_id, epochs))
+
+    metrics = evaluate_split(model, X_val, y_val, training["threshold_percentile"])
+    del metrics["classification_report"]
+    return {
+        "trial": trial_id,
+        "params": params,
+        "epochs": epochs,
+        "n_params": int(model.count_params()),
+        "epochs_trained": len(history.history["loss"]),
+        "best_val_loss": float(min(history.history["val_loss"])),
+        **metrics,
+        "train_seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def _checkpoint_path(sweep_dir: str, trial_id: str, epochs: int) -> str:
+    return os.path.join(sweep_dir, "models", f"{trial_id}-e{epochs}.keras")
+
+
+def _remove_checkpoint(sweep_dir: str, trial_id: str, epochs: int):
+    try:
+        os.remove(_checkpoint_path(sweep_dir, trial_id, epochs))
+    except FileNotFoundError:
+        pass
+
+
+def _run_trial_safe(trial_id, params, epochs, initial_epoch, data, fold, training, sweep_dir) -> dict:
+    try:
+        return run_trial(trial_id, params, epochs, initial_epoch, data, fold, training, sweep_dir)
+    except Exception as e:
+        logger.error(f"Trial {trial_id} ({epochs} epochs) failed: {str(e)}")
+        return {"trial": trial_id, "params": params, "epochs": epochs, "error": str(e)}
+
+
+class Sweep:
+    """
+    Successive-halving / Hyperband search over build_lstm_model hyperparameters.
+
+    Each bracket starts n trials with a small epoch budget, keeps the best 1/eta by the
+    objective (ties go to the smaller model) and continues the survivors with eta times
+    the budget until max_epochs. Trials that failed are never promoted. Trials of a rung
+    train concurrently in spawned worker processes with limited thread pools. Every
+    finished (trial, budget) is appended to trials.jsonl in the sweep directory, and a
+    sweep restarted on the same directory skips what is already recorded (with the
+    settings recorded in sweep.json). Once a rung is ranked, the checkpoints it no longer
+    needs are deleted: those of eliminated trials and the survivors' previous rung.
+    """
+    def __init__(self, sweep_dir: str, data: dict, fold=(0.71, 0.95), space: dict = None, n_trials: int = 27,
+                 min_epochs: int = 3, max_epochs: int = 27, eta: int = 3, hyperband: bool = False,
+                 objective: str = "recall_flood", training: dict = None, seed: int = 0):
+        self.sweep_dir = sweep_dir
+        self.config = {
+            "data": data,
+            "fold": list(fold),
+            "space": space or SEARCH_SPACE,
+            "n_trials": n_trials,
+            "min_epochs": min_epochs,
+            "max_epochs": max_epochs,
+            "eta": eta,
+            "hyperband": hyperband,
+            "objective": objective,
+            "training": {**DEFAULT_TRAINING, **(training or {})},
+            "seed": seed
+        }
+        self.results = {}
+
+        os.makedirs(os.path.join(sweep_dir, "models"), exist_ok=True)
+        config_path = os.path.join(sweep_dir, SWEEP_FILE)
+        if os.path.exists(config_path):
+            # Resuming: the recorded settings define the trials
+            with open(config_path) as f:
+                recorded = json.load(f)
+            requested = json.loads(json.dumps(self.config))
+            changed = sorted(key for key in requested.keys() | recorded.keys()
+                             if requested.get(key) != recorded.get(key))
+            if changed:
+                logger.warning(f"Settings {', '.join(changed)} differ from {config_path}; "
+                               f"resuming with the recorded settings")
+            self.config = recorded
+            print(f"Resuming sweep in {sweep_dir}")
+        else:
+            with open(config_path, "w") as f:
+                json.dump(self.config, f, indent=2)
+
+        trials_path = os.path.join(sweep_dir, TRIALS_FILE)
+        if os.path.exists(trials_path):
+            with open(trials_path) as f:
+                for line in f:
+                    if line.strip():
+                        result = json.loads(line)
+                        self.results[(result["trial"], result["epochs"])] = result
+
+    def brackets(self) -> list:
+        """(bracket id, configurations, first budget) of each bracket to run"""
+        config = self.config
+        if config["hyperband"]:
+            plan = hyperband_brackets(config["max_epochs"], config["eta"], config["min_epochs"])
+        else:
+            plan = [(config["n_trials"], config["min_epochs"])]
+        return [
+            (b, sample_configs(config["space"], n, config["seed"] + b), first_budget)
+            for b, (n, first_budget) in enumerate(plan)
+        ]
+
+    def run(self, workers: int = 1, threads_per_worker: int = None) -> dict:
+        """Run (or resume) every bracket and return the summary written to results.json"""
+        workers = max(1, workers)
+        threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        ctx = multiprocessing.get_context("spawn")
+        started = time.perf_counter()
+
+        # Workers are spawned on demand, so the thread limits stay set for the whole run
+        with worker_thread_env(threads_per_worker), \
+                ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                    initializer=limit_threads, initargs=(threads_per_worker,)) as pool:
+            for bracket_id, configs, first_budget in self.brackets():
+                self._run_bracket(pool, bracket_id, configs, first_budget)
+
+        summary = self.summary()
+        summary["wall_seconds"] = round(time.perf_counter() - started, 2)
+        with open(os.path.join(self.sweep_dir, "results.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    def _run_bracket(self, pool, bracket_id: int, configs: list, first_budget: int):
+        config = self.config
+        budgets = rung_budgets(first_budget, config["max_epochs"], config["eta"])
+        trials = {f"b{bracket_id}-t{i:03d}": params for i, params in enumerate(configs)}
+        previous_budget = 0
+
+        for rung, budget in enumerate(budgets):
+            pending = [trial_id for trial_id in trials if (trial_id, budget) not in self.results]
+            print(f"Bracket {bracket_id} rung {rung}: {len(trials)} trials x {budget} epochs "
+                  f"({len(trials) - len(pending)} already done)")
+            futures = [
+                pool.submit(_run_trial_safe, trial_id, trials[trial_id], budget, previous_budget,
+                            config["data"], config["fold"], config["training"], self.sweep_dir)
+                for trial_id in pending
+            ]
+            for future in as_completed(futures):
+                self._record(future.result())
+
+            ranked = sorted(
+                (trial_id for trial_id in trials if "error" not in self.results[(trial_id, budget)]),
+                key=lambda t: score(self.results[(t, budget)], config["objective"]),
+                reverse=True
+            )
+            if rung == len(budgets) - 1:
+                kept = ranked
+            else:
+                kept = ranked[:max(1, len(trials) // config["eta"])]
+
+            # The survivors continue from this rung's checkpoints; earlier ones are superseded
+            for trial_id in trials:
+                if previous_budget:
+                    _remove_checkpoint(self.sweep_dir, trial_id, previous_budget)
+                if trial_id not in kept:
+                    _remove_checkpoint(self.sweep_dir, trial_id, budget)
+
+            if rung == len(budgets) - 1:
+                break
+            if not kept:
+                print(f"Bracket {bracket_id}: every trial of rung {rung} failed, stopping the bracket")
+                break
+            trials = {trial_id: trials[trial_id] for trial_id in kept}
+            previous_budget = budget
+
+    def _record(self, result: dict):
+        self.results[(result["trial"], result["epochs"])] = result
+        with open(os.path.join(self.sweep_dir, TRIALS_FILE), "a") as f:
+            f.write(json.dumps(result) + "\n")
+        if "error" in result:
+            print(f"  {result['trial']} failed: {result['error']}")
+        else:
+            print(f"  {result['trial']} {result['epochs']:>3} epochs  {self.config['objective']}="
+                  f"{result.get(self.config['objective'])}  params={result['n_params']}  {result['params']}")
+
+    def summary(self) -> dict:
+        """Leaderboard of each trial's result at the largest budget it reached"""
+        latest = {}
+        for (trial_id, epochs), result in self.results.items():
+            if trial_id not in latest or epochs > latest[trial_id]["epochs"]:
+                latest[trial_id] = result
+        objective = self.config["objective"]
+        leaderboard = sorted(latest.values(), key=lambda r: (r["epochs"],) + score(r, objective), reverse=True)
+        return {
+            "config": self.config,
+            "best": leaderboard[0] if leaderboard else None,
+            "leaderboard": leaderboard
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep over build_lstm_model")
+    parser.add_argument("--dir", default="sweeps/default", help="Sweep directory (reused to resume)")
+    parser.add_argument("--data", default="flood_preprocessed.csv")
+    parser.add_argument("--shards", default=None, help="Stream training data from this shard directory")
+    parser.add_argument("--fold", default="0.71:0.95", help="train_end:val_end of the validation split")
+    parser.add_argument("--trials", type=int, default=27, help="Trials of the successive-halving bracket")
+    parser.add_argument("--min-epochs", type=int, default=3)
+    parser.add_argument("--max-epochs", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta of the trials per rung")
+    parser.add_argument("--hyperband", action="store_true", help="Run all Hyperband brackets")
+    parser.add_argument("--objective", default="recall_flood",
+                        help="Validation metric to maximize (recall_flood, auc, ...) or best_val_loss")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads-per-worker", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from flood_lstm_training import FEATURE_COLS, LABEL_COL
+
+    data = {
+        "csv": args.data,
+        "feature_cols": FEATURE_COLS,
+        "label_col": LABEL_COL,
+        "shards": args.shards,
+        "cache": None
+    }
+    train_end, val_end = (float(value) for value in args.fold.split(":"))
+    sweep = Sweep(
+        args.dir, data, fold=(train_end, val_end), n_trials=args.trials, min_epochs=args.min_epochs,
+        max_epochs=args.max_epochs, eta=args.eta, hyperband=args.hyperband, objective=args.objective,
+        seed=args.seed
+    )
+    summary = sweep.run(workers=args.workers, threads_per_worker=args.threads_per_worker)
+
+    best = summary["best"]
+    print("\n================ SWEEP RESULT ================")
+    if best is None or "error" in best:
+        print("No trial completed")
+        return
+    print(f"Best trial : {best['trial']} ({best['epochs']} epochs)")
+    print(f"Params     : {best['params']} ({best['n_params']} weights)")
+    print(f"{args.objective:<11}: {best.get(args.objective)}")
+    print("📁 Results saved to", os.path.join(args.dir, "results.json"))
+
+
+if __name__ == "__main__":
+    main()
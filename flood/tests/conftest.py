@@ -0,0 +1,9 @@
+import os
+import sys
+
+FLOOD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Training scripts import each other by module name; backend modules are run from backend/
+for path in (FLOOD_DIR, os.path.join(FLOOD_DIR, "backend")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from acquisition import HISTORY_WATER_LEVELS, InputAcquirer, feature_water_levels
+from timeseries_store import TimeSeriesStore, station_history_key
+from utils import SOURCE_FALLBACK, SOURCE_FRESH
+
+STATION = ("Kerala", "Ernakulam", "Periyar", "Periyar")
+KEY = station_history_key(*STATION)
+
+
+class FakeScraper:
+    def __init__(self, water_data, delay=0.0):
+        self.water_data = water_data
+        self.delay = delay
+
+    async def scrape_water_level(self, state, district, basin, river):
+        await asyncio.sleep(self.delay)
+        return dict(self.water_data)
+
+    def get_fallback_data(self):
+        return {"water_levels": [1.0], "is_mock": True}
+
+
+class FakeWeather:
+    async def get_rainfall_data_with_source(self, latitude, longitude, days=7):
+        return [1.0] * days, SOURCE_FRESH
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TimeSeriesStore(tmp_path / "history.sqlite3", retention_days=0)
+    yield store
+    store.close()
+
+
+def _fetch(acquirer):
+    return asyncio.run(acquirer.fetch_water_level(*STATION))
+
+
+def test_mock_readings_are_not_recorded(store):
+    scraper = FakeScraper({"water_levels": [1.0, 2.0, 3.0, 4.0], "is_mock": True, "source": SOURCE_FRESH})
+
+    water_data, _ = _fetch(InputAcquirer(FakeWeather(), scraper, history=store))
+
+    assert store.status()["water_level_readings"] == 0
+    assert HISTORY_WATER_LEVELS not in water_data
+
+
+def test_only_latest_reading_is_recorded_at_its_timestamp(store):
+    taken = datetime.now() - timedelta(minutes=5)
+    scraper = FakeScraper({"water_levels": [1.0, 2.0, 3.0, 4.0], "timestamp": taken.isoformat(),
+                           "source": SOURCE_FRESH})
+
+    water_data, source = _fetch(InputAcquirer(FakeWeather(), scraper, history=store))
+
+    rows = store.conn.execute("SELECT ts, level FROM water_level_readings").fetchall()
+    assert rows == [(pytest.approx(taken.timestamp()), 4.0)]
+    # One day of history is not enough to replace the scraped readings
+    assert source == SOURCE_FRESH and feature_water_levels(water_data) == [1.0, 2.0, 3.0, 4.0]
+    assert water_data["water_levels"] == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_history_window_feeds_features_only(store):
+    store.record_water_level(KEY, 2.5, time.time() - 2 * 86400)
+    scraper = FakeScraper({"water_levels": [3.0, 3.2, 3.4], "source": SOURCE_FRESH})
+
+    water_data, _ = _fetch(InputAcquirer(FakeWeather(), scraper, history=store))
+
+    assert water_data[HISTORY_WATER_LEVELS] == [2.5, 3.4]
+    assert feature_water_levels(water_data) == [2.5, 3.4]
+    assert water_data["water_levels"] == [3.0, 3.2, 3.4]
+
+
+def test_cached_scrapes_are_not_recorded_again(store):
+    scraper = FakeScraper({"water_levels": [3.0], "source": "cached"})
+
+    _fetch(InputAcquirer(FakeWeather(), scraper, history=store))
+
+    assert store.status()["water_level_readings"] == 0
+
+
+def test_slow_scrape_falls_back_without_blocking_rainfall():
+    acquirer = InputAcquirer(FakeWeather(), FakeScraper({"water_levels": [3.0]}, delay=1.0),
+                             water_level_timeout=0.05)
+
+    inputs = asyncio.run(acquirer.acquire(10.0, 76.0, *STATION))
+
+    assert inputs["data_sources"] == {"rainfall": SOURCE_FRESH, "water_level": SOURCE_FALLBACK}
+    assert inputs["rainfall_data"] == [1.0] * 7
+    assert inputs["water_data"]["is_mock"]
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from acquisition import InputAcquirer
+from batch_prediction import BatchPredictionRunner
+from model_inference import FloodPredictor
+from station_index import StationIndex
+
+# Seconds each river's scrape takes; "Dry" returns no water levels
+SCRAPE_DELAYS = {"Slow": 0.3, "Fast": 0.0, "Dry": 0.0}
+
+
+class FakeWeatherAPI:
+    async def get_rainfall_batch(self, coords, days=7, with_sources=False):
+        return np.full((len(coords), days), 4.0), ["fresh"] * len(coords)
+
+
+class FakeScraper:
+    async def scrape_water_level(self, state, district, basin, river):
+        await asyncio.sleep(SCRAPE_DELAYS[river])
+        levels = [] if river == "Dry" else [48.0, 49.0, 50.5, 51.0]
+        return {"water_levels": levels, "warning_level": 50.0, "danger_level": 52.0, "source": "fresh"}
+
+    def get_fallback_data(self):
+        return {"water_levels": []}
+
+
+def _index():
+    return StationIndex(pd.DataFrame({
+        "Station Name": [f"{river} station" for river in SCRAPE_DELAYS],
+        "State name": "Kerala",
+        "District / Town": "Ernakulam",
+        "Basin Name": "Periyar",
+        "River Name": list(SCRAPE_DELAYS),
+        "Latitude": [10.0, 10.1, 10.2],
+        "longitude": [76.0, 76.1, 76.2],
+        "Type Of Site": "Level"
+    }))
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    predictor = FloodPredictor(backend="numpy")
+    assert predictor.load_model(warm_up=False)
+    return predictor
+
+
+def _runner(predictor, batch_sizes):
+    async def infer(features):
+        batch_sizes.append(len(features))
+        return predictor.predict_proba_batch(features)
+
+    return BatchPredictionRunner(predictor, InputAcquirer(FakeWeatherAPI(), FakeScraper()), infer=infer)
+
+
+def test_results_stream_as_stations_finish(predictor):
+    batch_sizes = []
+    runner = _runner(predictor, batch_sizes)
+
+    async def scenario():
+        return [result async for result in runner.run(_index().records)]
+
+    results = asyncio.run(scenario())
+
+    # The slow scrape does not hold back the others, and gets its own model pass
+    assert {result["station_info"]["river"] for result in results[:2]} == {"Fast", "Dry"}
+    assert results[-1]["station_info"]["river"] == "Slow"
+    assert batch_sizes == [1, 1]
+    by_river = {result["station_info"]["river"]: result for result in results}
+    assert by_river["Dry"]["error"] == "No water level data"
+    assert "probability" in by_river["Slow"] and "probability" in by_river["Fast"]
+
+
+def test_batch_endpoint_streams_ndjson_with_error_rows(predictor, monkeypatch):
+    monkeypatch.setenv("HISTORY_DB", "")
+    import server
+    from fastapi.testclient import TestClient
+
+    batch_sizes = []
+    monkeypatch.setattr(server, "station_index", _index())
+    monkeypatch.setattr(server, "batch_runner", _runner(predictor, batch_sizes))
+    monkeypatch.setattr(server.model_loader, "state", "ready")
+
+    # No lifespan: the endpoint only needs the patched index, runner and model state
+    response = TestClient(server.app).post("/api/predict/batch", json={"state": "Kerala"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["station_info"]["name"] for row in rows) == sorted(station["station_name"]
+                                                                        for station in _index().records)
+    errors = [row for row in rows if "error" in row]
+    assert [row["station_info"]["river"] for row in errors] == ["Dry"]
+    assert all(row["status"] and row["rainfall_data"] == [4.0] * 7 for row in rows if "error" not in row)
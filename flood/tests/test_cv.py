@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from flood_cv import (
+    THREAD_ENV_VARS, parse_folds, run_cross_validation, summarize, walk_forward_folds, worker_thread_env
+)
+
+
+def test_walk_forward_folds_cover_the_range_without_gaps():
+    folds = walk_forward_folds(3)
+
+    assert len(folds) == 3
+    assert folds[0][0] == 0.5 and folds[-1][1] == 0.95
+    for (_, val_end), (train_end, _) in zip(folds, folds[1:]):
+        assert train_end == val_end
+    assert all(train_end < val_end for train_end, val_end in folds)
+    assert walk_forward_folds(1, 0.6, 0.8) == [(0.6, 0.8)]
+
+
+def test_parse_folds_rejects_invalid_bounds():
+    assert parse_folds("0.5:0.71,0.71:0.95") == [(0.5, 0.71), (0.71, 0.95)]
+    with pytest.raises(ValueError):
+        parse_folds("0.7:0.5")
+    with pytest.raises(ValueError):
+        parse_folds("0.5:1.2")
+
+
+def test_summarize_averages_completed_folds_only():
+    folds = [
+        {"fold": 1, "accuracy": 0.8, "recall_flood": 0.5, "precision_flood": 0.4, "auc": None,
+         "best_val_loss": 0.3, "epochs_trained": 4},
+        {"fold": 2, "error": "out of memory"},
+        {"fold": 3, "accuracy": 0.6, "recall_flood": 0.7, "precision_flood": 0.2, "auc": 0.9,
+         "best_val_loss": 0.5, "epochs_trained": 6},
+    ]
+    summary = summarize(folds)
+
+    assert summary["folds_completed"] == 2 and summary["folds_failed"] == 1
+    assert summary["accuracy"] == pytest.approx(0.7)
+    assert summary["auc"] == pytest.approx(0.9)
+    assert summary["epochs_trained"] == pytest.approx(5.0)
+
+
+def test_spawned_workers_start_with_thread_limits():
+    before = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    ctx = multiprocessing.get_context("spawn")
+    with worker_thread_env(3), ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        values = [pool.submit(os.getenv, var).result() for var in THREAD_ENV_VARS]
+
+    assert values == ["3"] * len(THREAD_ENV_VARS)
+    assert {var: os.environ.get(var) for var in THREAD_ENV_VARS} == before
+
+
+def test_process_pool_returns_folds_in_order(tmp_path):
+    pytest.importorskip("tensorflow")
+    rng = np.random.default_rng(0)
+    n = 240
+    df = pd.DataFrame({"rain": rng.random(n), "level": rng.random(n)})
+    df["flood"] = (df["rain"] + df["level"] > 1.2).astype(int)
+    csv = tmp_path / "data.csv"
+    df.to_csv(csv, index=False)
+    data = {"csv": str(csv), "feature_cols": ["rain", "level"], "label_col": "flood"}
+    folds = walk_forward_folds(3)
+
+    results = run_cross_validation(folds, data, training={"epochs": 1, "patience": 1}, workers=2,
+                                   threads_per_worker=1, results_path=str(tmp_path / "cv.json"))
+
+    assert [fold["fold"] for fold in results["folds"]] == [1, 2, 3]
+    assert [(fold["train_end"], fold["val_end"]) for fold in results["folds"]] == folds
+    assert all("error" not in fold and fold["pid"] != os.getpid() for fold in results["folds"])
+    # Later folds train on more data
+    train_samples = [fold["train_samples"] for fold in results["folds"]]
+    assert train_samples == sorted(train_samples)
+    assert results["summary"]["folds_completed"] == 3
+    assert results["summary"]["accuracy"] == pytest.approx(
+        np.mean([fold["accuracy"] for fold in results["folds"]]))
+    assert (tmp_path / "cv.json").exists()
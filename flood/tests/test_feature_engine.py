@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from feature_engine import (
+    TIME_STEPS, build_features, normalize_water_level_banded, pad_rainfall, pad_water_levels
+)
+
+
+def _normalize_reference(level, warning_level, danger_level):
+    # Scalar banded normalization the vectorized version replaced
+    if level <= warning_level:
+        if warning_level <= 0:
+            return 0.0
+        normalized = (level / warning_level) * 0.7
+    else:
+        danger_range = danger_level - warning_level
+        if danger_range <= 0:
+            return 0.7
+        normalized = 0.7 + ((level - warning_level) / danger_range) * 0.3
+    return min(normalized, 0.95)
+
+
+def _features_reference(rainfall_data, water_levels, warning_level, danger_level):
+    # Per-day feature loop build_features replaced (unscaled)
+    if len(rainfall_data) < 7:
+        rainfall_data = [0] * (7 - len(rainfall_data)) + rainfall_data
+    rainfall_data = rainfall_data[-7:]
+    if len(water_levels) < 4:
+        water_levels = water_levels + [water_levels[-1]] * (4 - len(water_levels))
+    water_levels = water_levels + [water_levels[-1]] * (7 - len(water_levels))
+    water_levels = water_levels[-7:]
+
+    features = []
+    for i in range(7):
+        rain_3day_sum = sum(rainfall_data[max(0, i - 2):i + 1])
+        rain_7day_sum = sum(rainfall_data[:i + 1])
+        rain_3day_avg = rain_3day_sum / min(3, i + 1)
+        max_normalized = _normalize_reference(max(water_levels[:i + 1]), warning_level, danger_level) * 0.9
+        avg_normalized = _normalize_reference(np.mean(water_levels[:i + 1]), warning_level, danger_level) * 0.9
+        if i > 0:
+            max_rise = max(water_levels[j] - water_levels[j - 1] for j in range(1, i + 1))
+        else:
+            max_rise = 0
+        max_rise = min(max(0, max_rise), 10.0)
+        features.append([rain_3day_sum, rain_7day_sum, rain_3day_avg, max_normalized, avg_normalized, max_rise])
+    return np.array(features)
+
+
+def _random_station(rng):
+    rainfall = rng.gamma(0.8, 20.0, rng.integers(1, 10)).tolist()
+    warning_level = float(rng.choice([rng.uniform(1, 100), 0.0, -rng.uniform(0, 10)]))
+    danger_level = float(rng.choice([warning_level + rng.uniform(0.5, 5), warning_level, warning_level - 1.0]))
+    water_levels = (warning_level + rng.normal(0, 3, rng.integers(1, 10)).cumsum()).tolist()
+    return rainfall, water_levels, warning_level, danger_level
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_build_features_matches_per_day_loop(seed):
+    rng = np.random.default_rng(seed)
+    rainfall, water_levels, warning_level, danger_level = _random_station(rng)
+
+    features = build_features(pad_rainfall(rainfall), pad_water_levels(water_levels), warning_level, danger_level)
+
+    assert features.shape == (TIME_STEPS, 6)
+    np.testing.assert_array_equal(features, _features_reference(rainfall, water_levels, warning_level, danger_level))
+
+
+def test_build_features_batch_matches_single_stations():
+    rng = np.random.default_rng(42)
+    stations = [_random_station(rng) for _ in range(50)]
+
+    features = build_features(
+        np.stack([pad_rainfall(rainfall) for rainfall, _, _, _ in stations]),
+        np.stack([pad_water_levels(levels) for _, levels, _, _ in stations]),
+        [warning for _, _, warning, _ in stations],
+        [danger for _, _, _, danger in stations]
+    )
+
+    assert features.shape == (len(stations), TIME_STEPS, 6)
+    for row, station in zip(features, stations):
+        np.testing.assert_array_equal(row, _features_reference(*station))
+
+
+@pytest.mark.parametrize("warning_level, danger_level", [
+    (0.0, 5.0), (-2.0, 3.0), (4.0, 4.0), (4.0, 2.0), (-3.0, -5.0), (0.0, 0.0)
+])
+def test_normalize_degenerate_thresholds(warning_level, danger_level):
+    levels = np.array([-10.0, -3.0, -2.0, 0.0, 1.5, 4.0, 4.5, 100.0])
+
+    normalized = normalize_water_level_banded(levels, warning_level, danger_level)
+
+    expected = [_normalize_reference(level, warning_level, danger_level) for level in levels]
+    np.testing.assert_array_equal(normalized, expected)
+
+
+def test_normalize_keeps_nan_readings():
+    normalized = normalize_water_level_banded([[np.nan, 2.0], [6.0, np.nan]], [4.0, 4.0], [8.0, 8.0])
+
+    np.testing.assert_array_equal(np.isnan(normalized), [[True, False], [False, True]])
+    np.testing.assert_allclose(normalized[[0, 1], [1, 0]], [0.35, 0.85])
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from feature_engine import build_features, pad_rainfall, pad_water_levels
+from feature_state import StationFeatureState, stack_state_features
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_state_matches_build_features_after_updates(seed):
+    rng = np.random.default_rng(seed)
+    warning_level = float(rng.choice([rng.uniform(1, 50), 0.0, -2.0]))
+    danger_level = float(rng.choice([warning_level + rng.uniform(0.5, 5), warning_level]))
+    rainfall, levels = [], []
+    state = StationFeatureState(warning_level, danger_level)
+
+    for _ in range(25):
+        new_day = not levels or rng.random() < 0.7
+        level = float(warning_level + rng.normal(0, 3))
+        rain = float(rng.gamma(0.8, 20.0))
+        state.add_water_level(level, new_day=new_day)
+        state.add_rainfall(rain, new_day=new_day or not rainfall)
+        if new_day or not levels:
+            levels.append(level)
+        else:
+            levels[-1] = level
+        if new_day or not rainfall:
+            rainfall.append(rain)
+        else:
+            rainfall[-1] = rain
+
+        expected = build_features(pad_rainfall(rainfall), pad_water_levels(levels), warning_level, danger_level)
+        np.testing.assert_array_equal(state.features(), expected)
+
+
+def test_set_thresholds_renormalizes_levels():
+    state = StationFeatureState(4.0, 8.0, rainfall=[1.0, 2.0], water_levels=[3.0, 5.0, 9.0])
+    state.set_thresholds(6.0, 7.0)
+
+    expected = build_features(pad_rainfall([1.0, 2.0]), pad_water_levels([3.0, 5.0, 9.0]), 6.0, 7.0)
+    np.testing.assert_array_equal(stack_state_features([state])[0], expected)
@@ -0,0 +1,40 @@
+import asyncio
+
+import numpy as np
+
+from inference_batcher import InferenceBatcher
+from model_inference import FloodPredictor
+
+
+def _requests(n):
+    rng = np.random.default_rng(1)
+    return [
+        (list(rng.random(7) * 40), list(45 + rng.random(7) * 10), 50.0, 55.0)
+        for _ in range(n)
+    ]
+
+
+def test_concurrent_predictions_share_one_batch():
+    predictor = FloodPredictor(backend="numpy")
+    assert predictor.load_model(warm_up=False)
+    requests = _requests(6)
+    expected = [predictor.predict(*request) for request in requests]
+
+    batch_sizes = []
+
+    async def infer(features):
+        batch_sizes.append(len(features))
+        return predictor.predict_proba_batch(features)
+
+    async def scenario():
+        batcher = InferenceBatcher(predictor, max_batch_size=32, max_wait_ms=50, infer=infer)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*[batcher.predict(*request) for request in requests])
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+
+    assert batch_sizes == [6]
+    assert results == expected
@@ -0,0 +1,52 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from inference_pool import InferencePool, WorkerCrashed
+from model_inference import FloodPredictor
+
+
+def _features(n):
+    rng = np.random.default_rng(0)
+    return rng.random((n, 7, 6))
+
+
+def test_workers_predict_and_crashed_workers_are_restarted():
+    predictor = FloodPredictor(backend="numpy")
+    assert predictor.load_model(warm_up=False)
+    features = _features(5)
+    expected = predictor.predict_proba_batch(features)
+
+    async def scenario():
+        pool = InferencePool(n_workers=1, backend="numpy", max_batch=4, health_interval=3600)
+        await pool.start()
+        try:
+            # Split across two max_batch chunks and concatenated in order
+            np.testing.assert_allclose(await pool.predict_proba_batch(features), expected)
+
+            worker = pool.workers[0]
+            old_pid = worker.process.pid
+            worker.process.kill()
+            worker.process.join()
+
+            with pytest.raises(WorkerCrashed):
+                await pool.predict_proba_batch(features[:1])
+            assert worker.restarts == 1
+            assert worker.is_alive() and worker.process.pid != old_pid
+            np.testing.assert_allclose(await pool.predict_proba_batch(features), expected)
+        finally:
+            await pool.stop()
+        assert pool.workers == []
+
+    asyncio.run(scenario())
+
+
+def test_failed_start_releases_workers():
+    async def scenario():
+        pool = InferencePool(n_workers=2, backend="numpy", startup_timeout=0.0)
+        with pytest.raises(WorkerCrashed):
+            await pool.start()
+        assert pool.workers == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from numpy_lstm import DEFAULT_TOLERANCE, NumpyLSTMModel, export_keras_model
+
+tf = pytest.importorskip("tensorflow")
+
+
+@pytest.mark.parametrize("lstm_units, dense_units", [((8, 4), 4), ((6,), 0)])
+def test_numpy_runtime_matches_keras(tmp_path, lstm_units, dense_units):
+    from flood_model import build_lstm_model
+
+    tf.keras.utils.set_random_seed(0)
+    model = build_lstm_model(7, 6, lstm_units=lstm_units, dense_units=dense_units)
+    # Random weights everywhere (biases and norm parameters start at 0/1 otherwise)
+    rng = np.random.default_rng(0)
+    model.set_weights([rng.normal(0, 0.5, weight.shape).astype(np.float32) for weight in model.get_weights()])
+
+    path = tmp_path / "model.npz"
+    export_keras_model(model, path)
+    numpy_model = NumpyLSTMModel.load(path)
+
+    x = rng.uniform(0.0, 1.0, size=(64, 7, 6)).astype(np.float32)
+    expected = model.predict(x, verbose=0)
+    actual = numpy_model.predict(x)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=DEFAULT_TOLERANCE)
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from risk_scheduler import RiskScheduler, RiskTable, station_key
+
+
+def _station(river):
+    return {"station_name": f"{river} station", "state": "Kerala", "district": "Ernakulam",
+            "basin": "Periyar", "river": river}
+
+
+def _result(station, rainfall_source="fresh", **values):
+    return {"station_info": {key: station[key] for key in ("state", "district", "basin", "river")},
+            "data_sources": {"rainfall": rainfall_source, "water_level": "fresh"}, **values}
+
+
+class FakeRunner:
+    """Batch runner answering every station, with fallback/error rows for chosen rivers"""
+    def __init__(self, fallback=(), errors=()):
+        self.fallback = set(fallback)
+        self.errors = set(errors)
+        self.runs = []
+
+    async def run(self, stations):
+        self.runs.append([station["river"] for station in stations])
+        for station in stations:
+            if station["river"] in self.errors:
+                yield {"station_info": _result(station)["station_info"], "error": "No water level data"}
+            else:
+                source = "fallback" if station["river"] in self.fallback else "fresh"
+                yield _result(station, source, probability=0.5, run=len(self.runs))
+
+
+def test_table_serves_entries_younger_than_max_age():
+    table = RiskTable()
+    table.put("fresh", {"probability": 0.1})
+    table.put("old", {"probability": 0.9}, computed_at=time.time() - 120)
+
+    assert table.get("fresh", max_age=60)[0] == {"probability": 0.1}
+    assert table.get("old", max_age=60) is None
+    assert table.get("old", max_age=300)[0] == {"probability": 0.9}
+    assert table.get("missing", max_age=300) is None
+    assert (table.hits, table.misses) == (2, 2)
+
+
+def test_refresh_stores_only_real_predictions():
+    stations = [_station(river) for river in ("a", "b", "c")]
+    scheduler = RiskScheduler(FakeRunner(fallback={"b"}, errors={"c"}), lambda: stations)
+
+    asyncio.run(scheduler.refresh())
+
+    assert len(scheduler.table) == 1
+    assert scheduler.table.get(station_key("Kerala", "Ernakulam", "Periyar", "a"), max_age=60) is not None
+    assert scheduler.table.get(station_key("Kerala", "Ernakulam", "Periyar", "b"), max_age=60) is None
+    assert scheduler.status()["last_refresh_stations"] == 1
+
+
+def test_each_run_rereads_the_station_list_and_replaces_entries():
+    stations = [_station("a")]
+    runner = FakeRunner()
+    scheduler = RiskScheduler(runner, lambda: list(stations), interval=0.01)
+
+    async def scenario():
+        await scheduler.start()
+        while len(runner.runs) < 1:
+            await asyncio.sleep(0.005)
+        stations.append(_station("b"))
+        while len(runner.runs) < 3:
+            await asyncio.sleep(0.005)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+    assert runner.runs[0] == ["a"] and runner.runs[-1] == ["a", "b"]
+    result, _ = scheduler.table.get(station_key("Kerala", "Ernakulam", "Periyar", "a"), max_age=60)
+    assert result["run"] == len(runner.runs)
+    assert scheduler._task is None
+
+
+def test_non_positive_interval_disables_the_loop():
+    scheduler = RiskScheduler(FakeRunner(), lambda: [], interval=0)
+
+    async def scenario():
+        await scheduler.start()
+        return scheduler._task
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from scraper import RIVER_NGRAM, MockDataProvider
+
+RIVERS = ["Bhavani", "Periyar", "Periyaodai", None, "Ganga", "Ram Ganga", "Ganga", "Ib"]
+
+
+@pytest.fixture
+def provider(tmp_path):
+    path = tmp_path / "mock_water_levels.csv"
+    pd.DataFrame({
+        "station_name": [f"station {i}" for i in range(len(RIVERS))],
+        "state": "Kerala", "district": "Ernakulam", "basin": "Periyar",
+        "river": RIVERS,
+        "latitude": 10.0, "longitude": 76.0,
+        "water_level_4": 1.0, "water_level_3": 1.0, "water_level_2": 1.0, "water_level_1": 1.0,
+        "warning_level": 2.0, "danger_level": 3.0, "hfl_level": 4.0
+    }).to_csv(path, index=False)
+    return MockDataProvider(str(path), match_cache_size=4)
+
+
+def _scan(query):
+    """First record whose river name contains query (the lookup the index replaced)"""
+    return next((i for i, river in enumerate(RIVERS) if isinstance(river, str) and query in river.lower()), None)
+
+
+@pytest.mark.parametrize("query", [
+    # Shorter than RIVER_NGRAM: every river is scanned
+    "", "i", "b", "ga", "ri", "zz",
+    # Indexed n-gram lookups
+    "gan", "ganga", "ram ganga", "periya", "periyaodai", "bhavani",
+    # No river contains them (unknown n-gram, or every n-gram known but not contiguous)
+    "zzz", "xyzzy", "gangan", "ganperi", "nan"
+])
+def test_match_river_agrees_with_a_scan(provider, query):
+    assert provider._match_river(query) == _scan(query)
+
+
+def test_short_queries_fall_back_to_a_scan(provider):
+    assert len("ib") < RIVER_NGRAM
+    # "ib" is too short to have an n-gram, but still matches the two-letter river
+    assert provider._match_river("ib") == RIVERS.index("Ib")
+    assert provider._match_river("i") == 0
+
+
+def test_misses_are_cached_and_the_cache_is_bounded(provider):
+    assert provider._match_river("zzz") is None
+    assert list(provider._match_cache) == ["zzz"]
+
+    for query in ("gan", "per", "bha", "ram"):
+        provider._match_river(query)
+    assert len(provider._match_cache) == 4
+    assert "zzz" not in provider._match_cache
+    # Cached answers are the same as fresh ones
+    assert provider._match_river("gan") == _scan("gan")
+
+
+def test_unknown_river_falls_back_to_the_first_station(provider):
+    station = provider._find_station("Kerala", "Ernakulam", "Periyar", "Not a river")
+    assert station["station_name"] == "station 0"
+    station = provider._find_station("Kerala", "Ernakulam", "Periyar", "Ganga")
+    assert station["station_name"] == f"station {RIVERS.index('Ganga')}"
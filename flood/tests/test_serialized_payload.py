@@ -0,0 +1,34 @@
+import pytest
+
+from serialized_payload import SerializedPayload, brotli
+
+
+@pytest.fixture(scope="module")
+def payload():
+    return SerializedPayload({"stations": [{"name": f"Station {i}"} for i in range(100)]})
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", "identity"),
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("deflate", "identity"),
+    ("gzip;q=0.5, identity;q=1", "identity"),
+    ("identity;q=0.2, gzip;q=0.8", "gzip"),
+    ("GZIP; Q=0.7", "gzip"),
+    ("*;q=0.1", "br" if brotli else "gzip"),
+])
+def test_choose_encoding(payload, accept_encoding, expected):
+    assert payload._choose_encoding(accept_encoding) == expected
+
+
+def test_choose_encoding_prefers_highest_quality():
+    payload = SerializedPayload.__new__(SerializedPayload)
+    payload.representations = {"identity": (b"", '"a"'), "gzip": (b"", '"b"'), "br": (b"", '"c"')}
+
+    assert payload._choose_encoding("br;q=0.5, gzip;q=0.9") == "gzip"
+    assert payload._choose_encoding("gzip;q=0.9, br;q=0.9") == "br"
+    assert payload._choose_encoding("gzip, br") == "br"
+    assert payload._choose_encoding("br;q=0, *") == "gzip"
+    assert payload._choose_encoding("br;q=0.3, gzip;q=0.2, identity;q=0.4") == "identity"
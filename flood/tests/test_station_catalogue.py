@@ -0,0 +1,35 @@
+import os
+import shutil
+
+import pandas as pd
+
+from station_catalogue import build_catalogue, load_catalogue, read_stations_excel
+
+FLOOD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIONS_FILE = os.path.join(FLOOD_DIR, "backend", "stations.xlsx")
+
+
+def test_catalogue_round_trips_the_excel_file(tmp_path):
+    source = tmp_path / "stations.xlsx"
+    shutil.copy(STATIONS_FILE, source)
+
+    assert load_catalogue(source) is None
+    build_catalogue(source)
+    cached = load_catalogue(source)
+
+    pd.testing.assert_frame_equal(cached, read_stations_excel(source))
+
+
+def test_changed_source_invalidates_the_catalogue(tmp_path):
+    source = tmp_path / "stations.xlsx"
+    shutil.copy(STATIONS_FILE, source)
+    build_catalogue(source)
+
+    # Same content with a new mtime is still valid
+    os.utime(source, (1, 1))
+    assert load_catalogue(source) is not None
+
+    df = read_stations_excel(source)
+    df.loc[0, "River Name"] = "Renamed"
+    df.to_excel(source, index=False)
+    assert load_catalogue(source) is None
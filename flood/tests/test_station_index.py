@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from station_catalogue import read_stations_excel
+from station_index import StationIndex
+
+FLOOD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIONS_FILE = os.path.join(FLOOD_DIR, "backend", "stations.xlsx")
+
+
+@pytest.fixture(scope="module")
+def stations_df():
+    return read_stations_excel(STATIONS_FILE)
+
+
+@pytest.fixture(scope="module")
+def index(stations_df):
+    return StationIndex(stations_df)
+
+
+def _scan_station(df, state, river):
+    """The DataFrame scan /api/predict used before the index"""
+    rows = df[(df['State name'] == state) & (df['River Name'] == river)]
+    return None if rows.empty else rows.iloc[0]
+
+
+def _scan_filter_options(df, state=None, district=None, basin=None):
+    """The DataFrame filtering /api/stations/filters used before the index"""
+    if state:
+        df = df[df['State name'] == state]
+    if district:
+        df = df[df['District / Town'] == district]
+    if basin:
+        df = df[df['Basin Name'] == basin]
+    return {
+        "districts": sorted(df['District / Town'].unique().tolist()) if state else [],
+        "basins": sorted(df['Basin Name'].unique().tolist()) if district else [],
+        "rivers": sorted(df['River Name'].unique().tolist()) if basin else [],
+        "stations": df['Station Name'].unique().tolist()
+    }
+
+
+def test_find_station_matches_the_scan(stations_df, index):
+    pairs = stations_df[['State name', 'River Name']].drop_duplicates().itertuples(index=False)
+    for state, river in [*pairs, ("Kerala", "No such river"), ("No such state", "")]:
+        expected = _scan_station(stations_df, state, river)
+        station = index.find_station(state, river)
+        if expected is None:
+            assert station is None
+        else:
+            assert station["station_name"] == expected['Station Name']
+            assert (station["district"], station["basin"]) == (expected['District / Town'], expected['Basin Name'])
+
+
+def test_filter_options_match_the_scan(stations_df, index):
+    groups = stations_df[['State name', 'District / Town', 'Basin Name']].drop_duplicates()
+    selections = [(None, None, None), ("No such state", None, None)]
+    for state, district, basin in groups.itertuples(index=False):
+        selections += [(state, None, None), (state, district, None), (state, district, basin)]
+
+    for selection in dict.fromkeys(selections):
+        assert index.get_filter_options(*selection) == _scan_filter_options(stations_df, *selection), selection
+
+
+def test_station_list_matches_the_scan(stations_df, index):
+    valid = stations_df[stations_df['Latitude'].notna() & stations_df['longitude'].notna()]
+
+    assert index.states == sorted(stations_df['State name'].unique().tolist())
+    assert [station["station_name"] for station in index.stations] == valid['Station Name'].tolist()
+    assert len(index) == len(stations_df)
+    assert [station["latitude"] for station in index.stations] == valid['Latitude'].astype(float).tolist()
@@ -0,0 +1,33 @@
+import pytest
+
+from stream_scoring import ContinuousScorer, UnknownStation
+
+
+def _reading(river, **values):
+    return {"state": "Kerala", "district": "Ernakulam", "basin": "Periyar", "river": river, **values}
+
+
+def test_unknown_stations_are_rejected():
+    known = {("Kerala", "Ernakulam", "Periyar", "Periyar")}
+    scorer = ContinuousScorer(predictor=None, known_station=lambda key: key in known)
+
+    assert scorer.ingest(_reading("Periyar", water_level=51.0))
+    with pytest.raises(UnknownStation):
+        scorer.ingest(_reading("Not a river", water_level=51.0))
+
+    assert list(scorer.states) == [("Kerala", "Ernakulam", "Periyar", "Periyar")]
+    assert scorer.status()["rejected"] == 1
+
+
+def test_states_are_capped_least_recently_updated_first():
+    scorer = ContinuousScorer(predictor=None, max_stations=3)
+
+    for river in ("a", "b", "c"):
+        scorer.ingest(_reading(river, water_level=1.0))
+    scorer.ingest(_reading("a", water_level=2.0))
+    scorer.ingest(_reading("d", water_level=1.0))
+
+    assert [key[3] for key in scorer.states] == ["c", "a", "d"]
+    assert set(scorer.stations) == set(scorer.states)
+    assert set(scorer._dirty) <= set(scorer.states)
+    assert scorer.status()["evicted"] == 1
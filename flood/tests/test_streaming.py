@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from flood_sequences import TIME_STEPS, SequenceWindows, create_sequences, sequence_dataset
+from flood_streaming import label_counts, make_dataset, write_shards
+
+FEATURE_COLS = ["f0", "f1", "f2"]
+SPLITS = [(0.0, 1.0), (0.0, 0.5), (0.5, 0.71), (0.71, 0.95)]
+
+
+def _frame(n_rows, seed=0, station=None):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_rows, len(FEATURE_COLS))).astype(np.float32), columns=FEATURE_COLS)
+    df["label"] = rng.integers(0, 2, n_rows)
+    df["day"] = np.arange(n_rows)
+    if station is not None:
+        df["station"] = station
+    return df
+
+
+def _collect(dataset):
+    X, y = zip(*((X_batch.numpy(), y_batch.numpy()) for X_batch, y_batch in dataset))
+    return np.concatenate(X), np.concatenate(y)
+
+
+@pytest.mark.parametrize("start, end", SPLITS)
+def test_single_station_matches_create_sequences(tmp_path, start, end):
+    df = _frame(500)
+    write_shards(df, tmp_path, FEATURE_COLS, "label", rows_per_shard=100)
+    X_seq, y_seq = create_sequences(df[FEATURE_COLS].to_numpy(dtype=np.float32), df["label"].to_numpy(), TIME_STEPS)
+    lo, hi = int(start * len(X_seq)), int(end * len(X_seq))
+
+    X, y = _collect(make_dataset(tmp_path, start, end, batch_size=16))
+
+    np.testing.assert_array_equal(X, X_seq[lo:hi])
+    np.testing.assert_array_equal(y, y_seq[lo:hi])
+    np.testing.assert_array_equal(label_counts(tmp_path, start, end), np.bincount(y_seq[lo:hi], minlength=2))
+
+
+@pytest.mark.parametrize("start, end", SPLITS)
+def test_multi_station_keeps_each_station_in_order(tmp_path, start, end):
+    df = pd.concat([_frame(n, seed, station) for seed, (station, n) in enumerate([("a", 500), ("b", 230), ("c", 90)])])
+    write_shards(df, tmp_path, FEATURE_COLS, "label", group_col="station", time_col="day", rows_per_shard=100)
+    windows = SequenceWindows.from_frame(df, FEATURE_COLS, "label", group_col="station", time_col="day")
+    expected = windows.split(start, end)
+    expected_stations = windows.groups[expected.starts]
+
+    X, y = _collect(make_dataset(tmp_path, start, end, batch_size=8, cycle_length=2))
+
+    assert len(X) == len(expected)
+    # Stations are interleaved, but each one's sequences must come out in time order
+    station_of = {tuple(windows.windows[s][0]): windows.groups[s] for s in expected.starts}
+    stations = np.array([station_of[tuple(x[0])] for x in X])
+    for station in np.unique(expected_stations):
+        X_expected, y_expected = expected.subset(expected_stations == station).arrays()
+        np.testing.assert_array_equal(X[stations == station], X_expected)
+        np.testing.assert_array_equal(y[stations == station], y_expected)
+
+
+def test_sequence_dataset_batches_views_and_windows_in_order():
+    df = pd.concat([_frame(n, seed, station) for seed, (station, n) in enumerate([("a", 60), ("b", 45)])])
+    X_seq, y_seq = create_sequences(df[FEATURE_COLS].to_numpy(dtype=np.float32), df["label"].to_numpy(), TIME_STEPS)
+    windows = SequenceWindows.from_frame(df, FEATURE_COLS, "label", group_col="station", time_col="day")
+
+    dataset = sequence_dataset(X_seq, y_seq, batch_size=16)
+    assert dataset.cardinality().numpy() == -(-len(X_seq) // 16)
+    X, y = _collect(dataset)
+    np.testing.assert_array_equal(X, X_seq)
+    np.testing.assert_array_equal(y, y_seq)
+
+    X, y = _collect(sequence_dataset(windows, batch_size=16))
+    X_expected, y_expected = windows[:]
+    np.testing.assert_array_equal(X, X_expected)
+    np.testing.assert_array_equal(y, y_expected)
@@ -0,0 +1,60 @@
+import json
+import os
+
+import flood_sweep
+from flood_sweep import Sweep, _checkpoint_path
+
+DATA = {"csv": "unused.csv", "feature_cols": ["a"], "label_col": "y", "shards": None, "cache": None}
+
+
+class InlinePool:
+    """ProcessPoolExecutor stand-in running submitted calls immediately"""
+    class Future:
+        def __init__(self, result):
+            self._result = result
+
+        def result(self):
+            return self._result
+
+    def submit(self, fn, *args):
+        return self.Future(fn(*args))
+
+
+def _fake_trials(monkeypatch, failing=()):
+    """run_trial replacement: writes a checkpoint, scores trials by their index"""
+    calls = []
+
+    def run_trial(trial_id, params, epochs, initial_epoch, data, fold, training, sweep_dir):
+        calls.append((trial_id, epochs, initial_epoch))
+        if (trial_id, epochs) in failing:
+            raise RuntimeError("boom")
+        open(_checkpoint_path(sweep_dir, trial_id, epochs), "w").close()
+        return {"trial": trial_id, "params": params, "epochs": epochs, "n_params": 10,
+                "recall_flood": int(trial_id[-3:]) / 100}
+
+    monkeypatch.setattr(flood_sweep, "run_trial", run_trial)
+    monkeypatch.setattr(flood_sweep, "as_completed", lambda futures: futures)
+    return calls
+
+
+def test_errored_trials_are_not_promoted_and_checkpoints_are_pruned(tmp_path, monkeypatch):
+    # t008 (the best) fails at the first rung and must not continue
+    calls = _fake_trials(monkeypatch, failing={("b0-t008", 1)})
+    sweep = Sweep(str(tmp_path), DATA, n_trials=9, min_epochs=1, max_epochs=9, eta=3)
+
+    for bracket_id, configs, first_budget in sweep.brackets():
+        sweep._run_bracket(InlinePool(), bracket_id, configs, first_budget)
+
+    assert [trial for trial, epochs, _ in calls if epochs == 3] == ["b0-t007", "b0-t006", "b0-t005"]
+    assert [(trial, initial) for trial, epochs, initial in calls if epochs == 9] == [("b0-t007", 3)]
+    assert os.listdir(tmp_path / "models") == ["b0-t007-e9.keras"]
+
+
+def test_resume_warns_about_changed_settings(tmp_path, caplog):
+    Sweep(str(tmp_path), DATA, n_trials=9, eta=3)
+
+    resumed = Sweep(str(tmp_path), DATA, n_trials=12, eta=2)
+
+    assert "eta, n_trials differ" in caplog.text
+    assert resumed.config == json.loads((tmp_path / "sweep.json").read_text())
+    assert (resumed.config["n_trials"], resumed.config["eta"]) == (9, 3)
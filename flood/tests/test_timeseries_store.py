@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+
+from timeseries_store import STATION_TZ, TimeSeriesStore, _day
+
+
+def _ts(text):
+    return datetime.fromisoformat(text).replace(tzinfo=STATION_TZ).timestamp()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TimeSeriesStore(tmp_path / "history.sqlite3", retention_days=0)
+    yield store
+    store.close()
+
+
+def test_days_are_indian_days():
+    # 20:00 UTC is already the next day in India
+    assert _day(datetime.fromisoformat("2026-10-16T20:00:00+00:00").timestamp()) == "2026-10-17"
+    assert _day(_ts("2026-10-17T00:10:00")) == "2026-10-17"
+
+
+def test_only_recorded_readings_are_stored(store):
+    assert store.record_water_level("s", 10.0, _ts("2026-10-17T09:00:00"))
+    assert not store.record_water_level("s", 11.0, _ts("2026-10-17T09:00:00"))
+
+    assert store.status()["water_level_readings"] == 1
+    assert store.water_level_window("s", 7, now=_ts("2026-10-17T12:00:00")) == [10.0]
+
+
+def test_window_takes_latest_reading_of_each_day(store):
+    for text, level in [("2026-10-10T08:00:00", 1.0), ("2026-10-15T08:00:00", 2.0),
+                        ("2026-10-15T20:00:00", 3.0), ("2026-10-17T01:00:00", 4.0),
+                        ("2026-10-17T00:30:00", 5.0)]:
+        store.record_water_level("s", level, _ts(text))
+    store.record_water_level("other", 9.0, _ts("2026-10-16T08:00:00"))
+
+    # 2026-10-10 is outside the 7-day window ending 2026-10-17; days without readings are skipped
+    assert store.water_level_window("s", 7, now=_ts("2026-10-17T12:00:00")) == [3.0, 4.0]
+
+
+def test_rainfall_window_needs_final_past_days_and_recent_today(store):
+    now = _ts("2026-10-17T12:00:00")
+    store.record_rainfall("loc", [1.0, 2.0, 3.0], now=_ts("2026-10-16T12:00:00"))
+
+    # Yesterday was recorded before it ended, so the window is incomplete
+    assert store.rainfall_window("loc", 3, max_age=900, now=now) is None
+
+    store.record_rainfall("loc", [2.0, 3.5, 4.0], now=now)
+    assert store.rainfall_window("loc", 3, max_age=900, now=now) == [2.0, 3.5, 4.0]
+    assert store.rainfall_window("loc", 3, max_age=900, now=now + 1000) is None
@@ -0,0 +1,61 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from model_inference import FloodPredictor
+from startup import STATE_FAILED, STATE_READY, ModelLoader
+
+
+def test_warm_up_runs_one_pass_per_configured_batch_size(monkeypatch):
+    monkeypatch.setenv("MODEL_WARMUP_BATCH_SIZES", "1, 4,16")
+    predictor = FloodPredictor(backend="numpy")
+    assert predictor.warmup_batch_sizes == (1, 4, 16)
+
+    assert predictor.load_model(warm_up=False)
+    assert predictor.warmup_ms == {}
+
+    assert set(predictor.warm_up()) == {1, 4, 16}
+    assert set(predictor.warm_up((2,))) == {2}
+    assert all(ms >= 0 for ms in predictor.warmup_ms.values())
+
+
+def test_keras_warm_up_traces_once_for_every_batch_size():
+    pytest.importorskip("tensorflow")
+    predictor = FloodPredictor(backend="keras")
+    assert predictor.load_model()
+    assert set(predictor.warmup_ms) == set(predictor.warmup_batch_sizes)
+
+    probabilities = predictor.predict_proba_batch(np.zeros((5, 7, 6)))
+
+    assert probabilities.shape == (5,)
+    assert predictor.infer_fn.experimental_get_tracing_count() == 1
+
+
+def test_model_loader_reports_ready_with_timings():
+    loader = ModelLoader(FloodPredictor(backend="numpy", load_scaler=False))
+
+    async def scenario():
+        loader.start()
+        return await loader.wait_ready(timeout=60)
+
+    assert asyncio.run(scenario())
+    status = loader.status()
+    assert status["state"] == STATE_READY and status["ready"]
+    assert set(status["warmup_ms"]) == set(loader.predictor.warmup_batch_sizes)
+    assert {"scaler load", "model load", "model warm-up"} <= set(status["startup_ms"])
+
+
+def test_model_loader_reports_failed_load(tmp_path):
+    predictor = FloodPredictor(backend="numpy", load_scaler=False)
+    predictor.weights_path = tmp_path / "missing.npz"
+    loader = ModelLoader(predictor)
+
+    async def scenario():
+        loader.start()
+        return await loader.wait_ready(timeout=60)
+
+    assert not asyncio.run(scenario())
+    assert loader.state == STATE_FAILED
+    assert loader.error == "Model could not be loaded"
+    assert "model warm-up" not in loader.status()["startup_ms"]
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from scraper import MockWaterLevelSource, RiverDataScraper
+from utils import SOURCE_CACHED, SOURCE_FRESH
+from water_sources import WaterLevelSource
+
+
+class CountingSource(WaterLevelSource):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch(self, state, district, basin, river):
+        self.calls += 1
+        return {"station_name": river, "water_levels": [float(self.calls)]}
+
+
+def test_water_level_source_requires_fetch():
+    class Incomplete(WaterLevelSource):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_cacheable_source_is_cached():
+    source = CountingSource()
+    scraper = RiverDataScraper(source)
+
+    async def scrape_twice():
+        return [await scraper.scrape_water_level("s", "d", "b", "r") for _ in range(2)]
+
+    first, second = asyncio.run(scrape_twice())
+
+    assert (first["source"], second["source"]) == (SOURCE_FRESH, SOURCE_CACHED)
+    assert source.calls == 1
+
+
+def test_mock_source_is_not_cached():
+    calls = []
+
+    class Provider:
+        records = []
+
+        async def get_water_level_data(self, state, district, basin, river):
+            calls.append(river)
+            return {"station_name": river, "water_levels": [float(len(calls))], "is_mock": True}
+
+    scraper = RiverDataScraper(MockWaterLevelSource(Provider()))
+
+    async def scrape_twice():
+        return [await scraper.scrape_water_level("s", "d", "b", "r") for _ in range(2)]
+
+    first, second = asyncio.run(scrape_twice())
+
+    assert (first["source"], second["source"]) == (SOURCE_FRESH, SOURCE_FRESH)
+    assert first["water_levels"] != second["water_levels"]
+    assert len(scraper.cache) == 0 and not scraper.status()["cache_enabled"]
+
+
+def test_miss_joining_a_background_refresh_gets_the_data():
+    class SlowSource(CountingSource):
+        def __init__(self):
+            super().__init__()
+            self.release = None
+
+        async def fetch(self, state, district, basin, river):
+            if self.calls:
+                await self.release.wait()
+            return await super().fetch(state, district, basin, river)
+
+    source = SlowSource()
+    scraper = RiverDataScraper(source, cache_ttl=0.05, stale_ttl=0.05)
+
+    async def overlap():
+        source.release = asyncio.Event()
+        await scraper.scrape_water_level("s", "d", "b", "r")
+        await asyncio.sleep(0.07)
+        # Stale: served from the cache while a refresh starts (and blocks)
+        stale = await scraper.scrape_water_level("s", "d", "b", "r")
+        await asyncio.sleep(0.05)
+        # Past the stale window: a hard miss that joins the running refresh
+        miss = asyncio.ensure_future(scraper.scrape_water_level("s", "d", "b", "r"))
+        await asyncio.sleep(0.01)
+        source.release.set()
+        return stale, await miss
+
+    stale, miss = asyncio.run(overlap())
+
+    assert stale["source"] == SOURCE_CACHED and stale["water_levels"] == [1.0]
+    assert miss["source"] == SOURCE_FRESH and miss["water_levels"] == [2.0]
+    assert source.calls == 2 and scraper.stats["coalesced"] == 1
+
+
+def test_failed_background_refresh_fails_the_joined_miss_only():
+    class FlakySource(CountingSource):
+        async def fetch(self, state, district, basin, river):
+            if self.calls:
+                await asyncio.sleep(0.05)
+                raise RuntimeError("upstream down")
+            return await super().fetch(state, district, basin, river)
+
+    scraper = RiverDataScraper(FlakySource(), cache_ttl=0.02, stale_ttl=0.02)
+
+    async def overlap():
+        await scraper.scrape_water_level("s", "d", "b", "r")
+        await asyncio.sleep(0.03)
+        await scraper.scrape_water_level("s", "d", "b", "r")
+        await asyncio.sleep(0.03)
+        with pytest.raises(RuntimeError):
+            await scraper.scrape_water_level("s", "d", "b", "r")
+        return scraper._inflight
+
+    assert asyncio.run(overlap()) == {}
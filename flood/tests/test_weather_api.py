@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+import numpy as np
+
+from utils import FALLBACK_RAINFALL, SOURCE_CACHED, SOURCE_FALLBACK, SOURCE_FRESH, WeatherAPI
+from weather_fixture_server import create_app
+
+BASE_URL = "http://weather-fixture/v1/forecast"
+
+
+def _run(app, check):
+    async def main():
+        api = WeatherAPI(base_url=BASE_URL)
+        api.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+        try:
+            return await check(api)
+        finally:
+            await api.close()
+    return asyncio.run(main())
+
+
+def test_fresh_rainfall_is_cached():
+    async def check(api):
+        first = await api.get_rainfall_data_with_source(13.08, 80.27, days=7)
+        second = await api.get_rainfall_data_with_source(13.08, 80.27, days=7)
+        return first, second, api.stats["upstream_requests"]
+
+    (rainfall, source), (cached, cached_source), requests = _run(create_app(), check)
+
+    assert source == SOURCE_FRESH and len(rainfall) == 7
+    assert cached_source == SOURCE_CACHED and cached == rainfall
+    assert requests == 1
+
+
+def test_missing_precipitation_is_fallback_and_not_cached():
+    async def check(api):
+        results = [await api.get_rainfall_data_with_source(13.08, 80.27, days=7) for _ in range(2)]
+        return results, api.stats["upstream_requests"], len(api.rainfall_cache)
+
+    results, requests, cached = _run(create_app(missing_rate=1.0), check)
+
+    assert results == [(FALLBACK_RAINFALL, SOURCE_FALLBACK)] * 2
+    assert requests == 2
+    assert cached == 0
+
+
+def test_batch_matches_single_lookups():
+    coords = [(13.08, 80.27), (9.93, 76.26), (13.08, 80.27)]
+
+    async def check(api):
+        batch, sources = await api.get_rainfall_batch(coords, days=7, with_sources=True)
+        api.rainfall_cache.clear()
+        single = [await api.get_rainfall_data(latitude, longitude, days=7) for latitude, longitude in coords]
+        return batch, sources, single
+
+    batch, sources, single = _run(create_app(), check)
+
+    assert sources == [SOURCE_FRESH] * 3
+    np.testing.assert_array_equal(batch, np.array(single))